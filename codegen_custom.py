@@ -1,49 +1,27 @@
 # codegen_custom.py
+# Options reprises du profil navigateur "debug" (src/config/settings.py) : mêmes arguments,
+# viewport et user-agent que le scraper, fenêtre toujours visible
 from playwright.sync_api import sync_playwright
-import subprocess
-import sys
-
-# ---------- vos options ----------
-VIEWPORT = {'width': 1920, 'height': 1080}
-BROWSER_ARGS = [
-    '--start-maximized',
-    '--force-device-scale-factor=1',
-    '--high-dpi-support=1',
-    '--disable-dev-shm-usage',
-    '--no-sandbox',
-    '--disable-setuid-sandbox',
-    '--disable-blink-features=AutomationControlled',
-]
-USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-              'AppleWebKit/537.36 (KHTML, like Gecko) '
-              'Chrome/120.0.0.0 Safari/537.36')
-# ---------------------------------
+
+from src.config.settings import settings
+from src.minderest.browser import ANTI_DETECTION_SCRIPT, BrowserProfile
+
+PROFILE = BrowserProfile.from_settings("debug", headless=False)
+VIEWPORT = PROFILE.viewport
+
 
 def main():
     with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=False,
-            args=BROWSER_ARGS,
-            ignore_default_args=['--enable-automation', '--disable-default-apps'],
-        )
-
-        context = browser.new_context(
-            viewport=VIEWPORT,
-            screen=VIEWPORT,
-            device_scale_factor=1,
-            user_agent=USER_AGENT,
-            locale='fr-FR',
-        )
+        browser = p.chromium.launch(**PROFILE.launch_options())
+
+        context = browser.new_context(**PROFILE.context_options(), locale='fr-FR')
 
         page = context.new_page()
         # anti-detection
-        page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-            window.chrome = {runtime: {}};
-        """)
+        page.add_init_script(ANTI_DETECTION_SCRIPT)
 
         # ouverture de la page voulue
-        page.goto('https://votre-site-minderest.com/exports/historical')
+        page.goto(f"{settings.MINDEREST_BASE_URL}/exports/historical")
 
         # on laisse codegen s’accrocher à ce navigateur
         print("Playwright codegen va se lancer… Ne fermez pas cette fenêtre.")
@@ -60,4 +38,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,11 +1,13 @@
 """
 Script principal pour tester Phase 1 : Minderest uniquement
-Usage: python main.py --phase minderest
+Usage: python main.py --phase minderest [--mode browser|api] [--submit]
 """
 
+import argparse
 import logging
 import sys
 import os
+from datetime import datetime
 from src.minderest.scraper import MinderestScraper
 
 # Forcer UTF-8 sur Windows
@@ -27,8 +29,25 @@ def setup_logging():
     )
     return logging.getLogger(__name__)
 
-def test_minderest():
-    """Test complet du scraper Minderest"""
+def wait_for_export_mail(logger, file_name: str):
+    """Relève Graph jusqu'à réception de l'export (si configurée), sinon rappel manuel"""
+    from src.config.settings import settings
+    
+    if not (file_name and settings.GRAPH_MAILBOX and settings.GRAPH_CLIENT_ID):
+        print(f"   - Verifiez vos emails dans ~10 minutes")
+        return
+    from src.graph_api.mail import MailboxPoller
+    
+    logger.info("Attente du mail d'export %s (Graph, %s)", file_name, settings.GRAPH_MAILBOX)
+    poller = MailboxPoller()
+    try:
+        for path in poller.wait_for([file_name]):
+            print(f"   - Export recu : {path}")
+    finally:
+        poller.client.close()
+
+def test_minderest(submit: bool = False):
+    """Test complet du scraper Minderest (par défaut formulaire rempli sans envoi ; submit=True : envoi réel)"""
     logger = setup_logging()
     logger.info("="*60)
     logger.info("TEST PHASE 1 : MINDEREST ONLY")
@@ -36,14 +55,19 @@ def test_minderest():
     
     try:
         with MinderestScraper() as scraper:
-            success, result = scraper.run_full_process()
+            success, result = scraper.run_full_process(submit=submit)
             
             if success:
                 logger.info("SUCCESS : %s", result)
                 print("\n[SUCCESS] Phase 1 terminee avec succes !")
-                print(f"   - Le scraper s'est connecte a Minderest")
-                print(f"   - La requete a ete soumise")
-                print(f"   - Verifiez vos emails dans ~10 minutes")
+                if result is None:
+                    print(f"   - Historique deja a jour : aucun export demande")
+                elif not submit:
+                    print(f"   - Formulaire rempli sans envoi (--submit pour soumettre) : {result}")
+                else:
+                    print(f"   - Le scraper s'est connecte a Minderest")
+                    print(f"   - La requete a ete soumise")
+                    wait_for_export_mail(logger, result)
             else:
                 logger.error("ECHEC : %s", result)
                 print("\n[ERROR] Phase 1 echouee. Consultez les logs.")
@@ -53,6 +77,65 @@ def test_minderest():
         logger.exception("ERREUR CRITIQUE: %s", e)
         sys.exit(1)
 
+def test_minderest_api():
+    """Export via l'API rejouée : capture navigateur au premier run, HTTP direct ensuite"""
+    from src.config.settings import settings
+    from src.minderest.api_replay import (
+        ExportApiClient, ExportRequestTemplate, browser_auth_refresher, capture_export_template, template_path,
+    )
+    from src.minderest.browser import export_file_name
+    from src.minderest.calendar import DateRange
+    from src.minderest.watermark import SyncWatermark
+    
+    logger = setup_logging()
+    logger.info("="*60)
+    logger.info("TEST PHASE 1 : MINDEREST (MODE API)")
+    logger.info("="*60)
+    
+    try:
+        # Période du jour (jamais celle figée dans le template à la capture) : delta du watermark si actif
+        watermark, plan, date_range = None, None, DateRange.last_days()
+        if settings.SYNC_ENABLED:
+            watermark = SyncWatermark()
+            plan = watermark.plan(settings.MINDEREST_EMAIL)
+            logger.info("Synchro : %s", plan)
+            if plan.date_range is None:
+                print("\n[SUCCESS] Historique deja a jour : aucun export demande")
+                return
+            date_range = plan.date_range
+        
+        path = template_path(settings.MINDEREST_EMAIL)
+        template = ExportRequestTemplate.load(path)
+        if template is None:
+            logger.info("Aucun template : capture via le navigateur (cet export est soumis)")
+            with MinderestScraper() as scraper:
+                file_name, _ = capture_export_template(scraper, date_range=date_range)
+        else:
+            file_name = export_file_name(datetime.now())
+            with ExportApiClient(template, auth_refresher=browser_auth_refresher(), template_file=path) as client:
+                client.submit(file_name, fields=settings.EXPORT_FIELDS, date_range=date_range)
+        if watermark:
+            watermark.record_submitted(settings.MINDEREST_EMAIL, file_name, date_range, plan.full)
+        
+        logger.info("SUCCESS : %s", file_name)
+        print("\n[SUCCESS] Requete d'export soumise (mode API)")
+        wait_for_export_mail(logger, file_name)
+    except Exception as e:
+        logger.exception("ERREUR CRITIQUE: %s", e)
+        sys.exit(1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Automatisation Minderest")
+    parser.add_argument("--phase", default="minderest", choices=["minderest"])
+    parser.add_argument("--mode", default="browser", choices=["browser", "api"],
+                        help="browser : parcours complet ; api : requete d'export rejouee en HTTP")
+    parser.add_argument("--submit", action="store_true",
+                        help="mode browser : soumettre reellement la requete (par defaut formulaire rempli sans envoi)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    from datetime import datetime
-    test_minderest()
\ No newline at end of file
+    args = parse_args()
+    if args.mode == "api":
+        test_minderest_api()
+    else:
+        test_minderest(submit=args.submit)
@@ -27,16 +27,190 @@ class Settings:
         "historical_comp_avg_stock",
     ]
     
+    # true : l'export échoue si un champ demandé n'a pas pu être coché (sinon simple avertissement)
+    FIELDS_STRICT: bool = os.getenv("FIELDS_STRICT", "false").lower() == "true"
+    
+    # Machine à états : essais max par étape (l'envoi final n'est jamais rejoué)
+    WORKFLOW_MAX_ATTEMPTS: int = int(os.getenv("WORKFLOW_MAX_ATTEMPTS", "3"))
+    
     # Période : 365 jours (1 an exact)
     PERIOD_DAYS = int(os.getenv("PERIOD_DAYS", "365"))
     
+    # Synchro incrémentale : seule la période absente de DATA_HISTORIQUE est demandée
+    SYNC_ENABLED: bool = os.getenv("SYNC_ENABLED", "true").lower() == "true"
+    SYNC_FULL_REFRESH_DAYS: int = int(os.getenv("SYNC_FULL_REFRESH_DAYS", "30"))   # 0 = jamais
+    SYNC_OVERLAP_DAYS: int = int(os.getenv("SYNC_OVERLAP_DAYS", "3"))
+    
+    # Calendrier : "calendar" (navigation directe au mois) ou "input" (saisie dans le champ période)
+    CALENDAR_MODE: str = os.getenv("CALENDAR_MODE", "calendar")
+    CALENDAR_INPUT_FORMAT: str = os.getenv("CALENDAR_INPUT_FORMAT", "%d/%m/%Y")
+    CALENDAR_INPUT_SEPARATOR: str = os.getenv("CALENDAR_INPUT_SEPARATOR", " - ")
+    
+    # Profils navigateur : "debug" (fenêtre, ralenti, trace Playwright), "default" (fenêtre, sans ralenti),
+    # "throughput" (serveurs Linux : headless, ressources bloquées, animations réduites, délais courts)
+    BROWSER_PROFILE: str = os.getenv("BROWSER_PROFILE", "default")
+    ORCHESTRATOR_PROFILE: str = os.getenv("ORCHESTRATOR_PROFILE", "throughput")
+    BROWSER_PROFILES = {
+        "debug": {
+            "headless": False, "slow_mo": 250, "viewport": {"width": 1920, "height": 1080},
+            "block_resources": False, "trace": True, "screenshot_on_failure": True,
+            "timeout_ms": 60000, "navigation_timeout_ms": 90000, "reduced_motion": None, "extra_args": [],
+        },
+        "default": {
+            "headless": False, "slow_mo": 0, "viewport": {"width": 1920, "height": 1080},
+            "block_resources": True, "trace": False, "screenshot_on_failure": True,
+            "timeout_ms": 30000, "navigation_timeout_ms": 30000, "reduced_motion": None, "extra_args": [],
+        },
+        "throughput": {
+            "headless": True, "slow_mo": 0, "viewport": {"width": 1920, "height": 1080},
+            "block_resources": True, "trace": False, "screenshot_on_failure": True,
+            "timeout_ms": 20000, "navigation_timeout_ms": 45000, "reduced_motion": "reduce",
+            "extra_args": ["--disable-gpu", "--disable-extensions", "--mute-audio", "--no-first-run",
+                           "--disable-background-networking", "--disable-renderer-backgrounding"],
+        },
+    }
+    # Surcharges ponctuelles du profil (vide = valeur du profil)
+    HEADLESS: str = os.getenv("HEADLESS", "")
+    BROWSER_SLOW_MO: str = os.getenv("BROWSER_SLOW_MO", "")        # ms ajoutées à chaque action
+    BROWSER_VIEWPORT: str = os.getenv("BROWSER_VIEWPORT", "")      # ex. 1366x768
+    BROWSER_TIMEOUT_MS: str = os.getenv("BROWSER_TIMEOUT_MS", "")
+    
+    # Blocage des ressources inutiles (images, polices, analytics, popup d'onboarding) ; vide = profil
+    BLOCK_RESOURCES: str = os.getenv("BLOCK_RESOURCES", "")
+    BLOCK_RESOURCE_TYPES = [t.strip() for t in os.getenv("BLOCK_RESOURCE_TYPES", "image,media,font").split(",") if t.strip()]
+    BLOCK_URL_PATTERNS = [p.strip() for p in os.getenv(
+        "BLOCK_URL_PATTERNS",
+        r"google-analytics\.com,googletagmanager\.com,doubleclick\.net,hotjar,segment\.(io|com),"
+        r"intercom(cdn)?\.io,userpilot,appcues,pendo\.io,fullstory,clarity\.ms,sentry",
+    ).split(",") if p.strip()]
+    ALLOW_URL_PATTERNS = [p.strip() for p in os.getenv("ALLOW_URL_PATTERNS", "").split(",") if p.strip()]
+    BLOCK_THIRD_PARTY_FRAMES: bool = os.getenv("BLOCK_THIRD_PARTY_FRAMES", "true").lower() == "true"
+    
+    # Mode API : requête d'export capturée dans le navigateur puis rejouée en HTTP
+    EXPORT_API_PATTERN: str = os.getenv("EXPORT_API_PATTERN", r"/exports?/historical|/api/.*export")
+    API_MAX_CONNECTIONS: int = int(os.getenv("API_MAX_CONNECTIONS", "8"))
+    
+    # Tracing : spans par étape (JSON lines) + textfile Prometheus
+    TRACE_ENABLED: bool = os.getenv("TRACE_ENABLED", "false").lower() == "true"
+    TRACE_DIR: str = os.getenv("TRACE_DIR", "logs/traces")
+    TRACE_PROM_FILE: str = os.getenv("TRACE_PROM_FILE", "logs/traces/minderest.prom")
+    
+    # Service navigateur persistant (CDP) : vide = lancement à froid à chaque run
+    BROWSER_SERVICE_URL: str = os.getenv("BROWSER_SERVICE_URL", "")
+    BROWSER_SERVICE_PORT: int = int(os.getenv("BROWSER_SERVICE_PORT", "9300"))
+    BROWSER_CDP_PORT: int = int(os.getenv("BROWSER_CDP_PORT", "9222"))
+    BROWSER_SERVICE_HEADLESS: bool = os.getenv("BROWSER_SERVICE_HEADLESS", "true").lower() == "true"
+    BROWSER_RECYCLE_JOBS: int = int(os.getenv("BROWSER_RECYCLE_JOBS", "50"))
+    BROWSER_RECYCLE_MEMORY_MB: float = float(os.getenv("BROWSER_RECYCLE_MEMORY_MB", "1500"))
+    # Bail non renouvelé depuis N secondes (client planté sans release) : considéré comme rendu
+    BROWSER_LEASE_TTL: float = float(os.getenv("BROWSER_LEASE_TTL", "600"))
+    
+    # Scheduler : file de jobs SQLite
+    SCHEDULER_DB: str = os.getenv("SCHEDULER_DB", "data/scheduler/jobs.sqlite3")
+    SCHEDULER_CONCURRENCY: int = int(os.getenv("SCHEDULER_CONCURRENCY", "4"))
+    SCHEDULER_PER_ACCOUNT_CONCURRENCY: int = int(os.getenv("SCHEDULER_PER_ACCOUNT_CONCURRENCY", "1"))
+    SCHEDULER_ACCOUNT_MIN_INTERVAL: float = float(os.getenv("SCHEDULER_ACCOUNT_MIN_INTERVAL", "30"))
+    SCHEDULER_RETRY_DELAY: float = float(os.getenv("SCHEDULER_RETRY_DELAY", "60"))
+    SCHEDULER_POLL_INTERVAL: float = float(os.getenv("SCHEDULER_POLL_INTERVAL", "5"))
+    SCHEDULER_HEARTBEAT: float = float(os.getenv("SCHEDULER_HEARTBEAT", "30"))
+    SCHEDULER_STALE_AFTER: float = float(os.getenv("SCHEDULER_STALE_AFTER", "300"))
+    
+    # Lecture des exports (data_cleaning) : lots à mémoire bornée
+    READER_BATCH_ROWS: int = int(os.getenv("READER_BATCH_ROWS", "100000"))
+    READER_MAX_BATCH_MB: float = float(os.getenv("READER_MAX_BATCH_MB", "256"))
+    READER_SHEET: str = os.getenv("READER_SHEET", "Lignes")
+    
+    # Ingestion parallèle : processus (0 = nombre de cœurs), échange en Arrow IPC (vide = /dev/shm)
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "0"))
+    INGEST_SPOOL_DIR: str = os.getenv("INGEST_SPOOL_DIR", "")
+    
+    # Nettoyage : report max de la dernière valeur connue (jours), écart max d'un prix concurrent
+    CLEANING_FFILL_LIMIT: int = int(os.getenv("CLEANING_FFILL_LIMIT", "3"))
+    CLEANING_OUTLIER_RATIO: float = float(os.getenv("CLEANING_OUTLIER_RATIO", "3"))
+    
+    # Historique Parquet (data/historique/dataset) : partitions catalogue / mois
+    STORE_DEFAULT_CATALOGUE: str = os.getenv("STORE_DEFAULT_CATALOGUE", "default")
+    STORE_ROW_GROUP_ROWS: int = int(os.getenv("STORE_ROW_GROUP_ROWS", "32768"))
+    STORE_COMPACT_MIN_FILES: int = int(os.getenv("STORE_COMPACT_MIN_FILES", "8"))
+    STORE_COMPACT_INTERVAL: float = float(os.getenv("STORE_COMPACT_INTERVAL", "600"))
+    
+    # CDC : journal des lignes insérées / modifiées / disparues entre deux exports (data/historique/cdc)
+    CDC_ENABLED: bool = os.getenv("CDC_ENABLED", "true").lower() == "true"
+    
+    # Agrégats glissants (data/historique/aggregates) : fenêtres en jours
+    AGGREGATES_ENABLED: bool = os.getenv("AGGREGATES_ENABLED", "true").lower() == "true"
+    AGGREGATE_WINDOWS = tuple(int(w) for w in os.getenv("AGGREGATE_WINDOWS", "7,30,90").split(",") if w.strip())
+    
+    # Microsoft Graph : relève des mails d'export (application Azure AD, client credentials)
+    GRAPH_TENANT_ID: str = os.getenv("GRAPH_TENANT_ID", "")
+    GRAPH_CLIENT_ID: str = os.getenv("GRAPH_CLIENT_ID", "")
+    GRAPH_CLIENT_SECRET: str = os.getenv("GRAPH_CLIENT_SECRET", "")
+    GRAPH_AUTHORITY: str = os.getenv("GRAPH_AUTHORITY", "https://login.microsoftonline.com")
+    GRAPH_BASE_URL: str = os.getenv("GRAPH_BASE_URL", "https://graph.microsoft.com/v1.0")
+    GRAPH_MAILBOX: str = os.getenv("GRAPH_MAILBOX", "")
+    GRAPH_MAIL_FOLDER: str = os.getenv("GRAPH_MAIL_FOLDER", "inbox")
+    GRAPH_STATE_DIR: str = os.getenv("GRAPH_STATE_DIR", "data/graph")
+    GRAPH_MAX_CONNECTIONS: int = int(os.getenv("GRAPH_MAX_CONNECTIONS", "8"))
+    GRAPH_MAX_RETRIES: int = int(os.getenv("GRAPH_MAX_RETRIES", "5"))
+    GRAPH_DOWNLOAD_WORKERS: int = int(os.getenv("GRAPH_DOWNLOAD_WORKERS", "4"))
+    GRAPH_DOWNLOAD_CHUNK_KB: int = int(os.getenv("GRAPH_DOWNLOAD_CHUNK_KB", "1024"))
+    GRAPH_MAIL_LOOKBACK_HOURS: float = float(os.getenv("GRAPH_MAIL_LOOKBACK_HOURS", "48"))
+    GRAPH_MAIL_WAIT_TIMEOUT: float = float(os.getenv("GRAPH_MAIL_WAIT_TIMEOUT", "1800"))
+    GRAPH_MAIL_POLL_INTERVAL: float = float(os.getenv("GRAPH_MAIL_POLL_INTERVAL", "30"))
+    # Publication SharePoint / OneDrive (sessions d'upload)
+    GRAPH_DRIVE_ID: str = os.getenv("GRAPH_DRIVE_ID", "")
+    GRAPH_SITE_ID: str = os.getenv("GRAPH_SITE_ID", "")
+    GRAPH_UPLOAD_FOLDER: str = os.getenv("GRAPH_UPLOAD_FOLDER", "Minderest")
+    GRAPH_UPLOAD_CHUNK_MB: float = float(os.getenv("GRAPH_UPLOAD_CHUNK_MB", "10"))   # arrondi à 320 Kio
+    GRAPH_UPLOAD_WORKERS: int = int(os.getenv("GRAPH_UPLOAD_WORKERS", "3"))
+    GRAPH_SIMPLE_UPLOAD_MAX_MB: float = float(os.getenv("GRAPH_SIMPLE_UPLOAD_MAX_MB", "4"))
+    
     # Chemins
     DATA_INPUT = "data/input"
     DATA_OUTPUT = "data/output"
     LOGS_DIR = "logs"
     DATA_HISTORIQUE = "data/historique"
+    SESSION_DIR = "data/sessions"
+    
+    # Cache de session (évite le login complet à chaque run)
+    SESSION_CACHE_ENABLED: bool = os.getenv("SESSION_CACHE_ENABLED", "true").lower() == "true"
+    SESSION_MAX_AGE_HOURS: float = float(os.getenv("SESSION_MAX_AGE_HOURS", "12"))
+    
+    # Orchestrateur async : nombre d'exports simultanés sur un même Chromium
+    ORCHESTRATOR_CONCURRENCY: int = int(os.getenv("ORCHESTRATOR_CONCURRENCY", "4"))
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    
+    def browser_profile(self, name: str = None) -> dict:
+        """Profil navigateur `name` (défaut BROWSER_PROFILE) avec les surcharges HEADLESS, BROWSER_SLOW_MO,
+        BROWSER_VIEWPORT, BROWSER_TIMEOUT_MS et BLOCK_RESOURCES appliquées"""
+        name = name or self.BROWSER_PROFILE
+        if name not in self.BROWSER_PROFILES:
+            raise KeyError(f"Profil navigateur inconnu : {name} ({', '.join(self.BROWSER_PROFILES)})")
+        profile = dict(self.BROWSER_PROFILES[name], name=name)
+        if self.HEADLESS:
+            profile["headless"] = self.HEADLESS.lower() == "true"
+        if self.BROWSER_SLOW_MO:
+            profile["slow_mo"] = int(self.BROWSER_SLOW_MO)
+        if self.BROWSER_VIEWPORT:
+            width, height = self.BROWSER_VIEWPORT.lower().split("x")
+            profile["viewport"] = {"width": int(width), "height": int(height)}
+        if self.BROWSER_TIMEOUT_MS:
+            profile["timeout_ms"] = int(self.BROWSER_TIMEOUT_MS)
+        if self.BLOCK_RESOURCES:
+            profile["block_resources"] = self.BLOCK_RESOURCES.lower() == "true"
+        return profile
+    
+    def password_for(self, account: str) -> str:
+        """Mot de passe d'un compte : MINDEREST_PASSWORD pour le compte principal,
+        MINDEREST_PASSWORD_<EMAIL EN MAJUSCULES, non alphanumériques -> _> pour les autres"""
+        if not account or account.lower() == (self.MINDEREST_EMAIL or "").lower():
+            return self.MINDEREST_PASSWORD
+        key = "MINDEREST_PASSWORD_" + "".join(c if c.isalnum() else "_" for c in account.upper())
+        password = os.getenv(key)
+        if password is None:
+            raise KeyError(f"Mot de passe introuvable pour {account} (variable {key})")
+        return password
 
 settings = Settings()
\ No newline at end of file
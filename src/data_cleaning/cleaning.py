@@ -0,0 +1,186 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import settings
+from src.data_cleaning.schema import FIELD_TYPES
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = [name for name, kind in FIELD_TYPES.items() if kind == "price"]
+STOCK_COLUMNS = [name for name, kind in FIELD_TYPES.items() if kind == "stock"]
+SERIES_KEYS = ["product_id", "competitor", "comp_country"]
+
+# Libellés de stock rencontrés dans les exports -> 1 (disponible) / 0 (rupture)
+STOCK_FLAGS = {
+    "en stock": 1, "disponible": 1, "in stock": 1, "oui": 1, "yes": 1, "true": 1, "vrai": 1,
+    "rupture": 0, "rupture de stock": 0, "hors stock": 0, "indisponible": 0, "epuise": 0, "épuisé": 0,
+    "out of stock": 0, "non": 0, "no": 0, "false": 0, "faux": 0,
+}
+
+
+@dataclass
+class CleaningReport:
+    """Compteurs d'un lot nettoyé (cumulables entre lots avec +=)"""
+    rows: int = 0
+    unparsed: dict[str, int] = field(default_factory=dict)
+    invalid_bounds: int = 0
+    filled: int = 0
+    outliers: int = 0
+
+    def __iadd__(self, other: "CleaningReport") -> "CleaningReport":
+        self.rows += other.rows
+        for column, count in other.unparsed.items():
+            self.unparsed[column] = self.unparsed.get(column, 0) + count
+        self.invalid_bounds += other.invalid_bounds
+        self.filled += other.filled
+        self.outliers += other.outliers
+        return self
+
+    def log(self):
+        logger.info("Nettoyage : %d lignes, %d bornes min/moy/max invalides, %d valeurs comblees, "
+                    "%d prix concurrents aberrants, non interpretables : %s",
+                    self.rows, self.invalid_bounds, self.filled, self.outliers, self.unparsed or "aucune")
+
+
+def _map_unique(series: pd.Series, convert) -> pd.Series:
+    """Applique `convert` (vectorisé) aux seules valeurs distinctes puis redistribue par codes :
+    un export répète massivement les mêmes prix et libellés"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    converted = np.asarray(convert(pd.Series(uniques, dtype=object)), dtype=np.float32)
+    result = np.full(len(series), np.nan, dtype=np.float32)
+    valid = codes >= 0
+    result[valid] = converted[codes[valid]]
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def _parse_french_numbers(values: pd.Series) -> pd.Series:
+    text = (values.astype(str)
+            .str.replace(r"[€\s]", "", regex=True)
+            .str.replace("EUR", "", case=False, regex=False))
+    # "1.234,56" : le point est un séparateur de milliers quand une virgule décimale suit
+    has_comma = text.str.contains(",", regex=False)
+    text = text.where(~has_comma, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(text, errors="coerce")
+
+
+def parse_prices(series: pd.Series) -> pd.Series:
+    """'1 234,56 €' / '1.234,56' / 12.5 -> float32 (NaN si non interprétable)"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(np.float32)
+    return _map_unique(series, _parse_french_numbers)
+
+
+def _parse_stock_values(values: pd.Series) -> pd.Series:
+    numeric = _parse_french_numbers(values)
+    flags = values.astype(str).str.strip().str.lower().map(STOCK_FLAGS)
+    return numeric.fillna(flags)
+
+
+def parse_stock(series: pd.Series) -> pd.Series:
+    """Quantité ou libellé ('En stock', 'Rupture', 'Oui'...) -> float32 (libellés : 1 / 0)"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(np.float32)
+    return _map_unique(series, _parse_stock_values)
+
+
+def normalize_values(frame: pd.DataFrame, report: CleaningReport) -> pd.DataFrame:
+    for column in PRICE_COLUMNS + STOCK_COLUMNS:
+        if column not in frame.columns:
+            continue
+        raw = frame[column]
+        parsed = parse_prices(raw) if column in PRICE_COLUMNS else parse_stock(raw)
+        unparsed = int((parsed.isna() & raw.notna()).sum())
+        if unparsed:
+            report.unparsed[column] = unparsed
+        frame[column] = parsed
+    return frame
+
+
+def validate_price_bounds(frame: pd.DataFrame, report: CleaningReport) -> pd.DataFrame:
+    """Drapeau `invalid_bounds` : min ≤ moyenne ≤ max non respecté (valeurs présentes uniquement)"""
+    columns = ["historical_cli_min_price", "historical_cli_avg_price", "historical_cli_max_price"]
+    if not all(column in frame.columns for column in columns):
+        return frame
+    low, avg, high = (frame[column].to_numpy() for column in columns)
+    with np.errstate(invalid="ignore"):
+        invalid = (low > avg) | (avg > high) | (low > high)
+    frame["invalid_bounds"] = invalid
+    report.invalid_bounds += int(invalid.sum())
+    return frame
+
+
+def fill_gaps(frame: pd.DataFrame, report: CleaningReport, limit: int = None) -> pd.DataFrame:
+    """Report de la dernière valeur connue par série (produit, concurrent, pays), au plus `limit` jours
+
+    Opère à l'intérieur du lot : les séries coupées entre deux lots ne sont pas comblées à la jonction.
+    """
+    limit = settings.CLEANING_FFILL_LIMIT if limit is None else limit
+    keys = [key for key in SERIES_KEYS if key in frame.columns]
+    columns = [column for column in PRICE_COLUMNS + STOCK_COLUMNS if column in frame.columns]
+    if not limit or not keys or "date" not in frame.columns or not columns:
+        return frame
+
+    ordered = frame.sort_values(keys + ["date"], kind="stable")
+    before = ordered[columns].isna().to_numpy()
+    filled = ordered.groupby(keys, observed=True, sort=False, dropna=False)[columns].ffill(limit=limit)
+    ordered[columns] = filled
+    was_filled = before & ~ordered[columns].isna().to_numpy()
+    ordered["filled"] = was_filled.any(axis=1)
+    report.filled += int(was_filled.sum())
+    return ordered.loc[frame.index]
+
+
+def flag_outliers(frame: pd.DataFrame, report: CleaningReport, ratio: float = None) -> pd.DataFrame:
+    """Drapeau `comp_outlier` : prix concurrent hors de [réf / ratio, réf × ratio]
+
+    Référence = médiane des concurrents du même produit et du même jour à partir de 3 concurrents ;
+    en deçà la médiane inclut trop le prix testé (10 et 100 -> 55, aucun signalé) : prix client,
+    à défaut l'autre concurrent du groupe (médiane sans la ligne testée).
+    """
+    ratio = ratio or settings.CLEANING_OUTLIER_RATIO
+    if "historical_comp_offer" not in frame.columns or "product_id" not in frame.columns:
+        return frame
+
+    comp = frame["historical_comp_offer"]
+    group_keys = ["product_id", "date"] if "date" in frame.columns else ["product_id"]
+    grouped = comp.groupby([frame[key] for key in group_keys], observed=True, sort=False)
+    median = grouped.transform("median").to_numpy(dtype=np.float64)
+    count = grouped.transform("count").to_numpy()
+    total = grouped.transform("sum").to_numpy(dtype=np.float64)
+    values = comp.to_numpy(dtype=np.float64)
+
+    fallback = np.where(count == 2, total - values, np.nan)     # 2 concurrents : l'autre
+    if "historical_cli_price" in frame.columns:
+        client = frame["historical_cli_price"].to_numpy(dtype=np.float64)
+        fallback = np.where(np.isnan(client), fallback, client)
+    reference = np.where(count >= 3, median, fallback)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        relative = values / reference
+        outlier = (relative > ratio) | (relative < 1 / ratio) | (values <= 0)
+    frame["comp_outlier"] = outlier
+    report.outliers += int(outlier.sum())
+    return frame
+
+
+def clean_batch(frame: pd.DataFrame) -> tuple[pd.DataFrame, CleaningReport]:
+    """Pipeline complet sur un lot (opérations par colonnes, sans boucle Python par ligne)"""
+    report = CleaningReport(rows=len(frame))
+    frame = normalize_values(frame, report)
+    frame = validate_price_bounds(frame, report)
+    frame = fill_gaps(frame, report)
+    frame = flag_outliers(frame, report)
+    return frame, report
+
+
+def clean_batches(batches, report: CleaningReport = None) -> Iterator[pd.DataFrame]:
+    """Nettoie au fil de l'eau les lots de reader.read_export ; compteurs cumulés dans `report`"""
+    report = report if report is not None else CleaningReport()
+    for batch in batches:
+        batch, batch_report = clean_batch(batch)
+        report += batch_report
+        yield batch
@@ -0,0 +1,143 @@
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+import pyarrow as pa
+
+from src.config.settings import settings
+from src.data_cleaning.cleaning import CleaningReport, clean_batches
+from src.data_cleaning.reader import ExportReader
+from src.data_cleaning.schema import COLUMN_TYPES
+
+logger = logging.getLogger(__name__)
+
+
+def spool_root() -> str:
+    """Répertoire d'échange worker -> parent : /dev/shm (mémoire partagée) si disponible"""
+    if settings.INGEST_SPOOL_DIR:
+        return settings.INGEST_SPOOL_DIR
+    return "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+
+
+# Type Arrow par type de colonne (schema.COLUMN_TYPES) : fixe pour tout le fichier IPC, un lot où une
+# colonne est entièrement vide (type Arrow `null`) ne détermine pas le type des lots suivants
+ARROW_TYPES = {
+    "string": pa.string(),
+    "category": pa.string(),   # catégories en texte : les dictionnaires varient d'un lot à l'autre
+    "price": pa.float32(),
+    "stock": pa.float32(),
+    "date": pa.timestamp("ns"),
+}
+FLAG_COLUMNS = ("invalid_bounds", "filled", "comp_outlier")
+
+
+def ipc_schema(columns) -> pa.Schema:
+    """Schéma du fichier IPC d'après les noms de colonnes ; colonnes inconnues transportées en texte"""
+    def column_type(column):
+        if column in FLAG_COLUMNS:
+            return pa.bool_()
+        return ARROW_TYPES.get(COLUMN_TYPES.get(column), pa.string())
+    return pa.schema([(column, column_type(column)) for column in columns])
+
+
+def _to_arrow(batch: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """Lot converti au schéma du fichier (colonnes absentes du lot : valeurs nulles)"""
+    arrays = []
+    for column in schema:
+        if column.name not in batch.columns:
+            arrays.append(pa.nulls(len(batch), column.type))
+            continue
+        values = batch[column.name]
+        if pa.types.is_string(column.type) and not pd.api.types.is_string_dtype(values.dtype):
+            values = values.astype("string")
+        arrays.append(pa.array(values, from_pandas=True).cast(column.type))
+    return pa.table(arrays, schema=schema)
+
+
+def clean_to_ipc(path: str, spool_dir: str) -> "CleanedFile":
+    """Worker : lecture + nettoyage d'un export, lots écrits en Arrow IPC dans le spool"""
+    result = CleanedFile(path=path)
+    output = Path(spool_dir) / f"{uuid.uuid4().hex}.arrow"
+    writer = None
+    try:
+        for batch in clean_batches(ExportReader(path), result.report):
+            if writer is None:
+                schema = ipc_schema(batch.columns)
+                writer = pa.ipc.new_file(str(output), schema)
+            extra = [column for column in batch.columns if column not in schema.names]
+            if extra:
+                logger.warning("%s : colonnes absentes du premier lot ignorees : %s", Path(path).name, extra)
+            table = _to_arrow(batch, schema)
+            writer.write_table(table)
+            result.rows += table.num_rows
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+        if writer is not None:
+            writer.close()
+            writer = None
+        output.unlink(missing_ok=True)
+        return result
+    finally:
+        if writer is not None:
+            writer.close()
+    result.ipc_path = str(output) if writer is not None else None
+    return result
+
+
+@dataclass
+class CleanedFile:
+    """Résultat d'un worker : seul ce petit objet est picklé, les données restent dans le fichier IPC"""
+    path: str
+    ipc_path: str | None = None
+    rows: int = 0
+    report: CleaningReport = field(default_factory=CleaningReport)
+    error: str | None = None
+
+    def batches(self) -> Iterator[pd.DataFrame]:
+        """Lots relus par memory-map (pas de copie des colonnes numériques côté Arrow)"""
+        if not self.ipc_path:
+            return
+        with pa.memory_map(self.ipc_path) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index).to_pandas()
+
+    def discard(self):
+        if self.ipc_path:
+            Path(self.ipc_path).unlink(missing_ok=True)
+
+
+def clean_files_parallel(paths: list, workers: int = None) -> Iterator[CleanedFile]:
+    """Nettoie les exports dans un pool de processus ; les résultats sont rendus dans l'ordre des
+    `paths` (fusion déterministe), au plus 2 x workers fichiers d'avance dans le spool"""
+    workers = workers or settings.INGEST_WORKERS or os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    spool_dir = tempfile.mkdtemp(prefix="minderest-ingest-", dir=spool_root())
+    logger.info("Ingestion parallele : %d fichier(s), %d processus, spool %s", len(paths), workers, spool_dir)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            remaining = iter(paths)
+            for path in remaining:
+                pending.append(executor.submit(clean_to_ipc, str(path), spool_dir))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    pending.append(executor.submit(clean_to_ipc, str(next_path), spool_dir))
+                try:
+                    yield result
+                finally:
+                    result.discard()
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
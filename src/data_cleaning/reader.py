@@ -0,0 +1,175 @@
+import csv
+import logging
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from src.config.settings import settings
+from src.data_cleaning.schema import COLUMN_TYPES, NUMERIC_TYPES, canonical_name
+
+logger = logging.getLogger(__name__)
+
+HEADER_SCAN_ROWS = 20   # lignes de titre éventuelles avant l'en-tête
+PROBE_ROWS = 5_000      # premier lot réduit : mesure de l'empreinte par ligne avant d'agrandir
+MIN_KNOWN_HEADERS = 2
+
+
+def downcast_numeric(series: pd.Series) -> pd.Series:
+    """float32 sans perte de valeurs : si des textes ne sont pas des nombres ("1 234,56 €"),
+    la colonne reste brute pour le parsing de data_cleaning"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype(np.float32)
+    numeric = pd.to_numeric(series, errors="coerce")
+    if numeric.notna().sum() < series.notna().sum():
+        return series.astype(object)
+    return numeric.astype(np.float32)
+
+
+def apply_schema(frame: pd.DataFrame) -> pd.DataFrame:
+    """Types cibles par colonne (schema.COLUMN_TYPES) ; colonnes inconnues laissées telles quelles"""
+    for column in frame.columns:
+        kind = COLUMN_TYPES.get(column)
+        if kind in NUMERIC_TYPES:
+            frame[column] = downcast_numeric(frame[column])
+        elif kind == "category":
+            frame[column] = frame[column].astype("category")
+        elif kind == "date":
+            if not pd.api.types.is_datetime64_any_dtype(frame[column]):
+                frame[column] = pd.to_datetime(frame[column], dayfirst=True, errors="coerce")
+        elif kind == "string":
+            frame[column] = frame[column].astype("string")
+    return frame
+
+
+class ExportReader:
+    """Lecture en flux d'un export Minderest (XLSX ou CSV) en lots typés à mémoire bornée
+
+    XLSX : openpyxl en read_only (iter_rows), jamais de chargement complet de la feuille.
+    CSV : pandas.read_csv par morceaux. La taille des lots s'ajuste après le premier lot pour
+    qu'un lot ne dépasse pas `max_batch_mb`, quelle que soit la largeur des lignes.
+    """
+
+    def __init__(self, path, batch_rows: int = None, max_batch_mb: float = None, sheet: str = None):
+        self.path = Path(path)
+        self.batch_rows = batch_rows or settings.READER_BATCH_ROWS
+        self.max_batch_mb = max_batch_mb or settings.READER_MAX_BATCH_MB
+        self.sheet = sheet or settings.READER_SHEET
+        self.columns: list[str] = []
+        self.rows_read = 0
+        self.batches = 0
+        self.peak_batch_mb = 0.0
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        suffix = self.path.suffix.lower()
+        if suffix in (".xlsx", ".xlsm"):
+            batches = self._iter_xlsx()
+        elif suffix in (".csv", ".txt"):
+            batches = self._iter_csv()
+        else:
+            raise ValueError(f"Format d'export non supporte : {self.path.name}")
+
+        for frame in batches:
+            frame = apply_schema(frame)
+            self._account(frame)
+            yield frame
+        logger.info("%s : %d lignes en %d lot(s), lot max %.1f Mo",
+                    self.path.name, self.rows_read, self.batches, self.peak_batch_mb)
+
+    def _next_size(self) -> int:
+        return min(self.batch_rows, PROBE_ROWS) if not self.batches else self.batch_rows
+
+    def _account(self, frame: pd.DataFrame):
+        """Statistiques + recalcul de la taille de lot d'après l'empreinte mémoire réelle"""
+        size_mb = frame.memory_usage(deep=True).sum() / 1_048_576
+        self.rows_read += len(frame)
+        self.batches += 1
+        self.peak_batch_mb = max(self.peak_batch_mb, size_mb)
+        if len(frame):
+            per_row_mb = size_mb / len(frame)
+            # Les lignes brutes (avant typage) pèsent plus que le lot typé : marge x2
+            ceiling_rows = max(1_000, int(self.max_batch_mb / (per_row_mb * 2)))
+            if ceiling_rows < self.batch_rows:
+                logger.debug("  Taille de lot ramenee a %d lignes (plafond %.0f Mo)", ceiling_rows, self.max_batch_mb)
+                self.batch_rows = ceiling_rows
+
+    # ---- XLSX ----
+    def _iter_xlsx(self) -> Iterator[pd.DataFrame]:
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            sheet = workbook[self.sheet] if self.sheet in workbook.sheetnames else workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            header = self._find_header(rows)
+            width = len(header)
+            while True:
+                chunk = list(islice(rows, self._next_size()))
+                if not chunk:
+                    break
+                # Lignes vides (fin de feuille mal dimensionnée) ignorées, lignes courtes complétées
+                chunk = [row[:width] + (None,) * (width - len(row)) for row in chunk
+                         if any(v is not None for v in row)]
+                if chunk:
+                    yield pd.DataFrame.from_records(chunk, columns=self.columns)
+        finally:
+            workbook.close()
+
+    def _find_header(self, rows) -> tuple:
+        for row in islice(rows, HEADER_SCAN_ROWS):
+            names = [canonical_name(v) for v in row]
+            if sum(name in COLUMN_TYPES for name in names) >= MIN_KNOWN_HEADERS:
+                # Colonnes vides en fin de ligne : tronquées
+                while names and not names[-1]:
+                    names.pop()
+                self.columns = self._dedupe(names)
+                return tuple(self.columns)
+        raise ValueError(f"En-tete introuvable dans les {HEADER_SCAN_ROWS} premieres lignes de {self.path.name}")
+
+    @staticmethod
+    def _dedupe(names: list[str]) -> list[str]:
+        seen: dict[str, int] = {}
+        result = []
+        for index, name in enumerate(names):
+            name = name or f"col_{index}"
+            count = seen.get(name, 0)
+            seen[name] = count + 1
+            result.append(name if not count else f"{name}_{count}")
+        return result
+
+    # ---- CSV ----
+    def _iter_csv(self) -> Iterator[pd.DataFrame]:
+        with open(self.path, encoding="utf-8-sig", newline="") as f:
+            sample = f.read(64 * 1024)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=";,\t").delimiter
+        except csv.Error:
+            delimiter = ";"
+
+        header_line = 0
+        lines = sample.splitlines()[:HEADER_SCAN_ROWS]
+        for header_line, cells in enumerate(csv.reader(lines, delimiter=delimiter)):
+            names = [canonical_name(v) for v in cells]
+            if sum(name in COLUMN_TYPES for name in names) >= MIN_KNOWN_HEADERS:
+                self.columns = self._dedupe(names)
+                break
+        else:
+            raise ValueError(f"En-tete introuvable dans les {HEADER_SCAN_ROWS} premieres lignes de {self.path.name}")
+
+        # Tout en texte : même chemin de typage que l'XLSX (virgule décimale, symbole €, etc.)
+        reader = pd.read_csv(
+            self.path, sep=delimiter, encoding="utf-8-sig", skiprows=header_line + 1, header=None,
+            names=self.columns, dtype=str, keep_default_na=False, na_values=[""],
+            chunksize=self._next_size(),
+        )
+        with reader:
+            for chunk in reader:
+                yield chunk
+                # Taille de lot recalculée par _account : appliquée au morceau suivant
+                reader.chunksize = self._next_size()
+
+
+def read_export(path, **kwargs) -> Iterator[pd.DataFrame]:
+    """Lots typés d'un export Minderest (voir ExportReader)"""
+    return iter(ExportReader(path, **kwargs))
@@ -0,0 +1,78 @@
+import re
+import unicodedata
+
+# Colonnes d'un export "Lignes" : nom canonique -> type cible
+# - "price" / "stock" : numériques (float32 après conversion, les textes "1 234,56 €" restent bruts
+#   tant que data_cleaning ne les a pas interprétés)
+# - "category" : faible cardinalité, stockée en pandas.Categorical
+# - "date" : datetime64
+IDENTITY_COLUMNS = {
+    "product_id": "string",
+    "product_name": "string",
+    "competitor": "category",
+    "date": "date",
+}
+FIELD_TYPES = {
+    "comp_country": "category",
+    "cli_category_level_3": "category",
+    "cli_category_level_4": "category",
+    "historical_cli_min_price": "price",
+    "historical_cli_max_price": "price",
+    "historical_cli_avg_price": "price",
+    "historical_cli_price": "price",
+    "historical_cli_offer": "price",
+    "historical_cli_cost": "price",
+    "historical_comp_offer": "price",
+    "historical_cli_avg_stock": "stock",
+    "historical_cli_stock": "stock",
+    "historical_comp_avg_stock": "stock",
+    "historical_comp_stock": "stock",
+}
+COLUMN_TYPES = {**IDENTITY_COLUMNS, **FIELD_TYPES}
+NUMERIC_TYPES = ("price", "stock")
+
+# En-têtes rencontrés dans les exports (normalisés par normalize_header) -> nom canonique
+HEADER_ALIASES = {
+    "id": "product_id",
+    "id_produit": "product_id",
+    "reference": "product_id",
+    "sku": "product_id",
+    "ean": "product_id",
+    "produit": "product_name",
+    "nom": "product_name",
+    "nom_produit": "product_name",
+    "concurrent": "competitor",
+    "competiteur": "competitor",
+    "competitor_name": "competitor",
+    "pays": "comp_country",
+    "pays_concurrent": "comp_country",
+    "country": "comp_country",
+    "categorie_niveau_3": "cli_category_level_3",
+    "categorie_niveau_4": "cli_category_level_4",
+    "jour": "date",
+    "date_historique": "date",
+    "prix_min": "historical_cli_min_price",
+    "prix_max": "historical_cli_max_price",
+    "prix_moyen": "historical_cli_avg_price",
+    "prix": "historical_cli_price",
+    "prix_promo": "historical_cli_offer",
+    "cout": "historical_cli_cost",
+    "stock": "historical_cli_stock",
+    "stock_moyen": "historical_cli_avg_stock",
+    "prix_promo_concurrent": "historical_comp_offer",
+    "stock_concurrent": "historical_comp_stock",
+    "stock_moyen_concurrent": "historical_comp_avg_stock",
+}
+
+
+def normalize_header(value) -> str:
+    """'Prix moyen (€)' -> 'prix_moyen' : minuscules, sans accents ni ponctuation"""
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"\([^)]*\)", " ", text.lower())
+    return re.sub(r"[^a-z0-9]+", "_", text).strip("_")
+
+
+def canonical_name(header) -> str:
+    """Nom canonique d'une colonne ; un en-tête inconnu garde sa forme normalisée"""
+    name = normalize_header(header)
+    return name if name in COLUMN_TYPES else HEADER_ALIASES.get(name, name)
@@ -0,0 +1,60 @@
+"""
+Relève des mails d'export Minderest via Microsoft Graph
+Usage:
+    python -m src.graph_api poll                                   # un passage (requête delta)
+    python -m src.graph_api wait Exports_Minderset_01-06-2025_08h00s [--timeout 1800]
+    python -m src.graph_api upload [--dir data/output] [--pattern "*.xlsx"]   # publication SharePoint
+"""
+import argparse
+import logging
+import sys
+
+from src.config.settings import settings
+from src.graph_api.mail import MailboxPoller
+from src.graph_api.upload import DriveUploader
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Releve des mails d'export (Microsoft Graph)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("poll", help="telecharger les exports recus depuis le dernier passage")
+    wait = sub.add_parser("wait", help="attendre des exports precis")
+    wait.add_argument("names", nargs="+")
+    wait.add_argument("--timeout", type=float)
+    wait.add_argument("--interval", type=float)
+    upload = sub.add_parser("upload", help="publier les fichiers nettoyes (SharePoint / OneDrive)")
+    upload.add_argument("--dir", help="dossier a publier (defaut: DATA_OUTPUT)")
+    upload.add_argument("--pattern", default="*")
+    upload.add_argument("--workers", type=int)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == "upload":
+        uploader = DriveUploader(workers=args.workers)
+        try:
+            results = uploader.upload_directory(args.dir, args.pattern)
+        finally:
+            uploader.client.close()
+        for result in results:
+            print(f"{result.status:8} {result.remote_path}")
+        return 1 if any(r.status == "failed" for r in results) else 0
+
+    poller = MailboxPoller()
+    try:
+        if args.command == "poll":
+            paths = poller.poll()
+        else:
+            try:
+                paths = poller.wait_for(args.names, args.timeout, args.interval)
+            except TimeoutError as e:
+                print(e)
+                return 1
+    finally:
+        poller.client.close()
+    for path in paths:
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
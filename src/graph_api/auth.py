@@ -0,0 +1,55 @@
+import logging
+import threading
+import time
+
+import httpx
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+GRAPH_SCOPE = "https://graph.microsoft.com/.default"
+REFRESH_MARGIN = 300   # renouvellement 5 min avant expiration
+
+
+class GraphAuthError(Exception):
+    """Jeton Microsoft Graph refusé ou configuration incomplète"""
+
+
+class ClientCredentialsToken:
+    """Jeton d'application (client credentials, Azure AD) mis en cache jusqu'à son expiration"""
+
+    def __init__(self, tenant_id: str = None, client_id: str = None, client_secret: str = None,
+                 authority: str = None, scope: str = GRAPH_SCOPE, http: httpx.Client = None):
+        self.tenant_id = tenant_id or settings.GRAPH_TENANT_ID
+        self.client_id = client_id or settings.GRAPH_CLIENT_ID
+        self.client_secret = client_secret or settings.GRAPH_CLIENT_SECRET
+        self.authority = (authority or settings.GRAPH_AUTHORITY).rstrip("/")
+        self.scope = scope
+        self.http = http or httpx.Client(timeout=30)
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        if not (self.tenant_id and self.client_id and self.client_secret):
+            raise GraphAuthError("GRAPH_TENANT_ID, GRAPH_CLIENT_ID et GRAPH_CLIENT_SECRET sont requis")
+
+    def token(self) -> str:
+        with self._lock:
+            if self._token and time.time() < self._expires_at - REFRESH_MARGIN:
+                return self._token
+            response = self.http.post(
+                f"{self.authority}/{self.tenant_id}/oauth2/v2.0/token",
+                data={"grant_type": "client_credentials", "client_id": self.client_id,
+                      "client_secret": self.client_secret, "scope": self.scope},
+            )
+            if response.status_code != 200:
+                raise GraphAuthError(f"Jeton Graph refuse ({response.status_code}) : {response.text[:200]}")
+            payload = response.json()
+            self._token = payload["access_token"]
+            self._expires_at = time.time() + int(payload.get("expires_in", 3600))
+            logger.info("Jeton Graph obtenu (valide %s s)", payload.get("expires_in"))
+            return self._token
+
+    def invalidate(self):
+        with self._lock:
+            self._token = None
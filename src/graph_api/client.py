@@ -0,0 +1,149 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urlparse
+
+import httpx
+
+from src.config.settings import settings
+from src.graph_api.auth import ClientCredentialsToken
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class GraphError(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"Graph {response.request.method} {response.request.url.path} -> "
+                         f"{response.status_code} : {response.text[:300]}")
+        self.status_code = response.status_code
+        self.response = response
+
+
+class GraphClient:
+    """Client Microsoft Graph sur un pool de connexions httpx partagé (utilisable depuis plusieurs threads)
+
+    - jeton ajouté uniquement sous base_url (jamais pour les liens de téléchargement externes)
+    - 401 : jeton renouvelé une fois ; 429/5xx : nouvel essai après Retry-After (throttling Graph)
+    - erreurs réseau (timeout, connexion coupée) : nouvel essai avec attente exponentielle
+    """
+
+    def __init__(self, base_url: str = None, token_provider: ClientCredentialsToken = None,
+                 max_connections: int = None, timeout: float = 60):
+        self.base_url = (base_url or settings.GRAPH_BASE_URL).rstrip("/")
+        self.token_provider = token_provider or ClientCredentialsToken()
+        max_connections = max_connections or settings.GRAPH_MAX_CONNECTIONS
+        self.http = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=True,   # httpx retire Authorization si la redirection change d'origine
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.http.close()
+
+    def url(self, path_or_url: str) -> str:
+        return path_or_url if path_or_url.startswith("http") else f"{self.base_url}/{path_or_url.lstrip('/')}"
+
+    def is_graph(self, url: str) -> bool:
+        return url.startswith(self.base_url + "/")
+
+    def _headers(self, url: str, headers: dict = None) -> dict:
+        headers = dict(headers or {})
+        if self.is_graph(url):
+            headers["Authorization"] = f"Bearer {self.token_provider.token()}"
+        return headers
+
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return min(60.0, 2.0 ** attempt)
+
+    def _transport_retry(self, method: str, url: str, error: httpx.TransportError, attempt: int) -> bool:
+        """True si une erreur réseau peut être rejouée (après attente), False au dernier essai"""
+        if attempt >= settings.GRAPH_MAX_RETRIES:
+            return False
+        delay = min(60.0, 2.0 ** attempt)
+        logger.warning("Graph %s %s : %s (%s), nouvel essai dans %.0fs", method, urlparse(url).path,
+                       type(error).__name__, error, delay)
+        time.sleep(delay)
+        return True
+
+    def request(self, method: str, path_or_url: str, **kwargs) -> httpx.Response:
+        url = self.url(path_or_url)
+        headers = kwargs.pop("headers", None)
+        refreshed = False
+        for attempt in range(settings.GRAPH_MAX_RETRIES + 1):
+            try:
+                response = self.http.request(method, url, headers=self._headers(url, headers), **kwargs)
+            except httpx.TransportError as e:
+                if self._transport_retry(method, url, e, attempt):
+                    continue
+                raise
+            if response.status_code == 401 and not refreshed and self.is_graph(url):
+                self.token_provider.invalidate()
+                refreshed = True
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < settings.GRAPH_MAX_RETRIES:
+                delay = self._retry_delay(response, attempt)
+                logger.warning("Graph %s %s -> %d, nouvel essai dans %.0fs", method, urlparse(url).path,
+                               response.status_code, delay)
+                time.sleep(delay)
+                continue
+            if response.status_code >= 400:
+                raise GraphError(response)
+            return response
+        raise GraphError(response)
+
+    def get_json(self, path_or_url: str, **kwargs) -> dict:
+        return self.request("GET", path_or_url, **kwargs).json()
+
+    def paginate(self, path_or_url: str, params: dict = None, headers: dict = None) -> Iterator[dict]:
+        """Pages d'une collection Graph (suit @odata.nextLink ; la dernière porte @odata.deltaLink)"""
+        page = self.get_json(path_or_url, params=params, headers=headers)
+        yield page
+        while "@odata.nextLink" in page:
+            page = self.get_json(page["@odata.nextLink"], headers=headers)
+            yield page
+
+    def download(self, path_or_url: str, destination: Path, chunk_size: int = None) -> Path:
+        """Téléchargement en flux par morceaux vers `destination` (fichier .part puis rename)"""
+        url = self.url(path_or_url)
+        chunk_size = chunk_size or settings.GRAPH_DOWNLOAD_CHUNK_KB * 1024
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        part = destination.with_name(destination.name + ".part")
+        for attempt in range(settings.GRAPH_MAX_RETRIES + 1):
+            try:
+                with self.http.stream("GET", url, headers=self._headers(url)) as response:
+                    if response.status_code in RETRY_STATUSES and attempt < settings.GRAPH_MAX_RETRIES:
+                        time.sleep(self._retry_delay(response, attempt))
+                        continue
+                    if response.status_code == 401 and attempt == 0 and self.is_graph(url):
+                        self.token_provider.invalidate()
+                        continue
+                    if response.status_code >= 400:
+                        response.read()
+                        raise GraphError(response)
+                    with open(part, "wb") as f:
+                        for chunk in response.iter_bytes(chunk_size):
+                            f.write(chunk)
+            except httpx.TransportError as e:
+                # Coupure pendant l'en-tête ou le corps : téléchargement repris depuis le début
+                if self._transport_retry("GET", url, e, attempt):
+                    continue
+                raise
+            os.replace(part, destination)
+            return destination
+        raise GraphError(response)
@@ -0,0 +1,204 @@
+import html
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import quote, unquote, urlparse
+
+from src.config.settings import settings
+from src.graph_api.client import GraphClient
+
+logger = logging.getLogger(__name__)
+
+# Nom généré par browser.EXPORT_NAME_TEMPLATE : Exports_Minderset_31-12-2025_08h05s
+EXPORT_NAME_RE = re.compile(r"Exports_Minderset_\d{2}-\d{2}-\d{4}_\d{2}h\d{2}s?")
+EXPORT_EXTENSIONS = (".xlsx", ".xls", ".csv", ".zip")
+LINK_RE = re.compile(r"""href\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+MESSAGE_FIELDS = "subject,receivedDateTime,hasAttachments,bodyPreview,body"
+MAX_PROCESSED = 500
+
+
+@dataclass
+class Download:
+    """Fichier à récupérer : pièce jointe Graph ($value) ou lien de téléchargement du mail"""
+    message_id: str
+    url: str
+    destination: Path
+    size: int | None = None
+
+
+@dataclass
+class ExportMail:
+    message_id: str
+    subject: str
+    names: set[str] = field(default_factory=set)
+    links: list[str] = field(default_factory=list)
+    has_attachments: bool = False
+
+
+class MailboxPoller:
+    """Relève des mails d'export Minderest par requêtes delta Graph (seuls les messages nouveaux ou
+    modifiés depuis le dernier passage sont transférés, jamais la boîte complète)
+
+    Les pièces jointes ou liens correspondant à un nom `Exports_Minderset_...` sont écrits en flux
+    dans DATA_INPUT, plusieurs téléchargements en parallèle sur le pool de connexions du client.
+    """
+
+    def __init__(self, client: GraphClient = None, mailbox: str = None, folder: str = None,
+                 download_dir: str = None, state_dir: str = None, workers: int = None):
+        self.client = client or GraphClient()
+        self.mailbox = mailbox or settings.GRAPH_MAILBOX
+        self.folder = folder or settings.GRAPH_MAIL_FOLDER
+        self.download_dir = Path(download_dir or settings.DATA_INPUT)
+        slug = re.sub(r"[^a-z0-9]+", "_", f"{self.mailbox}_{self.folder}".lower())
+        self.state_path = Path(state_dir or settings.GRAPH_STATE_DIR) / f"mail_delta_{slug}.json"
+        self.workers = workers or settings.GRAPH_DOWNLOAD_WORKERS
+        if not self.mailbox:
+            raise ValueError("GRAPH_MAILBOX non renseigne")
+
+    # ---- état delta ----
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"delta_link": None, "processed": {}}
+
+    def _save_state(self, state: dict):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        processed = state["processed"]
+        if len(processed) > MAX_PROCESSED:
+            state["processed"] = dict(list(processed.items())[-MAX_PROCESSED:])
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def changed_messages(self, delta_link: str = None) -> tuple[list[dict], str]:
+        """Messages nouveaux/modifiés depuis `delta_link` ; premier passage limité à la période récente"""
+        headers = {"Prefer": "odata.maxpagesize=50"}
+        if delta_link:
+            pages = self.client.paginate(delta_link, headers=headers)
+        else:
+            since = datetime.now(timezone.utc) - timedelta(hours=settings.GRAPH_MAIL_LOOKBACK_HOURS)
+            path = f"/users/{quote(self.mailbox)}/mailFolders/{quote(self.folder)}/messages/delta"
+            params = {"$select": MESSAGE_FIELDS,
+                      "$filter": f"receivedDateTime ge {since:%Y-%m-%dT%H:%M:%SZ}"}
+            pages = self.client.paginate(path, params=params, headers=headers)
+
+        messages, next_delta = [], delta_link
+        for page in pages:
+            messages.extend(m for m in page.get("value", []) if "@removed" not in m)
+            next_delta = page.get("@odata.deltaLink", next_delta)
+        return messages, next_delta
+
+    # ---- correspondance ----
+    @staticmethod
+    def match(message: dict, expected: set[str] = None) -> ExportMail | None:
+        """Mail d'export si un nom Exports_Minderset_... apparaît (sujet, aperçu, corps, liens)"""
+        body = (message.get("body") or {}).get("content") or ""
+        text = " ".join([message.get("subject") or "", message.get("bodyPreview") or "", body])
+        names = set(EXPORT_NAME_RE.findall(text))
+        if expected is not None and not (names & expected):
+            return None
+        if not names:
+            return None
+        links = [html.unescape(link) for link in LINK_RE.findall(body)
+                 if link.startswith("http") and (EXPORT_NAME_RE.search(unquote(link)) or "export" in link.lower())]
+        return ExportMail(message["id"], message.get("subject") or "", names, links,
+                          bool(message.get("hasAttachments")))
+
+    def _downloads_for(self, mail: ExportMail) -> list[Download]:
+        downloads = []
+        if mail.has_attachments:
+            path = f"/users/{quote(self.mailbox)}/messages/{mail.message_id}/attachments"
+            for page in self.client.paginate(path, params={"$select": "id,name,size"}):
+                for attachment in page.get("value", []):
+                    name = attachment.get("name") or ""
+                    if attachment.get("@odata.type", "#microsoft.graph.fileAttachment") != "#microsoft.graph.fileAttachment":
+                        continue
+                    if not name.lower().endswith(EXPORT_EXTENSIONS):
+                        continue
+                    downloads.append(Download(mail.message_id, f"{path}/{attachment['id']}/$value",
+                                              self.download_dir / Path(name).name, attachment.get("size")))
+        if not downloads:
+            for link in mail.links:
+                link_name = Path(unquote(urlparse(link).path)).name
+                if not link_name.lower().endswith(EXPORT_EXTENSIONS):
+                    name_match = EXPORT_NAME_RE.search(unquote(link))
+                    link_name = f"{name_match.group(0) if name_match else sorted(mail.names)[0]}.xlsx"
+                downloads.append(Download(mail.message_id, link, self.download_dir / link_name))
+        return downloads
+
+    def _fetch(self, download: Download) -> Path | None:
+        destination = download.destination
+        if destination.exists() and download.size is not None and destination.stat().st_size == download.size:
+            logger.info("  %s deja present, ignore", destination.name)
+            return destination
+        started = time.perf_counter()
+        self.client.download(download.url, destination)
+        logger.info("  %s telecharge (%.1f Mo, %.1fs)", destination.name,
+                    destination.stat().st_size / 1_048_576, time.perf_counter() - started)
+        return destination
+
+    # ---- API ----
+    def poll(self, expected: set[str] = None) -> list[Path]:
+        """Un passage : messages delta -> mails d'export -> téléchargements parallèles ; retourne les fichiers"""
+        state = self._load_state()
+        messages, delta_link = self.changed_messages(state["delta_link"])
+        mails = [mail for mail in (self.match(m) for m in messages) if mail and mail.message_id not in state["processed"]]
+
+        downloads = [d for mail in mails for d in self._downloads_for(mail)]
+        paths: list[Path] = []
+        if downloads:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(downloads))) as executor:
+                paths = [p for p in executor.map(self._fetch, downloads) if p]
+
+        for mail in mails:
+            state["processed"][mail.message_id] = sorted(mail.names)
+        # Le delta n'avance qu'une fois les fichiers écrits : un crash rejoue ces messages au passage suivant
+        state["delta_link"] = delta_link
+        self._save_state(state)
+        logger.info("Releve mail : %d message(s) modifie(s), %d mail(s) d'export, %d fichier(s)",
+                    len(messages), len(mails), len(paths))
+        if expected:
+            paths = [p for p in paths if any(p.name.startswith(name) for name in expected)]
+        return paths
+
+    def already_received(self, names: set[str]) -> tuple[list[Path], set[str]]:
+        """Exports déjà relevés (autre `poll`, `wait_for` précédent) : fichiers présents dans DATA_INPUT
+        et mails déjà traités d'après l'état delta ; retourne (fichiers, noms trouvés)"""
+        paths: list[Path] = []
+        if self.download_dir.exists():
+            paths = sorted(path for path in self.download_dir.iterdir()
+                           if path.name.lower().endswith(EXPORT_EXTENSIONS)
+                           and any(path.name.startswith(name) for name in names))
+        found = {name for name in names if any(path.name.startswith(name) for path in paths)}
+        processed = {name for mail_names in self._load_state()["processed"].values() for name in mail_names}
+        for name in (names & processed) - found:
+            logger.info("  %s deja releve (fichier plus dans %s)", name, self.download_dir)
+        return paths, found | (names & processed)
+
+    def wait_for(self, names: list[str], timeout: float = None, interval: float = None) -> list[Path]:
+        """Relève jusqu'à réception de tous les exports `names` (remplace l'attente fixe de ~10 minutes)"""
+        timeout = settings.GRAPH_MAIL_WAIT_TIMEOUT if timeout is None else timeout
+        interval = settings.GRAPH_MAIL_POLL_INTERVAL if interval is None else interval
+        received, found = self.already_received(set(names))
+        remaining = set(names) - found
+        if not remaining:
+            return received
+        deadline = time.monotonic() + timeout
+        while True:
+            for path in self.poll(remaining):
+                received.append(path)
+                remaining = {name for name in remaining if not path.name.startswith(name)}
+            if not remaining:
+                return received
+            if time.monotonic() + interval > deadline:
+                raise TimeoutError(f"Export(s) non recu(s) apres {timeout:.0f}s : {', '.join(sorted(remaining))}")
+            time.sleep(interval)
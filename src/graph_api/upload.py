@@ -0,0 +1,219 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+
+from src.config.settings import settings
+from src.graph_api.client import GraphClient, GraphError
+
+logger = logging.getLogger(__name__)
+
+# Graph : morceaux multiples de 320 Kio, 60 Mio maximum, envoyés dans l'ordre (pas de parallélisme
+# à l'intérieur d'une session) ; le parallélisme se fait entre fichiers
+CHUNK_UNIT = 320 * 1024
+MAX_CHUNK = 60 * 1024 * 1024
+
+
+def chunk_size_bytes(megabytes: float) -> int:
+    size = int(megabytes * 1024 * 1024) // CHUNK_UNIT * CHUNK_UNIT
+    return min(MAX_CHUNK, max(CHUNK_UNIT, size))
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class UploadResult:
+    path: Path
+    remote_path: str
+    status: str                  # uploaded, resumed, skipped, failed
+    bytes_sent: int = 0
+    item_id: str | None = None
+    error: str | None = None
+
+
+class SessionExpired(Exception):
+    pass
+
+
+class DriveUploader:
+    """Publication de fichiers vers SharePoint / OneDrive (Graph)
+
+    - petits fichiers : PUT simple ; au-delà de GRAPH_SIMPLE_UPLOAD_MAX_MB : session d'upload par morceaux
+    - reprise : l'URL de session est gardée dans le manifeste, un run interrompu repart du premier
+      octet attendu par le serveur (nextExpectedRanges)
+    - fichiers inchangés (même SHA-256 que le dernier envoi réussi) : ignorés
+    """
+
+    def __init__(self, client: GraphClient = None, drive_id: str = None, site_id: str = None, folder: str = None,
+                 chunk_mb: float = None, workers: int = None, state_dir: str = None):
+        self.client = client or GraphClient()
+        self.drive_id = drive_id or settings.GRAPH_DRIVE_ID
+        self.site_id = site_id or settings.GRAPH_SITE_ID
+        self.folder = (settings.GRAPH_UPLOAD_FOLDER if folder is None else folder).strip("/")
+        self.chunk_size = chunk_size_bytes(chunk_mb or settings.GRAPH_UPLOAD_CHUNK_MB)
+        self.workers = workers or settings.GRAPH_UPLOAD_WORKERS
+        if not (self.drive_id or self.site_id):
+            raise ValueError("GRAPH_DRIVE_ID ou GRAPH_SITE_ID requis pour publier")
+        slug = re.sub(r"[^a-z0-9]+", "_", f"{self.drive_id or self.site_id}_{self.folder}".lower())
+        self.manifest_path = Path(state_dir or settings.GRAPH_STATE_DIR) / f"uploads_{slug}.json"
+        self._lock = threading.Lock()
+
+    @property
+    def drive_root(self) -> str:
+        return f"/drives/{self.drive_id}/root" if self.drive_id else f"/sites/{self.site_id}/drive/root"
+
+    def remote_path(self, name: str) -> str:
+        return f"{self.folder}/{name}" if self.folder else name
+
+    def _item_url(self, remote_path: str, action: str) -> str:
+        return f"{self.drive_root}:/{quote(remote_path)}:/{action}"
+
+    # ---- manifeste ----
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _update_manifest(self, remote_path: str, **values):
+        with self._lock:
+            manifest = self._read_manifest()
+            entry = manifest.setdefault(remote_path, {})
+            entry.update(values)
+            entry = {k: v for k, v in entry.items() if v is not None}
+            manifest[remote_path] = entry
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.manifest_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+
+    # ---- upload ----
+    def upload_file(self, path, remote_name: str = None) -> UploadResult:
+        path = Path(path)
+        remote_path = self.remote_path(remote_name or path.name)
+        digest = file_sha256(path)
+        entry = self._read_manifest().get(remote_path, {})
+        if entry.get("sha256") == digest and entry.get("item_id"):
+            logger.info("%s inchange, non renvoye", remote_path)
+            return UploadResult(path, remote_path, "skipped", item_id=entry["item_id"])
+
+        size = path.stat().st_size
+        started = time.perf_counter()
+        try:
+            if size <= settings.GRAPH_SIMPLE_UPLOAD_MAX_MB * 1024 * 1024:
+                item = self.client.request("PUT", self._item_url(remote_path, "content"),
+                                           content=path.read_bytes()).json()
+                result = UploadResult(path, remote_path, "uploaded", size, item.get("id"))
+            else:
+                result = self._upload_session(path, remote_path, size, digest, entry.get("session"))
+        except (GraphError, httpx.HTTPError, OSError) as e:
+            # La session reste dans le manifeste : le prochain lancement reprend au premier octet manquant
+            logger.error("Upload %s en echec : %s", remote_path, e)
+            return UploadResult(path, remote_path, "failed", error=str(e))
+
+        self._update_manifest(remote_path, sha256=digest, size=size, item_id=result.item_id, session=None,
+                              uploaded_at=datetime.now().isoformat(timespec="seconds"))
+        logger.info("%s publie (%s, %.1f Mo envoyes en %.1fs)", remote_path, result.status,
+                    result.bytes_sent / 1_048_576, time.perf_counter() - started)
+        return result
+
+    def _new_session(self, remote_path: str, digest: str) -> dict:
+        payload = {"item": {"@microsoft.graph.conflictBehavior": "replace"}}
+        response = self.client.request("POST", self._item_url(remote_path, "createUploadSession"), json=payload)
+        session = {"url": response.json()["uploadUrl"], "expires": response.json().get("expirationDateTime"),
+                   "sha256": digest}
+        self._update_manifest(remote_path, session=session)
+        return session
+
+    def _next_offset(self, session: dict) -> int:
+        """Premier octet attendu par le serveur pour une session existante"""
+        try:
+            status = self.client.request("GET", session["url"]).json()
+        except GraphError as e:
+            if e.status_code == 404:
+                raise SessionExpired() from e
+            raise
+        ranges = status.get("nextExpectedRanges") or ["0-"]
+        return int(ranges[0].split("-")[0])
+
+    def _upload_session(self, path: Path, remote_path: str, size: int, digest: str, saved: dict = None) -> UploadResult:
+        status = "uploaded"
+        session, offset = None, 0
+        if saved and saved.get("sha256") == digest and not _expired(saved.get("expires")):
+            try:
+                session, offset = saved, self._next_offset(saved)
+                status = "resumed"
+                logger.info("%s : reprise de la session a %.1f Mo", remote_path, offset / 1_048_576)
+            except SessionExpired:
+                session = None
+        if session is None:
+            session, offset = self._new_session(remote_path, digest), 0
+
+        sent = 0
+        with open(path, "rb") as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                end = offset + len(chunk) - 1
+                try:
+                    # URL de session pré-authentifiée : pas de jeton (ajouté seulement sous base_url)
+                    response = self.client.request("PUT", session["url"], content=chunk, headers={
+                        "Content-Range": f"bytes {offset}-{end}/{size}",
+                        "Content-Length": str(len(chunk)),
+                    })
+                except GraphError as e:
+                    if e.status_code == 416:
+                        # Morceau déjà reçu (réponse perdue) : se recaler sur le serveur
+                        offset = self._next_offset(session)
+                        continue
+                    raise
+                sent += len(chunk)
+                if response.status_code in (200, 201):
+                    return UploadResult(path, remote_path, status, sent, response.json().get("id"))
+                ranges = response.json().get("nextExpectedRanges") or [f"{end + 1}-"]
+                offset = int(ranges[0].split("-")[0])
+
+    def upload_many(self, paths: list, workers: int = None) -> list[UploadResult]:
+        """Plusieurs fichiers en parallèle (les morceaux d'un même fichier restent séquentiels)"""
+        paths = list(paths)
+        if not paths:
+            return []
+        with ThreadPoolExecutor(max_workers=min(workers or self.workers, len(paths))) as executor:
+            results = list(executor.map(self.upload_file, paths))
+        counts = {}
+        for result in results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        logger.info("Publication : %s", counts)
+        return results
+
+    def upload_directory(self, directory: str = None, pattern: str = "*") -> list[UploadResult]:
+        directory = Path(directory or settings.DATA_OUTPUT)
+        return self.upload_many(sorted(p for p in directory.glob(pattern) if p.is_file()))
+
+
+def _expired(expires: str | None) -> bool:
+    if not expires:
+        return False
+    try:
+        moment = datetime.fromisoformat(expires.replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    return moment <= datetime.now(timezone.utc)
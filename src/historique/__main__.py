@@ -0,0 +1,78 @@
+"""
+Historique Parquet (data/historique/dataset)
+Usage:
+    python -m src.historique ingest data/input/Exports_Minderset_*.xlsx [--catalogue maison] [--account a@b.com] [--workers 16]
+    python -m src.historique compact [--catalogue maison] [--min-files 2]
+    python -m src.historique sku SKU123 [--catalogue maison] [--start 2025-01-01 --end 2025-03-31]
+    python -m src.historique reindex
+    python -m src.historique aggregates --catalogue maison [--rebuild --start 2025-01-01 --end 2025-06-30]
+"""
+import argparse
+import logging
+import sys
+from datetime import date, timedelta
+
+from src.config.settings import settings
+from src.historique.store import HistoryStore, ingest_export, ingest_exports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historique Parquet Minderest")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="ingerer des exports XLSX/CSV")
+    ingest.add_argument("paths", nargs="+")
+    ingest.add_argument("--catalogue", default=settings.STORE_DEFAULT_CATALOGUE)
+    ingest.add_argument("--account", default=settings.MINDEREST_EMAIL)
+    ingest.add_argument("--force", action="store_true", help="reingerer un fichier deja vu")
+    ingest.add_argument("--workers", type=int, help="processus de nettoyage (defaut : INGEST_WORKERS / nb de coeurs)")
+
+    compact = sub.add_parser("compact", help="fusionner les petits fichiers")
+    compact.add_argument("--catalogue")
+    compact.add_argument("--min-files", type=int)
+
+    sku = sub.add_parser("sku", help="historique d'un produit (index SKU)")
+    sku.add_argument("product_id")
+    sku.add_argument("--catalogue")
+    sku.add_argument("--start", type=date.fromisoformat)
+    sku.add_argument("--end", type=date.fromisoformat)
+
+    sub.add_parser("reindex", help="reconstruire l'index SKU")
+
+    aggregates = sub.add_parser("aggregates", help="agregats glissants 7/30/90 jours")
+    aggregates.add_argument("--catalogue", default=settings.STORE_DEFAULT_CATALOGUE)
+    aggregates.add_argument("--start", type=date.fromisoformat)
+    aggregates.add_argument("--end", type=date.fromisoformat)
+    aggregates.add_argument("--rebuild", action="store_true", help="repartir d'un etat vide")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    store = HistoryStore()
+
+    if args.command == "ingest":
+        if len(args.paths) > 1 and args.workers != 1:
+            stats = ingest_exports(args.paths, args.catalogue, args.account, store=store, force=args.force,
+                                   workers=args.workers)
+            print(f"{len(args.paths)} fichier(s) : {stats.rows} lignes, {stats.replaced} remplacees, "
+                  f"{len(stats.partitions)} partition(s)")
+            return 0
+        for path in args.paths:
+            stats = ingest_export(path, args.catalogue, args.account, store=store, force=args.force)
+            print(f"{path} : {stats.rows} lignes, {stats.replaced} remplacees, {len(stats.partitions)} partition(s)")
+    elif args.command == "compact":
+        print(f"{store.compact(args.catalogue, args.min_files)} partition(s) compactee(s)")
+    elif args.command == "sku":
+        history = store.sku_history(args.product_id, args.catalogue, args.start, args.end)
+        print(history.sort_values(["date", "competitor"]).to_string(index=False) if len(history) else "aucune ligne")
+    elif args.command == "reindex":
+        print(f"{store.index.rebuild()} fichier(s) indexe(s)")
+    elif args.command == "aggregates":
+        end = args.end or date.today() - timedelta(days=1)
+        result = store.update_aggregates(args.catalogue, args.start or end - timedelta(days=max(settings.AGGREGATE_WINDOWS)),
+                                         end, rebuild=args.rebuild)
+        print(f"{len(result.keys)} cle(s), dernier jour {result.last_day}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ["product_id", "competitor", "comp_country"]
+SOURCE_COLUMNS = KEY_COLUMNS + ["date", "historical_comp_offer", "historical_cli_price",
+                                "historical_comp_stock", "historical_cli_stock"]
+# Métriques additives (somme + nombre de jours renseignés par fenêtre)
+METRICS = ("comp_price", "cli_price", "comp_stockout", "cli_stockout")
+STATE_FILE = "state.npz"
+META_FILE = "meta.json"
+OUTPUT_FILE = "rolling.parquet"
+
+
+def _day_values(frame: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Valeurs journalières par métrique (rupture : 1 si stock nul, 0 si stock > 0, NaN si inconnu)"""
+
+    def column(name):
+        if name not in frame.columns:
+            return np.full(len(frame), np.nan, dtype=np.float32)
+        return pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+
+    comp_stock, cli_stock = column("historical_comp_stock"), column("historical_cli_stock")
+    with np.errstate(invalid="ignore"):
+        return {
+            "comp_price": column("historical_comp_offer"),
+            "cli_price": column("historical_cli_price"),
+            "comp_stockout": np.where(np.isnan(comp_stock), np.nan, comp_stock <= 0).astype(np.float32),
+            "cli_stockout": np.where(np.isnan(cli_stock), np.nan, cli_stock <= 0).astype(np.float32),
+        }
+
+
+class RollingAggregates:
+    """Agrégats glissants 7/30/90 jours par (produit, concurrent, pays), maintenus incrémentalement
+
+    L'état garde, par clé, un anneau des `max(windows)` derniers jours et des sommes/comptes par
+    fenêtre : un nouveau jour ajoute sa valeur et retire celle qui sort de chaque fenêtre, sans
+    relire l'historique. Un jour déjà intégré (correction tardive) remplace sa valeur dans l'anneau
+    et corrige les sommes des fenêtres qui le contiennent. Min/max sont calculés sur l'anneau.
+    """
+
+    def __init__(self, directory, windows: tuple[int, ...] = None):
+        self.directory = Path(directory)
+        self.windows = tuple(sorted(windows or settings.AGGREGATE_WINDOWS))
+        self.ring_days = max(self.windows)
+        self.last_day: date | None = None
+        self.keys = pd.DataFrame(columns=KEY_COLUMNS)
+        self._key_index = pd.MultiIndex.from_frame(self.keys)
+        self.ring = {m: np.empty((0, self.ring_days), dtype=np.float32) for m in METRICS}
+        self.sums = {m: np.zeros((0, len(self.windows)), dtype=np.float64) for m in METRICS}
+        self.counts = {m: np.zeros((0, len(self.windows)), dtype=np.int32) for m in METRICS}
+
+    # ---- persistance ----
+    @classmethod
+    def load(cls, directory, windows: tuple[int, ...] = None) -> "RollingAggregates":
+        aggregates = cls(directory, windows)
+        meta_path = aggregates.directory / META_FILE
+        if not meta_path.exists():
+            return aggregates
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if tuple(meta["windows"]) != aggregates.windows:
+            logger.info("Fenetres modifiees (%s -> %s) : agregats a reconstruire", meta["windows"], aggregates.windows)
+            return aggregates
+        aggregates.last_day = date.fromisoformat(meta["last_day"]) if meta["last_day"] else None
+        with np.load(aggregates.directory / STATE_FILE, allow_pickle=False) as state:
+            aggregates._set_keys(pd.DataFrame({k: state[f"key_{k}"] for k in KEY_COLUMNS}))
+            for m in METRICS:
+                aggregates.ring[m] = state[f"ring_{m}"]
+                aggregates.sums[m] = state[f"sum_{m}"]
+                aggregates.counts[m] = state[f"count_{m}"]
+        return aggregates
+
+    def save(self):
+        """État + vue matérialisée (rolling.parquet), écrits de façon atomique"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        arrays = {f"key_{k}": self.keys[k].astype(str).to_numpy(dtype=str) for k in KEY_COLUMNS}
+        for m in METRICS:
+            arrays[f"ring_{m}"] = self.ring[m]
+            arrays[f"sum_{m}"] = self.sums[m]
+            arrays[f"count_{m}"] = self.counts[m]
+        tmp_state = self.directory / f".{STATE_FILE}"
+        with open(tmp_state, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_state, self.directory / STATE_FILE)
+
+        tmp_output = self.directory / f".{OUTPUT_FILE}"
+        self.snapshot().to_parquet(tmp_output, index=False)
+        os.replace(tmp_output, self.directory / OUTPUT_FILE)
+
+        tmp_meta = self.directory / f".{META_FILE}"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"windows": list(self.windows),
+                       "last_day": self.last_day.isoformat() if self.last_day else None}, f)
+        os.replace(tmp_meta, self.directory / META_FILE)
+
+    # ---- mise à jour ----
+    def _set_keys(self, keys: pd.DataFrame):
+        self.keys = keys.reset_index(drop=True)
+        self._key_index = pd.MultiIndex.from_frame(self.keys)
+
+    def _align(self, frame: pd.DataFrame) -> np.ndarray:
+        """Position de chaque ligne dans l'état ; les clés inconnues sont ajoutées (anneau vide)"""
+        incoming = pd.MultiIndex.from_frame(frame[KEY_COLUMNS].astype(str))
+        positions = self._key_index.get_indexer(incoming)
+        missing = positions < 0
+        if missing.any():
+            new_keys = incoming[missing].unique().to_frame(index=False)
+            added = len(new_keys)
+            self._set_keys(pd.concat([self.keys, new_keys], ignore_index=True))
+            for m in METRICS:
+                self.ring[m] = np.vstack([self.ring[m], np.full((added, self.ring_days), np.nan, np.float32)])
+                self.sums[m] = np.vstack([self.sums[m], np.zeros((added, len(self.windows)))])
+                self.counts[m] = np.vstack([self.counts[m], np.zeros((added, len(self.windows)), np.int32)])
+            positions = self._key_index.get_indexer(incoming)
+        return positions
+
+    def _slot(self, day: date) -> int:
+        return day.toordinal() % self.ring_days
+
+    def _shift_to(self, day: date):
+        """Avance l'anneau jusqu'à `day` inclus : les jours sans données entrent vides et chaque
+        fenêtre perd le jour qui en sort"""
+        if self.last_day is None or (day - self.last_day).days > self.ring_days:
+            for m in METRICS:
+                self.ring[m][:] = np.nan
+                self.sums[m][:] = 0
+                self.counts[m][:] = 0
+            self.last_day = day
+            return
+        while self.last_day < day:
+            self._advance(self.last_day + timedelta(days=1))
+
+    def _advance(self, day: date):
+        """Nouveau jour (vide) : chaque fenêtre w retire la valeur du jour − w"""
+        for m in METRICS:
+            ring = self.ring[m]
+            for w_index, window in enumerate(self.windows):
+                expired = ring[:, self._slot(day - timedelta(days=window))]
+                known = ~np.isnan(expired)
+                self.sums[m][known, w_index] -= expired[known]
+                self.counts[m][known, w_index] -= 1
+            # Slot réutilisé : il contenait jour − ring_days, déjà sorti de toutes les fenêtres
+            ring[:, self._slot(day)] = np.nan
+        self.last_day = day
+
+    def _replace_day(self, day: date, positions: np.ndarray, values: dict[str, np.ndarray]):
+        """Valeurs d'un jour présent dans l'anneau : + nouvelle valeur, − ancienne (NaN pour un jour neuf),
+        dans chaque fenêtre qui contient ce jour"""
+        age = (self.last_day - day).days
+        windows = np.array([age < window for window in self.windows])
+        slot = self._slot(day)
+        for m in METRICS:
+            old = self.ring[m][positions, slot]
+            new = values[m]
+            delta = np.nan_to_num(new) - np.nan_to_num(old)
+            delta_count = (~np.isnan(new)).astype(np.int32) - (~np.isnan(old)).astype(np.int32)
+            self.sums[m][positions[:, None], np.flatnonzero(windows)] += delta[:, None]
+            self.counts[m][positions[:, None], np.flatnonzero(windows)] += delta_count[:, None]
+            self.ring[m][positions, slot] = new
+
+    def apply_day(self, day: date, frame: pd.DataFrame) -> bool:
+        """Intègre les lignes d'un jour (une par clé) ; False si le jour est trop ancien pour l'anneau"""
+        if self.last_day is not None and (self.last_day - day).days >= self.ring_days:
+            return False
+        positions = self._align(frame)
+        if self.last_day is None or day > self.last_day:
+            self._shift_to(day)
+        self._replace_day(day, positions, _day_values(frame))
+        return True
+
+    def apply_range(self, store, catalogue: str, start: date, end: date) -> int:
+        """Relit dans le store les jours [start, end] (lecture filtrée) et les intègre dans l'ordre"""
+        if self.last_day is None or end > self.last_day:
+            # Seuls les ring_days derniers jours peuvent encore compter
+            start = max(start, end - timedelta(days=self.ring_days - 1))
+        frame = store.read(columns=SOURCE_COLUMNS, catalogue=catalogue, start=start, end=end)
+        applied = 0
+        for day, rows in frame.groupby("date", sort=True):
+            applied += self.apply_day(day, rows)
+        logger.info("Agregats %s : %d jour(s) integre(s) (%s -> %s), dernier jour %s",
+                    self.directory.name, applied, start, end, self.last_day)
+        return applied
+
+    # ---- lecture ----
+    def snapshot(self) -> pd.DataFrame:
+        """Vue matérialisée : une ligne par clé, colonnes <métrique>_<w>d pour chaque fenêtre"""
+        result = self.keys.copy()
+        if self.last_day is None:
+            return result
+        comp_ring = self.ring["comp_price"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for w_index, window in enumerate(self.windows):
+                suffix = f"_{window}d"
+                averages = {m: self.sums[m][:, w_index] / self.counts[m][:, w_index] for m in METRICS}
+                slots = [self._slot(self.last_day - timedelta(days=k)) for k in range(window)]
+                window_values = comp_ring[:, slots]
+                empty = np.isnan(window_values).all(axis=1)
+                filled = np.where(np.isnan(window_values), np.inf, window_values)
+                result["avg_price" + suffix] = averages["comp_price"].astype(np.float32)
+                result["min_price" + suffix] = np.where(empty, np.nan, filled.min(axis=1)).astype(np.float32)
+                filled = np.where(np.isnan(window_values), -np.inf, window_values)
+                result["max_price" + suffix] = np.where(empty, np.nan, filled.max(axis=1)).astype(np.float32)
+                # Indice prix : prix client / prix concurrent x 100 (> 100 = client plus cher)
+                result["price_index" + suffix] = (averages["cli_price"] / averages["comp_price"] * 100).astype(np.float32)
+                result["comp_stockout_rate" + suffix] = averages["comp_stockout"].astype(np.float32)
+                result["cli_stockout_rate" + suffix] = averages["cli_stockout"].astype(np.float32)
+        result["last_day"] = self.last_day
+        return result
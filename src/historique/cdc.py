@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data_cleaning.schema import FIELD_TYPES, NUMERIC_TYPES
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ["product_id", "competitor", "comp_country"]
+VALUE_COLUMNS = [name for name, kind in FIELD_TYPES.items() if kind in NUMERIC_TYPES]
+FINGERPRINT_FILE = "fingerprints.npz"
+META_FILE = "meta.json"
+
+# Journal des changements : I (nouvelle ligne), U (valeurs modifiées), D (ligne disparue de l'export)
+CHANGELOG_SCHEMA = pa.schema(
+    [("op", pa.dictionary(pa.int8(), pa.string()))]
+    + [(column, pa.string()) for column in KEY_COLUMNS]
+    + [("date", pa.date32())]
+    + [(column, pa.float32()) for column in VALUE_COLUMNS]
+)
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def key_hashes(frame: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """(hash uint64 de la clé produit/concurrent/pays/date, date en jours depuis 1970)"""
+    days = (pd.to_datetime(frame["date"]).to_numpy().astype("datetime64[D]") - _EPOCH).astype(np.int32)
+    keys = frame.reindex(columns=KEY_COLUMNS).astype(str)
+    keys["day"] = days
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy(), days
+
+
+def value_hashes(frame: pd.DataFrame) -> np.ndarray:
+    """Hash des valeurs prix/stock (arrondies : pas de faux changements dus au float32)"""
+    values = frame.reindex(columns=VALUE_COLUMNS).astype(np.float64).round(4)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+@dataclass
+class ChangeStats:
+    inserted: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    changelog: Path | None = None
+
+    def __str__(self):
+        return (f"{self.inserted} insertion(s), {self.changed} modification(s), {self.removed} suppression(s), "
+                f"{self.unchanged} inchangee(s)")
+
+
+class ChangeCapture:
+    """Diff d'un export avec l'export précédent du même catalogue (CDC)
+
+    L'empreinte du dernier état est compacte (hash de clé, jour, hash des valeurs : 20 octets par
+    ligne, triée par hash de clé) ; seules les lignes insérées, modifiées ou disparues sont écrites
+    dans un journal Parquet `changes-<horodatage>-<id>.parquet`. Une ligne n'est « disparue » que si son
+    jour est couvert par le nouvel export (un delta de quelques jours ne supprime pas le reste).
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.stats = ChangeStats()
+        self._old_keys, self._old_days, self._old_values = self._load()
+        self._new = {"keys": [], "days": [], "values": []}
+        self._writer: pq.ParquetWriter | None = None
+        # Suffixe aléatoire : deux captures dans la même seconde (ingest_exports) ne s'écrasent pas
+        self._path = self.directory / f"changes-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+
+    def _load(self):
+        path = self.directory / FINGERPRINT_FILE
+        if not path.exists():
+            empty = np.array([], dtype=np.uint64)
+            return empty, np.array([], dtype=np.int32), empty
+        with np.load(path, allow_pickle=False) as state:
+            return state["keys"], state["days"], state["values"]
+
+    def _write_changes(self, op: str, rows: pd.DataFrame):
+        if rows.empty:
+            return
+        columns = {"op": pa.array([op] * len(rows)).dictionary_encode().cast(CHANGELOG_SCHEMA.field("op").type)}
+        for column in KEY_COLUMNS:
+            columns[column] = pa.array(rows[column].astype("string") if column in rows else [None] * len(rows),
+                                       pa.string(), from_pandas=True)
+        columns["date"] = pa.array(pd.to_datetime(rows["date"]).dt.date, pa.date32())
+        for column in VALUE_COLUMNS:
+            values = rows[column] if column in rows else pd.Series(np.nan, index=rows.index)
+            columns[column] = pa.array(values.astype(np.float32), pa.float32(), from_pandas=True)
+        if self._writer is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.directory / f".{self._path.name}", CHANGELOG_SCHEMA,
+                                            compression="zstd")
+        self._writer.write_table(pa.table(columns, schema=CHANGELOG_SCHEMA))
+
+    def process(self, frame: pd.DataFrame):
+        """Compare un lot nettoyé à l'empreinte précédente et journalise insertions et modifications"""
+        frame = frame[frame["date"].notna() & frame["product_id"].notna()]
+        keys, days = key_hashes(frame)
+        values = value_hashes(frame)
+
+        found = np.zeros(len(keys), dtype=bool)
+        old_values = np.zeros(len(keys), dtype=np.uint64)
+        if len(self._old_keys):
+            positions = np.searchsorted(self._old_keys, keys).clip(max=len(self._old_keys) - 1)
+            found = self._old_keys[positions] == keys
+            old_values = self._old_values[positions]
+        inserted = ~found
+        changed = found & (old_values != values)
+
+        self._write_changes("I", frame[inserted])
+        self._write_changes("U", frame[changed])
+        self.stats.inserted += int(inserted.sum())
+        self.stats.changed += int(changed.sum())
+        self.stats.unchanged += int((found & ~changed).sum())
+        self._new["keys"].append(keys)
+        self._new["days"].append(days)
+        self._new["values"].append(values)
+
+    def finish(self, store=None, catalogue: str = None) -> ChangeStats:
+        """Détecte les lignes disparues, écrit le journal et la nouvelle empreinte"""
+        new_keys = np.concatenate(self._new["keys"]) if self._new["keys"] else np.array([], np.uint64)
+        new_days = np.concatenate(self._new["days"]) if self._new["days"] else np.array([], np.int32)
+        new_values = np.concatenate(self._new["values"]) if self._new["values"] else np.array([], np.uint64)
+
+        removed = np.zeros(len(self._old_keys), dtype=bool)
+        if len(new_days) and len(self._old_keys):
+            covered = (self._old_days >= new_days.min()) & (self._old_days <= new_days.max())
+            removed = covered & ~np.isin(self._old_keys, new_keys)
+        self.stats.removed = int(removed.sum())
+        if self.stats.removed and store is not None:
+            self._write_changes("D", self._removed_rows(store, catalogue, self._old_keys[removed],
+                                                        self._old_days[removed]))
+
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self.directory / f".{self._path.name}", self._path)
+            self.stats.changelog = self._path
+
+        # Nouvelle empreinte : ancienne sans les lignes disparues, puis nouvelles valeurs (dernière gagne)
+        keep = ~removed
+        keys = np.concatenate([self._old_keys[keep], new_keys])
+        days = np.concatenate([self._old_days[keep], new_days])
+        values = np.concatenate([self._old_values[keep], new_values])
+        order = np.argsort(keys, kind="stable")
+        keys, days, values = keys[order], days[order], values[order]
+        last = np.r_[keys[1:] != keys[:-1], True] if len(keys) else np.array([], dtype=bool)
+        self._save(keys[last], days[last], values[last])
+
+        logger.info("CDC %s : %s", self.directory.name, self.stats)
+        return self.stats
+
+    def _removed_rows(self, store, catalogue: str, keys: np.ndarray, days: np.ndarray) -> pd.DataFrame:
+        """Clés en clair des lignes disparues (relues dans le store, qui ne supprime jamais)"""
+        start = date.fromordinal(int(days.min()) + date(1970, 1, 1).toordinal())
+        end = date.fromordinal(int(days.max()) + date(1970, 1, 1).toordinal())
+        stored = store.read(columns=KEY_COLUMNS + ["date"], catalogue=catalogue, start=start, end=end)
+        if stored.empty:
+            return stored
+        hashes, _ = key_hashes(stored)
+        rows = stored[np.isin(hashes, keys)].copy()
+        for column in VALUE_COLUMNS:
+            rows[column] = np.nan
+        return rows
+
+    def _save(self, keys: np.ndarray, days: np.ndarray, values: np.ndarray):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / f".{FINGERPRINT_FILE}"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=keys, days=days, values=values)
+        os.replace(tmp_path, self.directory / FINGERPRINT_FILE)
+        with open(self.directory / META_FILE, "w", encoding="utf-8") as f:
+            json.dump({"rows": int(len(keys)), "value_columns": VALUE_COLUMNS,
+                       "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+
+
+def read_changes(path) -> pd.DataFrame:
+    return pq.read_table(path).to_pandas()
@@ -0,0 +1,154 @@
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "_sku_index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path      TEXT PRIMARY KEY,           -- relatif à la racine du dataset
+    catalogue TEXT NOT NULL,
+    month     TEXT NOT NULL,
+    rows      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sku_rows (
+    product_id TEXT NOT NULL,
+    path       TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    row_start  INTEGER NOT NULL,          -- fichiers triés par produit : une plage contiguë par fichier
+    row_count  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sku_rows_product ON sku_rows (product_id);
+CREATE INDEX IF NOT EXISTS sku_rows_path ON sku_rows (path);
+"""
+
+
+def _partition_of(relative: str) -> tuple[str, str]:
+    parts = dict(part.split("=", 1) for part in Path(relative).parts[:-1] if "=" in part)
+    return parts.get("catalogue", ""), parts.get("month", "")
+
+
+class SkuIndex:
+    """Index secondaire produit -> (fichier Parquet, plage de lignes), en SQLite à la racine du dataset
+
+    Tenu à jour à chaque écriture du HistoryStore (ajout d'un fichier, suppression des fichiers
+    remplacés) ; `rebuild()` le reconstruit à partir des fichiers en cas de doute.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path = self.root / INDEX_FILE
+        self._files_cache: dict[str, tuple[float, pq.ParquetFile]] = {}
+        self._cache_lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            self.root.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+            yield conn
+        finally:
+            conn.close()
+
+    # ---- maintenance ----
+    def add_file(self, path: Path, table: pa.Table):
+        """Enregistre les plages par produit d'un fichier fraîchement écrit (table triée par produit)"""
+        relative = path.relative_to(self.root).as_posix()
+        catalogue, month = _partition_of(relative)
+        products = table.column("product_id").to_numpy(zero_copy_only=False)
+        if len(products):
+            starts = np.flatnonzero(np.r_[True, products[1:] != products[:-1]])
+            counts = np.diff(np.r_[starts, len(products)])
+            ranges = [(products[s], relative, int(s), int(c)) for s, c in zip(starts, counts)]
+        else:
+            ranges = []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM files WHERE path = ?", (relative,))
+            conn.execute("INSERT INTO files VALUES (?, ?, ?, ?)", (relative, catalogue, month, table.num_rows))
+            conn.executemany("INSERT INTO sku_rows VALUES (?, ?, ?, ?)", ranges)
+            conn.execute("COMMIT")
+
+    def remove_files(self, paths: list[Path]):
+        relatives = [(path.relative_to(self.root).as_posix(),) for path in paths]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM files WHERE path = ?", relatives)
+            conn.execute("COMMIT")
+
+    def rebuild(self) -> int:
+        """Réindexe tous les fichiers du dataset ; retourne le nombre de fichiers indexés"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files")
+        files = sorted(self.root.glob("catalogue=*/month=*/*.parquet"))
+        for path in files:
+            self.add_file(path, pq.read_table(path, columns=["product_id"], partitioning=None))
+        logger.info("Index SKU reconstruit : %d fichier(s)", len(files))
+        return len(files)
+
+    def is_empty(self) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    # ---- lecture ----
+    def locate(self, product_id: str, catalogue: str = None, months: tuple[str, str] = None) -> list[tuple]:
+        """(fichier, row_start, row_count) des lignes du produit"""
+        query = ("SELECT f.path, s.row_start, s.row_count FROM sku_rows s "
+                 "JOIN files f ON f.path = s.path WHERE s.product_id = ?")
+        params = [product_id]
+        if catalogue:
+            query += " AND f.catalogue = ?"
+            params.append(catalogue)
+        if months:
+            query += " AND f.month BETWEEN ? AND ?"
+            params.extend(months)
+        with self._connect() as conn:
+            return conn.execute(query + " ORDER BY f.month, f.path", params).fetchall()
+
+    def _parquet_file(self, relative: str) -> tuple[pq.ParquetFile, np.ndarray]:
+        """ParquetFile ouvert + début de chaque row group, mis en cache tant que le fichier n'a pas changé"""
+        path = self.root / relative
+        mtime = path.stat().st_mtime
+        with self._cache_lock:
+            cached = self._files_cache.get(relative)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            parquet = pq.ParquetFile(path)
+            sizes = [parquet.metadata.row_group(i).num_rows for i in range(parquet.metadata.num_row_groups)]
+            entry = (parquet, np.cumsum([0] + sizes))
+            self._files_cache[relative] = (mtime, entry)
+            return entry
+
+    def read_rows(self, locations: list[tuple], columns: list[str] = None) -> pa.Table | None:
+        """Lit uniquement les row groups couvrant les plages, puis découpe les lignes exactes"""
+        tables = []
+        for relative, row_start, row_count in locations:
+            try:
+                parquet, offsets = self._parquet_file(relative)
+            except FileNotFoundError:
+                logger.warning("Index SKU obsolete (%s absent) : lancer 'python -m src.historique reindex'", relative)
+                continue
+            first = int(np.searchsorted(offsets, row_start, side="right")) - 1
+            last = int(np.searchsorted(offsets, row_start + row_count - 1, side="right")) - 1
+            table = parquet.read_row_groups(list(range(first, last + 1)), columns=columns)
+            table = table.slice(row_start - int(offsets[first]), row_count)
+            catalogue, month = _partition_of(relative)
+            table = table.append_column("catalogue", pa.array([catalogue] * table.num_rows, pa.string()))
+            table = table.append_column("month", pa.array([month] * table.num_rows, pa.string()))
+            tables.append(table)
+        return pa.concat_tables(tables) if tables else None
@@ -0,0 +1,396 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.config.settings import settings
+from src.data_cleaning.cleaning import CleaningReport, clean_batches
+from src.data_cleaning.parallel import clean_files_parallel
+from src.data_cleaning.reader import ExportReader
+from src.historique.aggregates import RollingAggregates
+from src.historique.cdc import ChangeCapture, ChangeStats
+from src.historique.index import SkuIndex
+from src.minderest.calendar import DateRange
+from src.minderest.watermark import SyncWatermark
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ["product_id", "competitor", "comp_country", "date"]
+SORT_COLUMNS = [("product_id", "ascending"), ("date", "ascending")]
+MANIFEST_FILE = "_ingested.json"
+
+# Schéma fixe des fichiers : les colonnes absentes d'un export sont écrites à null
+STORE_SCHEMA = pa.schema([
+    ("product_id", pa.string()),
+    ("product_name", pa.string()),
+    ("competitor", pa.string()),
+    ("comp_country", pa.string()),
+    ("cli_category_level_3", pa.string()),
+    ("cli_category_level_4", pa.string()),
+    ("date", pa.date32()),
+    ("historical_cli_min_price", pa.float32()),
+    ("historical_cli_max_price", pa.float32()),
+    ("historical_cli_avg_price", pa.float32()),
+    ("historical_cli_price", pa.float32()),
+    ("historical_cli_offer", pa.float32()),
+    ("historical_cli_cost", pa.float32()),
+    ("historical_comp_offer", pa.float32()),
+    ("historical_cli_avg_stock", pa.float32()),
+    ("historical_cli_stock", pa.float32()),
+    ("historical_comp_avg_stock", pa.float32()),
+    ("historical_comp_stock", pa.float32()),
+    ("invalid_bounds", pa.bool_()),
+    ("filled", pa.bool_()),
+    ("comp_outlier", pa.bool_()),
+    ("ingested_at", pa.timestamp("s")),
+])
+PARTITIONING = ds.partitioning(pa.schema([("catalogue", pa.string()), ("month", pa.string())]), flavor="hive")
+
+_write_lock = threading.RLock()
+
+
+def catalogue_slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9_-]+", "-", (name or "default").strip().lower()).strip("-") or "default"
+
+
+@dataclass
+class AppendStats:
+    rows: int = 0
+    replaced: int = 0              # lignes existantes remplacées (même clé, valeur plus récente)
+    dropped: int = 0               # lignes sans date ou sans produit
+    partitions: set[str] = field(default_factory=set)
+    dates: tuple[date, date] | None = None
+    changes: ChangeStats | None = None         # diff avec l'export précédent (CDC)
+
+    def __iadd__(self, other: "AppendStats") -> "AppendStats":
+        self.rows += other.rows
+        self.replaced += other.replaced
+        self.dropped += other.dropped
+        self.partitions |= other.partitions
+        if other.dates:
+            self.dates = other.dates if not self.dates else (min(self.dates[0], other.dates[0]),
+                                                             max(self.dates[1], other.dates[1]))
+        return self
+
+
+class HistoryStore:
+    """Historique Parquet partitionné par catalogue et par mois (catalogue=<slug>/month=AAAA-MM)
+
+    - append idempotent : dédoublonnage sur (produit, concurrent, pays, date), la dernière valeur gagne
+    - fichiers triés par produit puis date : les statistiques de row groups permettent aux lectures
+      filtrées (produit, période) de sauter partitions et row groups
+    - compaction des petits fichiers (à la demande ou en tâche de fond)
+    """
+
+    def __init__(self, root: str = None, row_group_rows: int = None, compact_min_files: int = None):
+        self.root = Path(root or Path(settings.DATA_HISTORIQUE) / "dataset")
+        self.row_group_rows = row_group_rows or settings.STORE_ROW_GROUP_ROWS
+        self.compact_min_files = compact_min_files or settings.STORE_COMPACT_MIN_FILES
+        self.index = SkuIndex(self.root)
+        self._stop = threading.Event()
+
+    def partition_dir(self, catalogue: str, month: str) -> Path:
+        return self.root / f"catalogue={catalogue_slug(catalogue)}" / f"month={month}"
+
+    def partitions(self, catalogue: str = None) -> list[Path]:
+        pattern = f"catalogue={catalogue_slug(catalogue)}/month=*" if catalogue else "catalogue=*/month=*"
+        return sorted(p for p in self.root.glob(pattern) if p.is_dir())
+
+    # ---- écriture ----
+    def to_table(self, frame: pd.DataFrame) -> pa.Table:
+        """DataFrame nettoyé -> table au schéma du store (catégories en texte, dates en date32)"""
+        columns = {}
+        for column in STORE_SCHEMA:
+            if column.name == "ingested_at":
+                continue
+            if column.name in frame.columns:
+                values = frame[column.name]
+                if isinstance(values.dtype, pd.CategoricalDtype) or pa.types.is_string(column.type):
+                    values = values.astype("string")
+                columns[column.name] = pa.array(values, from_pandas=True).cast(column.type)
+            else:
+                columns[column.name] = pa.nulls(len(frame), column.type)
+        columns["ingested_at"] = pa.array([datetime.now().replace(microsecond=0)] * len(frame), pa.timestamp("s"))
+        return pa.table(columns, schema=STORE_SCHEMA)
+
+    def append(self, frame: pd.DataFrame, catalogue: str) -> AppendStats:
+        """Ajoute un lot ; les clés déjà présentes sont remplacées (ré-ingestion et corrections tardives)"""
+        stats = AppendStats()
+        valid = frame["date"].notna() & frame["product_id"].notna()
+        stats.dropped = int((~valid).sum())
+        frame = frame[valid]
+        if frame.empty:
+            return stats
+
+        months = frame["date"].dt.to_period("M")   # strftime par ligne : ~100x plus lent
+        stats.dates = (frame["date"].min().date(), frame["date"].max().date())
+        with _write_lock:
+            for period, part in frame.groupby(months, sort=True):
+                month = str(period)
+                table = self.to_table(part)
+                replaced = self._write_partition(self.partition_dir(catalogue, month), table)
+                stats.rows += table.num_rows
+                stats.replaced += replaced
+                stats.partitions.add(f"{catalogue_slug(catalogue)}/{month}")
+        return stats
+
+    def _write_partition(self, directory: Path, table: pa.Table) -> int:
+        table = _dedupe(table)
+        files = sorted(directory.glob("*.parquet"))
+        if files:
+            existing_keys = pq.read_table(files, columns=KEY_COLUMNS, partitioning=None).to_pandas()
+            new_keys = table.select(KEY_COLUMNS).to_pandas()
+            overlap = int(pd.MultiIndex.from_frame(existing_keys).isin(pd.MultiIndex.from_frame(new_keys)).sum())
+            if overlap:
+                # Clés déjà présentes : réécriture de la partition (fusion + dédoublonnage)
+                merged = _dedupe(pa.concat_tables([pq.read_table(files, schema=STORE_SCHEMA, partitioning=None), table]))
+                self._replace_files(directory, files, merged)
+                return overlap
+        self._write_file(directory, table)
+        return 0
+
+    def _write_file(self, directory: Path, table: pa.Table) -> Path:
+        """Écriture atomique d'un fichier trié (fichier temporaire puis rename)"""
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = directory / f".{path.name}.tmp"   # préfixe '.' : ignoré par les lectures du dataset
+        table = table.sort_by(SORT_COLUMNS)
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_rows,
+                       compression="zstd", write_statistics=True)
+        os.replace(tmp_path, path)
+        self.index.add_file(path, table)
+        return path
+
+    def _replace_files(self, directory: Path, old_files: list[Path], table: pa.Table):
+        self._write_file(directory, table)
+        for path in old_files:
+            path.unlink(missing_ok=True)
+        self.index.remove_files(old_files)
+
+    # ---- compaction ----
+    def compact(self, catalogue: str = None, min_files: int = None) -> int:
+        """Fusionne en un seul fichier les partitions d'au moins `min_files` fichiers ; retourne le nombre
+        de partitions compactées"""
+        min_files = min_files or self.compact_min_files
+        compacted = 0
+        for directory in self.partitions(catalogue):
+            with _write_lock:
+                files = sorted(directory.glob("*.parquet"))
+                if len(files) < min_files:
+                    continue
+                table = _dedupe(pq.read_table(files, schema=STORE_SCHEMA, partitioning=None))
+                self._replace_files(directory, files, table)
+            compacted += 1
+            logger.info("Compaction %s : %d fichiers -> 1 (%d lignes)", directory.relative_to(self.root),
+                        len(files), table.num_rows)
+        return compacted
+
+    def start_background_compaction(self, interval: float = None) -> threading.Thread:
+        """Compaction périodique dans un thread (arrêt via stop_background_compaction)"""
+        interval = interval or settings.STORE_COMPACT_INTERVAL
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error("Compaction en echec : %s", e)
+
+        self._stop.clear()
+        thread = threading.Thread(target=loop, name="historique-compaction", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_background_compaction(self):
+        self._stop.set()
+
+    # ---- lecture ----
+    def dataset(self) -> ds.Dataset:
+        return ds.dataset(self.root, format="parquet", schema=pa.unify_schemas([STORE_SCHEMA, PARTITIONING.schema]),
+                          partitioning=PARTITIONING)
+
+    def read(self, columns: list[str] = None, catalogue: str = None, product_ids: list[str] = None,
+             start: date = None, end: date = None) -> pd.DataFrame:
+        """Lecture filtrée : partitions (catalogue, mois) et row groups hors filtre ne sont pas lus"""
+        if not self.root.exists():
+            return pd.DataFrame(columns=columns or STORE_SCHEMA.names)
+        expression = None
+
+        def both(condition):
+            nonlocal expression
+            expression = condition if expression is None else expression & condition
+
+        if catalogue:
+            both(ds.field("catalogue") == catalogue_slug(catalogue))
+        if start:
+            both(ds.field("month") >= f"{start:%Y-%m}")
+            both(ds.field("date") >= pa.scalar(start, pa.date32()))
+        if end:
+            both(ds.field("month") <= f"{end:%Y-%m}")
+            both(ds.field("date") <= pa.scalar(end, pa.date32()))
+        if product_ids:
+            both(ds.field("product_id").isin(list(product_ids)))
+        return self.dataset().to_table(columns=columns, filter=expression).to_pandas()
+
+    def sku_history(self, product_id: str, catalogue: str = None, start: date = None, end: date = None,
+                    columns: list[str] = None) -> pd.DataFrame:
+        """Série complète d'un produit (tous concurrents) via l'index SKU : seuls les row groups
+        contenant le produit sont lus"""
+        if self.index.is_empty() and self.partitions():
+            self.index.rebuild()
+        months = (f"{start:%Y-%m}" if start else "0000-00", f"{end:%Y-%m}" if end else "9999-99")
+        locations = self.index.locate(product_id, catalogue_slug(catalogue) if catalogue else None, months)
+        table = self.index.read_rows(locations, columns)
+        if table is None:
+            return pd.DataFrame(columns=(columns or STORE_SCHEMA.names) + ["catalogue", "month"])
+        frame = table.to_pandas()
+        if start and "date" in frame.columns:
+            frame = frame[frame["date"] >= start]
+        if end and "date" in frame.columns:
+            frame = frame[frame["date"] <= end]
+        return frame.reset_index(drop=True)
+
+    # ---- CDC / agrégats ----
+    def cdc_dir(self, catalogue: str) -> Path:
+        return self.root.parent / "cdc" / f"catalogue={catalogue_slug(catalogue)}"
+
+    def aggregates_dir(self, catalogue: str) -> Path:
+        return self.root.parent / "aggregates" / f"catalogue={catalogue_slug(catalogue)}"
+
+    def update_aggregates(self, catalogue: str, start: date, end: date, rebuild: bool = False) -> RollingAggregates:
+        """Intègre [start, end] dans les agrégats glissants du catalogue (reconstruits si `rebuild`)"""
+        directory = self.aggregates_dir(catalogue)
+        aggregates = RollingAggregates(directory) if rebuild else RollingAggregates.load(directory)
+        aggregates.apply_range(self, catalogue, start, end)
+        aggregates.save()
+        return aggregates
+
+    def rolling(self, catalogue: str) -> pd.DataFrame:
+        """Vue matérialisée des agrégats 7/30/90 jours (lecture d'un seul petit fichier)"""
+        path = self.aggregates_dir(catalogue) / "rolling.parquet"
+        return pd.read_parquet(path) if path.exists() else pd.DataFrame()
+
+    # ---- ingestion ----
+    def _manifest_path(self) -> Path:
+        return self.root / MANIFEST_FILE
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _record_ingested(self, digest: str, entry: dict):
+        manifest = self._read_manifest()
+        manifest[digest] = entry
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._manifest_path().with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+
+def _dedupe(table: pa.Table) -> pa.Table:
+    """Une ligne par clé, la dernière ajoutée l'emporte"""
+    if table.num_rows < 2:
+        return table
+    keys = table.select(KEY_COLUMNS).to_pandas()
+    keep = ~keys.duplicated(keep="last").to_numpy()
+    return table if keep.all() else table.filter(pa.array(keep))
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _store_batches(store: HistoryStore, name: str, batches, report: CleaningReport, digest: str, catalogue: str,
+                   account: str, watermark: SyncWatermark, update_aggregates: bool = True) -> AppendStats:
+    """Append (+ CDC) des lots nettoyés d'un export, puis manifeste, watermark et agrégats"""
+    stats = AppendStats()
+    capture = ChangeCapture(store.cdc_dir(catalogue)) if settings.CDC_ENABLED else None
+    for batch in batches:
+        if capture:
+            capture.process(batch)
+        stats += store.append(batch, catalogue)
+    report.log()
+    if capture:
+        stats.changes = capture.finish(store, catalogue)
+    logger.info("%s : %d lignes stockees (%d remplacees, %d ignorees) dans %d partition(s)",
+                name, stats.rows, stats.replaced, stats.dropped, len(stats.partitions))
+
+    store._record_ingested(digest, {"file": name, "catalogue": catalogue_slug(catalogue), "rows": stats.rows,
+                                    "ingested_at": datetime.now().isoformat(timespec="seconds")})
+    if stats.dates:
+        date_range = DateRange(*stats.dates)
+        watermark.mark_stored(account, date_range, full=date_range.days >= settings.PERIOD_DAYS)
+        if update_aggregates and settings.AGGREGATES_ENABLED:
+            store.update_aggregates(catalogue, *stats.dates)
+    return stats
+
+
+def ingest_export(path, catalogue: str = None, account: str = None, store: HistoryStore = None,
+                  watermark: SyncWatermark = None, force: bool = False) -> AppendStats:
+    """Lecture en flux + nettoyage + append d'un export ; un fichier déjà ingéré (même contenu) est ignoré.
+    Le watermark de synchro avance sur la période effectivement stockée."""
+    path = Path(path)
+    store = store or HistoryStore()
+    digest = file_digest(path)
+    if not force and digest in store._read_manifest():
+        logger.info("%s deja ingere, ignore", path.name)
+        return AppendStats()
+
+    report = CleaningReport()
+    return _store_batches(store, path.name, clean_batches(ExportReader(path), report), report, digest,
+                          catalogue or settings.STORE_DEFAULT_CATALOGUE, account or settings.MINDEREST_EMAIL,
+                          watermark or SyncWatermark())
+
+
+def ingest_exports(paths: list, catalogue: str = None, account: str = None, store: HistoryStore = None,
+                   watermark: SyncWatermark = None, force: bool = False, workers: int = None) -> AppendStats:
+    """Ingestion de nombreux exports : lecture + nettoyage dans un pool de processus, écriture dans le
+    store par le seul processus parent, dans l'ordre des `paths` (résultat identique à un run séquentiel)"""
+    store = store or HistoryStore()
+    watermark = watermark or SyncWatermark()
+    catalogue = catalogue or settings.STORE_DEFAULT_CATALOGUE
+    account = account or settings.MINDEREST_EMAIL
+    known = store._read_manifest()
+    digests, todo = {}, []
+    for path in map(Path, paths):
+        digest = file_digest(path)
+        if not force and (digest in known or digest in digests.values()):
+            logger.info("%s deja ingere, ignore", path.name)
+            continue
+        digests[str(path)] = digest
+        todo.append(path)
+
+    total = AppendStats()
+    failed = []
+    for result in clean_files_parallel(todo, workers):
+        if result.error:
+            logger.error("%s : echec lecture/nettoyage (%s)", Path(result.path).name, result.error)
+            failed.append(result.path)
+            continue
+        total += _store_batches(store, Path(result.path).name, result.batches(), result.report,
+                                digests[result.path], catalogue, account, watermark, update_aggregates=False)
+    # Agrégats mis à jour une seule fois sur la période couverte par l'ensemble des fichiers
+    if total.dates and settings.AGGREGATES_ENABLED:
+        store.update_aggregates(catalogue, *total.dates)
+    logger.info("Ingestion : %d fichier(s), %d lignes, %d echec(s)", len(todo) - len(failed), total.rows, len(failed))
+    return total
@@ -0,0 +1,312 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import httpx
+
+from src.config.settings import settings
+from src.minderest.calendar import DateRange
+
+logger = logging.getLogger(__name__)
+
+# Headers d'authentification rejoués tels quels (rafraîchis par le navigateur à l'expiration)
+AUTH_HEADERS = ("cookie", "authorization", "x-csrf-token", "x-xsrf-token")
+# Headers recalculés par httpx ou propres au navigateur : jamais rejoués
+DROPPED_HEADERS = (
+    "content-length", "host", "connection", "accept-encoding",
+    "sec-ch-ua", "sec-ch-ua-mobile", "sec-ch-ua-platform", "sec-fetch-dest", "sec-fetch-mode", "sec-fetch-site",
+)
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+class AuthExpiredError(Exception):
+    """Le serveur a refusé les headers d'authentification du template"""
+
+
+def _walk(obj, path=()):
+    """Parcourt récursivement un corps JSON/formulaire : (chemin, valeur) pour chaque feuille et liste"""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            yield from _walk(value, path + (key,))
+    elif isinstance(obj, list):
+        yield path, obj
+        for i, value in enumerate(obj):
+            yield from _walk(value, path + (i,))
+    else:
+        yield path, obj
+
+
+def _set_path(obj, path, value):
+    for key in path[:-1]:
+        obj = obj[key]
+    obj[path[-1]] = value
+
+
+@dataclass
+class ExportRequestTemplate:
+    """Requête d'export capturée une fois dans le navigateur, puis rejouée en HTTP
+
+    Les emplacements du nom, des champs et des dates dans le corps sont retrouvés à la capture
+    (valeurs connues) et enregistrés sous forme de chemins ; `render` y injecte les nouvelles valeurs.
+    """
+    url: str
+    method: str
+    headers: dict
+    auth_headers: dict
+    body: dict | list
+    body_kind: str = "json"            # "json" ou "form"
+    name_paths: list = field(default_factory=list)
+    fields_paths: list = field(default_factory=list)
+    date_paths: list = field(default_factory=list)  # [chemin, gabarit avec {start}/{end}]
+    date_format: str = "%Y-%m-%d"
+    captured_at: str = ""
+
+    @classmethod
+    def from_capture(cls, url: str, method: str, headers: dict, post_data: str,
+                     file_name: str, fields: list[str], date_range: DateRange) -> "ExportRequestTemplate":
+        headers = {k.lower(): v for k, v in headers.items()}
+        content_type = headers.get("content-type", "")
+        if "application/x-www-form-urlencoded" in content_type:
+            body, body_kind = parse_qs(post_data or "", keep_blank_values=True), "form"
+        else:
+            body, body_kind = json.loads(post_data or "{}"), "json"
+
+        template = cls(
+            url=url,
+            method=method.upper(),
+            headers={k: v for k, v in headers.items()
+                     if k not in AUTH_HEADERS and k not in DROPPED_HEADERS and not k.startswith(":")},
+            auth_headers={k: v for k, v in headers.items() if k in AUTH_HEADERS},
+            body=body,
+            body_kind=body_kind,
+            captured_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        template._locate(file_name, fields, date_range)
+        return template
+
+    def _locate(self, file_name: str, fields: list[str], date_range: DateRange):
+        wanted_fields = set(fields)
+        for fmt in DATE_FORMATS:
+            start, end = date_range.start.strftime(fmt), date_range.end.strftime(fmt)
+            if any(isinstance(v, str) and v != file_name and (start in v or end in v)
+                   for _, v in _walk(self.body)):
+                self.date_format = fmt
+                break
+        start, end = date_range.start.strftime(self.date_format), date_range.end.strftime(self.date_format)
+
+        for path, value in _walk(self.body):
+            if isinstance(value, list):
+                if value and all(isinstance(v, str) for v in value) and wanted_fields <= set(value):
+                    self.fields_paths.append(list(path))
+            elif value == file_name:
+                self.name_paths.append(list(path))
+            elif isinstance(value, str) and (start in value or end in value):
+                self.date_paths.append([list(path), value.replace(start, "{start}").replace(end, "{end}")])
+
+        if not self.name_paths:
+            raise ValueError(f"Nom d'export {file_name!r} introuvable dans la requete capturee")
+        logger.info("  Template : nom=%s champs=%s dates=%s (format %s)",
+                    self.name_paths, self.fields_paths, [p for p, _ in self.date_paths], self.date_format)
+
+    def render(self, file_name: str, fields: list[str] = None, date_range: DateRange = None) -> dict:
+        """Retourne les kwargs httpx (content + headers) de la requête pour ces paramètres"""
+        body = copy.deepcopy(self.body)
+        for path in self.name_paths:
+            _set_path(body, path, file_name)
+        if fields:
+            for path in self.fields_paths:
+                _set_path(body, path, list(fields))
+        if date_range:
+            start, end = date_range.start.strftime(self.date_format), date_range.end.strftime(self.date_format)
+            for path, pattern in self.date_paths:
+                _set_path(body, path, pattern.replace("{start}", start).replace("{end}", end))
+
+        if self.body_kind == "form":
+            content = urlencode(body, doseq=True)
+        else:
+            content = json.dumps(body)
+        return {"content": content.encode("utf-8"), "headers": {**self.headers, **self.auth_headers}}
+
+    def save(self, path: Path):
+        """Écrit le template (contient des cookies : permissions 600)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+        logger.info("  Template d'export sauvegarde : %s", path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ExportRequestTemplate | None":
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def template_path(account: str) -> Path:
+    key = hashlib.sha256((account or "").strip().lower().encode("utf-8")).hexdigest()[:16]
+    return Path(settings.SESSION_DIR) / f"export_template_{key}.json"
+
+
+def capture_export_template(scraper, fields: list[str] = None, date_range: DateRange = None,
+                            file_name: str = None) -> tuple[str, ExportRequestTemplate]:
+    """Parcours navigateur complet en enregistrant la requête réseau de submit_request()
+
+    La requête capturée EST un export réel (elle est envoyée) ; retourne (nom, template).
+    """
+    fields = list(fields or settings.EXPORT_FIELDS)
+    date_range = date_range or DateRange.last_days()
+    pattern = re.compile(settings.EXPORT_API_PATTERN)
+
+    scraper.ensure_logged_in()
+    scraper.navigate_to_exports()
+    file_name = scraper.fill_export_form(fields=fields, file_name=file_name, date_range=date_range)
+
+    with scraper.page.expect_request(
+        lambda r: r.method in ("POST", "PUT") and pattern.search(r.url) is not None,
+        timeout=30000,
+    ) as request_info:
+        scraper.submit_request()
+    request = request_info.value
+
+    headers = request.all_headers()
+    if "cookie" not in {k.lower() for k in headers}:
+        cookies = scraper.context.cookies(request.url)
+        headers["cookie"] = "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+
+    template = ExportRequestTemplate.from_capture(
+        request.url, request.method, headers, request.post_data, file_name, fields, date_range,
+    )
+    template.save(template_path(scraper.email))
+    return file_name, template
+
+
+def browser_auth_refresher(email: str = None, password: str = None) -> Callable[[list[str]], dict]:
+    """Rafraîchit les headers d'auth via le navigateur : login (ou session en cache) puis page d'export,
+    en relevant cookies et headers d'auth des XHR envoyés vers le domaine Minderest."""
+    def refresh(header_names: list[str]) -> dict:
+        from src.minderest.scraper import MinderestScraper
+
+        seen = {}
+        with MinderestScraper(email, password) as scraper:
+            host = urlparse(scraper.base_url).hostname
+
+            def on_request(request):
+                if urlparse(request.url).hostname == host:
+                    for k, v in request.headers.items():
+                        if k.lower() in header_names and k.lower() != "cookie":
+                            seen[k.lower()] = v
+
+            scraper.page.on("request", on_request)
+            scraper.ensure_logged_in()
+            scraper.navigate_to_exports()
+            cookies = scraper.context.cookies(scraper.base_url)
+        seen["cookie"] = "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+        logger.info("  Auth rafraichie via navigateur (%s)", sorted(seen))
+        return seen
+
+    return refresh
+
+
+class ExportApiClient:
+    """Soumission d'exports en HTTP direct (pool de connexions httpx), sans navigateur
+
+    Sur 401/403 ou redirection vers /user/login, `auth_refresher` est appelé une fois pour
+    obtenir de nouveaux headers d'auth, puis la requête est rejouée. Le rafraîchissement est
+    sérialisé : les threads refusés en même temps réutilisent l'auth obtenue par le premier.
+    """
+
+    def __init__(self, template: ExportRequestTemplate, auth_refresher: Callable[[list[str]], dict] = None,
+                 template_file: Path = None, max_connections: int = None, timeout: float = 30.0):
+        self.template = template
+        self.auth_refresher = auth_refresher
+        self.template_file = template_file
+        self._auth_lock = threading.Lock()
+        max_connections = max_connections or settings.API_MAX_CONNECTIONS
+        self.client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=False,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.client.close()
+
+    @staticmethod
+    def _is_auth_failure(response: httpx.Response) -> bool:
+        if response.status_code in (401, 403, 419):
+            return True
+        return response.is_redirect and "/user/login" in response.headers.get("location", "")
+
+    def _send(self, file_name: str, fields: list[str], date_range: DateRange) -> tuple[dict, httpx.Response]:
+        """Retourne (headers d'auth utilisés, réponse)"""
+        auth_headers = self.template.auth_headers
+        return auth_headers, self.client.request(
+            self.template.method, self.template.url, **self.template.render(file_name, fields, date_range),
+        )
+
+    def refresh_auth(self, stale: dict = None):
+        """Nouveaux headers d'auth via `auth_refresher` ; `stale` = headers refusés par le serveur :
+        si un autre thread les a déjà remplacés entre-temps, aucun nouveau login n'est lancé"""
+        if not self.auth_refresher:
+            raise AuthExpiredError("Session expiree et aucun rafraichissement d'auth configure")
+        with self._auth_lock:
+            if stale is not None and self.template.auth_headers is not stale:
+                return
+            logger.info("  Rafraichissement de l'auth...")
+            names = sorted(set(self.template.auth_headers) | {"cookie"})
+            # Remplacement (jamais de mutation en place) : les requêtes en cours gardent leur copie
+            self.template.auth_headers = {**self.template.auth_headers, **self.auth_refresher(names)}
+            if self.template_file:
+                self.template.save(self.template_file)
+
+    def submit(self, file_name: str, fields: list[str] = None, date_range: DateRange = None) -> httpx.Response:
+        """Envoie un export ; lève AuthExpiredError ou httpx.HTTPStatusError en cas d'échec"""
+        used, response = self._send(file_name, fields, date_range)
+        if self._is_auth_failure(response):
+            logger.info("  Auth expiree (HTTP %s)", response.status_code)
+            self.refresh_auth(stale=used)
+            _, response = self._send(file_name, fields, date_range)
+            if self._is_auth_failure(response):
+                raise AuthExpiredError(f"Auth refusee apres rafraichissement (HTTP {response.status_code})")
+        response.raise_for_status()
+        logger.info("  Export soumis via API : %s (HTTP %s)", file_name, response.status_code)
+        return response
+
+    def submit_many(self, requests: list[dict], workers: int = None) -> list[tuple[bool, str]]:
+        """Soumet plusieurs exports en parallèle ; chaque requête = kwargs de `submit`.
+
+        L'auth est rafraîchie en amont si nécessaire par une première requête séquentielle.
+        """
+        if not requests:
+            return []
+        results = [self._safe_submit(requests[0])]
+        with ThreadPoolExecutor(max_workers=workers or settings.API_MAX_CONNECTIONS) as pool:
+            results.extend(pool.map(self._safe_submit, requests[1:]))
+        return results
+
+    def _safe_submit(self, kwargs: dict) -> tuple[bool, str]:
+        try:
+            self.submit(**kwargs)
+            return True, kwargs["file_name"]
+        except Exception as e:
+            logger.error("  Echec export API %s : %s", kwargs.get("file_name"), e)
+            return False, str(e)
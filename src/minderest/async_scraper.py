@@ -0,0 +1,211 @@
+import logging
+from datetime import datetime
+
+from src.config.settings import settings
+from src.minderest.browser import (
+    BrowserProfile,
+    ANTI_DETECTION_SCRIPT,
+    EXPORTS_TITLE_SELECTOR,
+    EXTRA_HTTP_HEADERS,
+    POPUP_FRAME_SELECTOR,
+    REQUEST_BUTTON_SELECTOR,
+    SIGNIN_SELECTOR,
+    SUCCESS_TOAST_SELECTOR,
+    export_file_name,
+)
+from src.minderest.calendar import AsyncCalendarPicker, DateRange
+from src.minderest.fields import FieldSelectionError, select_fields_async
+from src.minderest.routing import RoutePolicy
+from src.minderest.session import SessionCache
+from src.minderest.tracing import Tracer, traced
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMinderestScraper:
+    """Version asyncio du scraper : un contexte isolé sur un navigateur partagé
+
+    Le navigateur appartient à l'appelant (orchestrateur) ; ce scraper ne ferme que son contexte.
+    """
+
+    def __init__(self, browser, email: str = None, password: str = None,
+                 session_cache: SessionCache = None, label: str = None, route_policy: RoutePolicy = None,
+                 base_url: str = None, tracer: Tracer = None, profile: BrowserProfile = None):
+        self.browser = browser
+        self.email = email or settings.MINDEREST_EMAIL
+        self.password = password or settings.MINDEREST_PASSWORD
+        self.base_url = base_url or settings.MINDEREST_BASE_URL
+        self.session_cache = session_cache
+        self.label = label or self.email
+        self.context = None
+        self.page = None
+        self.session_restored = False
+        self.route_policy = route_policy
+        self.route_stats = None
+        self.tracer = tracer or Tracer(enabled=False)
+        self.field_report = None
+        self.profile = profile or BrowserProfile.from_settings()
+
+    async def __aenter__(self):
+        storage_state = self.session_cache.load(self.email) if self.session_cache else None
+        self.session_restored = storage_state is not None
+
+        self.context = await self.browser.new_context(**self.profile.context_options(), storage_state=storage_state)
+        self.profile.apply_timeouts(self.context)
+        await self.context.set_extra_http_headers(EXTRA_HTTP_HEADERS)
+        # Au niveau du contexte : appliqué aussi aux onglets rouverts par la reprise (workflow, page_closed)
+        await self.context.add_init_script(ANTI_DETECTION_SCRIPT)
+        if self.profile.trace:
+            await self.context.tracing.start(screenshots=True, snapshots=True, sources=True)
+        if self.route_policy:
+            self.route_stats = await self.route_policy.install_async(self.context)
+        self.page = await self.context.new_page()
+
+        logger.info("[%s] Contexte navigateur ouvert (session cache : %s)", self.label, self.session_restored)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.route_stats:
+            self.route_stats.log_summary()
+            for key in ("requests_total", "requests_blocked", "bytes_saved_estimate"):
+                self.tracer.gauge(f"route_{key}", getattr(self.route_stats, key))
+        if self.page:
+            await self.tracer.record_page_metrics_async(self.page, phase="final")
+        if self.context:
+            if self.profile.trace:
+                trace_path = self.profile.trace_path(self.label)
+                trace_path.parent.mkdir(parents=True, exist_ok=True)
+                await self.context.tracing.stop(path=str(trace_path))
+                logger.info("[%s] Trace Playwright : %s", self.label, trace_path)
+            await self.context.close()
+        logger.info("[%s] Contexte navigateur ferme", self.label)
+
+    @traced("login")
+    async def login(self):
+        """Se connecter (même parcours que MinderestScraper.login)"""
+        logger.info("[%s] CONNEXION MINDEREST", self.label)
+        await self.page.goto(f"{self.base_url}/user/login", wait_until='networkidle')
+        await self.page.fill('input[id="username"]', self.email)
+        await self.page.click('button:has-text("Continuer")')
+        await self.page.fill('input[type="password"]', self.password)
+
+        try:
+            signin_btn = await self.page.wait_for_selector(SIGNIN_SELECTOR, timeout=5000)
+            await signin_btn.click()
+        except Exception:
+            logger.warning("[%s] Bouton Sign In non trouve, tentative avec Enter...", self.label)
+            await self.page.press('input[type="password"]', 'Enter')
+
+        await self.page.wait_for_url(f"{self.base_url}/dashboard", timeout=60000)
+        logger.info("[%s] >>> CONNEXION REUSSIE <<<", self.label)
+
+        if self.session_cache:
+            self.session_cache.save(self.email, await self.context.storage_state())
+
+    async def is_session_valid(self) -> bool:
+        """Sonde légère : GET /dashboard sans suivre les redirections"""
+        try:
+            response = await self.context.request.get(
+                f"{self.base_url}/dashboard",
+                max_redirects=0,
+                timeout=10000,
+            )
+        except Exception as e:
+            logger.warning("[%s] Sonde session en echec : %s", self.label, e)
+            return False
+
+        location = response.headers.get("location", "")
+        return response.ok and "/user/login" not in response.url and "/user/login" not in location
+
+    @traced("ensure_logged_in")
+    async def ensure_logged_in(self):
+        """Réutilise la session en cache si elle est encore valide, sinon login complet"""
+        if self.session_restored and await self.is_session_valid():
+            logger.info("[%s] >>> SESSION REUTILISEE (login ignore) <<<", self.label)
+            self.tracer.incr("session_reused_total")
+            return
+
+        if self.session_restored:
+            self.session_cache.invalidate(self.email)
+            await self.context.clear_cookies()
+            self.session_restored = False
+        await self.login()
+
+    @traced("navigate_to_exports")
+    async def navigate_to_exports(self):
+        """Navigation vers la page d'export historique + fermeture du popup iframe"""
+        logger.info("[%s] NAVIGATION VERS EXPORTS", self.label)
+        await self.page.goto(f"{self.base_url}/exports/historical", wait_until='networkidle')
+
+        try:
+            close_btn = self.page.frame_locator(POPUP_FRAME_SELECTOR).get_by_role("button", name="Close")
+            if await close_btn.is_visible(timeout=3000):
+                await close_btn.click()
+                logger.info("[%s] Popup ferme via iframe", self.label)
+        except Exception as e:
+            logger.info("[%s] Pas de popup ou erreur : %s", self.label, e)
+
+        await self.page.wait_for_selector(EXPORTS_TITLE_SELECTOR, timeout=10000)
+        await self.tracer.record_page_metrics_async(self.page, phase="exports")
+
+    @traced("fill_export_form")
+    async def fill_export_form(self, fields: list[str] = None, file_name: str = None,
+                               date_range: DateRange = None):
+        """Remplit le formulaire d'export (mêmes étapes que MinderestScraper.fill_export_form)"""
+        file_name = await self.set_export_name(file_name)
+        await self.select_export_fields(fields)
+        await self.select_date_range(date_range)
+        return file_name
+
+    async def set_export_name(self, file_name: str = None) -> str:
+        """Nom du fichier + type d'exportation 'Lignes'"""
+        file_name = file_name or export_file_name(datetime.now())
+        logger.info("[%s] REMPLISSAGE FORMULAIRE : %s", self.label, file_name)
+
+        name_field = self.page.get_by_role("textbox", name="Entrez un nom")
+        await name_field.wait_for(state='visible')
+        await name_field.fill(file_name)
+        await self.page.get_by_role("button", name="Lignes").click()
+        return file_name
+
+    async def select_export_fields(self, fields: list[str] = None):
+        """Ouvre la liste des champs, coche les champs demandés, referme la liste"""
+        list_opener = self.page.get_by_text("items selected")
+        await list_opener.wait_for(state='visible', timeout=10_000)
+        await list_opener.click()
+        await self.page.wait_for_selector(".vue-recycle-scroller__item-view", timeout=5_000)
+
+        fields = list(fields or settings.EXPORT_FIELDS)
+        with self.tracer.span("select_fields", requested=len(fields)) as span:
+            self.field_report = await select_fields_async(self.page, fields)
+            span.set(**self.field_report.results, scrolls=self.field_report.scrolls)
+        self.field_report.log(prefix=f"[{self.label}]")
+
+        await self.page.keyboard.press("Escape")
+        if settings.FIELDS_STRICT and not self.field_report.complete:
+            raise FieldSelectionError(self.field_report)
+
+    async def select_date_range(self, date_range: DateRange = None) -> DateRange:
+        date_range = date_range or DateRange.last_days()
+        await AsyncCalendarPicker(self.page, self.tracer).select(date_range)
+        logger.info("[%s] Periode appliquee : %s", self.label, date_range)
+        return date_range
+
+    @traced("submit_request")
+    async def submit_request(self):
+        """Soumettre la requête d'export"""
+        request_btn = self.page.locator(REQUEST_BUTTON_SELECTOR).first
+        await request_btn.wait_for(state='visible')
+        await request_btn.click()
+        await self.page.wait_for_selector(SUCCESS_TOAST_SELECTOR, timeout=30000)
+        logger.info("[%s] Requete validee", self.label)
+
+    async def screenshot(self, prefix: str = "error_process"):
+        """Capture d'écran d'erreur dans logs/ (ne lève jamais)"""
+        path = f"{settings.LOGS_DIR}/{prefix}_{datetime.now():%Y%m%d_%H%M%S_%f}.png"
+        try:
+            await self.page.screenshot(path=path)
+            return path
+        except Exception as e:
+            logger.warning("[%s] Screenshot impossible : %s", self.label, e)
+            return None
@@ -0,0 +1,128 @@
+"""Options navigateur et sélecteurs partagés entre le scraper sync et l'orchestrateur async"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from src.config.settings import settings
+
+# === CORRECTIF ZOOM/DPI WINDOWS (100% garanti) ===
+LAUNCH_ARGS = [
+    '--start-maximized',              # Plein écran
+    '--force-device-scale-factor=1',  # Force zoom 100%
+    '--high-dpi-support=1',           # Support DPI correct
+    '--disable-dev-shm-usage',        # Évite erreurs mémoire
+    '--no-sandbox',                   # Windows compatibility
+    '--disable-setuid-sandbox',
+    '--disable-blink-features=AutomationControlled',  # Anti-detection
+]
+
+IGNORE_DEFAULT_ARGS = [
+    '--enable-automation',
+    '--disable-default-apps',
+]
+
+# === CORRECTIF VIEWPORT : Forcer résolution exacte ===
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},  # FULL HD strict
+    'screen': {'width': 1920, 'height': 1080},
+    'device_scale_factor': 1,  # Désactive scaling DPI
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+# === ANTI-DETECTION SUPPLÉMENTAIRE ===
+EXTRA_HTTP_HEADERS = {
+    "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+}
+
+# Désactiver la détection WebDriver
+ANTI_DETECTION_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+    window.chrome = {
+        runtime: {}
+    };
+"""
+
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """Profil d'exécution (settings.BROWSER_PROFILES) : lancement, contexte, délais, trace, captures"""
+    name: str = "default"
+    headless: bool = False
+    slow_mo: int = 0
+    viewport: dict = field(default_factory=lambda: dict(CONTEXT_OPTIONS["viewport"]))
+    block_resources: bool = True
+    trace: bool = False
+    screenshot_on_failure: bool = True
+    timeout_ms: int = 30000
+    navigation_timeout_ms: int = 30000
+    reduced_motion: str = None
+    extra_args: tuple = ()
+
+    @classmethod
+    def from_settings(cls, name: str = None, headless: bool = None) -> "BrowserProfile":
+        """`headless` explicite (tests, appelants) prioritaire sur le profil et sur HEADLESS"""
+        values = settings.browser_profile(name)
+        values["extra_args"] = tuple(values.get("extra_args") or ())
+        if headless is not None:
+            values["headless"] = headless
+        return cls(**values)
+
+    def launch_options(self) -> dict:
+        args = [a for a in LAUNCH_ARGS if not (self.headless and a == '--start-maximized')]
+        return {"headless": self.headless, "slow_mo": self.slow_mo, "args": args + list(self.extra_args),
+                "ignore_default_args": IGNORE_DEFAULT_ARGS}
+
+    def context_options(self) -> dict:
+        options = dict(CONTEXT_OPTIONS, viewport=self.viewport, screen=self.viewport)
+        if self.reduced_motion:
+            options["reduced_motion"] = self.reduced_motion
+        return options
+
+    def apply_timeouts(self, context):
+        """Délais par défaut (sync et async : ces deux méthodes ne sont pas des coroutines)"""
+        context.set_default_timeout(self.timeout_ms)
+        context.set_default_navigation_timeout(self.navigation_timeout_ms)
+
+    def trace_path(self, label: str = "run") -> Path:
+        safe = "".join(c if c.isalnum() else "_" for c in label)
+        return Path(settings.TRACE_DIR) / f"playwright_{safe}_{datetime.now():%Y%m%d_%H%M%S_%f}.zip"
+
+
+SIGNIN_SELECTOR = 'button[type="submit"], button:has-text("Sign in"), button:has-text("Connexion")'
+POPUP_FRAME_SELECTOR = '[data-test-id="interactive-frame"]'
+EXPORTS_TITLE_SELECTOR = 'h1:has-text("Export historique")'
+REQUEST_BUTTON_SELECTOR = 'button:has-text("Requête"), button:has-text("Exporter")'
+SUCCESS_TOAST_SELECTOR = '.alert-success, .toast-success'
+
+FIELD_SELECTORS = {
+    "historical_cli_min_price": "#historical_cli_min_price",
+    "historical_cli_max_price": "#historical_cli_max_price",
+    "historical_cli_avg_price": "#historical_cli_avg_price",
+    "historical_cli_avg_stock": "#historical_cli_avg_stock",
+    "cli_category_level_3": "#cli_category_level_3",
+    "cli_category_level_4": "#cli_category_level_4",
+    "historical_cli_offer": "#historical_cli_offer",
+    "historical_cli_stock": "#historical_cli_stock",
+    "historical_comp_offer": "#historical_comp_offer",
+    "historical_comp_stock": "#historical_comp_stock",
+    "historical_cli_price": "#historical_cli_price",
+    "historical_cli_cost": "#historical_cli_cost",
+    "historical_comp_avg_stock": "#historical_comp_avg_stock",
+    "my_price_before_offer": 'div.filter:has-text("My Price before offer")',
+    "my_stock": 'div.filter:has-text("My Stock")',
+    "stock": 'div.filter:has-text("Stock")',
+}
+
+
+# Gabarit unique du nom d'export : scraper, file de jobs (gabarit par défaut, clé de dédoublonnage)
+# et graph_api.mail.EXPORT_NAME_RE, qui retrouve ce nom dans les emails
+EXPORT_NAME_TEMPLATE = "Exports_Minderset_{now:%d-%m-%Y_%Hh%M}s"
+
+
+def export_file_name(now) -> str:
+    """Nom de fichier d'export utilisé côté Minderest (et retrouvé ensuite dans les emails)"""
+    return EXPORT_NAME_TEMPLATE.format(now=now)
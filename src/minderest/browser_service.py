@@ -0,0 +1,347 @@
+"""Service navigateur persistant : un Chromium chaud partagé entre les runs via CDP
+
+Lancement :  python -m src.minderest.browser_service
+Côté scraper : BROWSER_SERVICE_URL=http://127.0.0.1:9300 (connect_over_cdp au lieu d'un launch à froid)
+
+Chaque job prend un bail (lease) et crée son propre contexte ; le navigateur est recyclé après
+BROWSER_RECYCLE_JOBS jobs ou au-delà de BROWSER_RECYCLE_MEMORY_MB, une fois les baux en cours rendus.
+Le client renouvelle son bail en tâche de fond ; un bail non renouvelé depuis BROWSER_LEASE_TTL
+(client planté sans release) est repris par le service.
+"""
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from src.config.settings import settings
+from src.minderest.browser import LAUNCH_ARGS
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:  # optionnel : lecture de /proc sous Linux sinon
+    psutil = None
+
+
+def process_tree_rss_mb(pid: int, names: tuple[str, ...] = None) -> float | None:
+    """Mémoire résidente d'un processus et de tous ses enfants (renderers, GPU...) ;
+    `names` : ne compter que les processus dont le nom contient l'une de ces chaînes"""
+    def wanted(name: str) -> bool:
+        return names is None or any(n in name.lower() for n in names)
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+            total = 0
+            for p in procs:
+                try:
+                    if p.is_running() and wanted(p.name()):
+                        total += p.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total / 1_048_576
+        except psutil.Error:
+            return None
+    if not os.path.isdir("/proc"):
+        return None
+
+    children, rss_kb, comm = {}, {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status") as f:
+                status = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        child = int(entry)
+        children.setdefault(int(status["PPid"].strip()), []).append(child)
+        rss_kb[child] = int(status.get("VmRSS", "0 kB").split()[0])
+        comm[child] = status.get("Name", "").strip()
+
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        if wanted(comm.get(current, "")):
+            total += rss_kb.get(current, 0)
+        stack.extend(children.get(current, []))
+    return total / 1024
+
+
+def chromium_executable() -> str:
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as playwright:
+        return playwright.chromium.executable_path
+
+
+class BrowserService:
+    """Processus Chromium + petite API HTTP de baux (POST /lease, POST /renew/<id>, POST /release/<id>,
+    GET /status)"""
+
+    def __init__(self, port: int = None, cdp_port: int = None, max_jobs: int = None,
+                 max_memory_mb: float = None, headless: bool = None, lease_ttl: float = None):
+        self.port = port or settings.BROWSER_SERVICE_PORT
+        self.cdp_port = cdp_port or settings.BROWSER_CDP_PORT
+        self.max_jobs = max_jobs or settings.BROWSER_RECYCLE_JOBS
+        self.max_memory_mb = max_memory_mb or settings.BROWSER_RECYCLE_MEMORY_MB
+        self.headless = settings.BROWSER_SERVICE_HEADLESS if headless is None else headless
+        self.process = None
+        self.profile_dir = None
+        self.lease_ttl = lease_ttl or settings.BROWSER_LEASE_TTL
+        self.jobs_served = 0
+        self.active_leases: dict[str, float] = {}   # id -> dernier signe de vie (time.monotonic)
+        self._cond = threading.Condition()
+        self._server = None
+        self._stopping = False
+
+    @property
+    def cdp_endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.cdp_port}"
+
+    # ---- cycle de vie du navigateur ----
+    def _launch(self):
+        self.profile_dir = tempfile.mkdtemp(prefix="minderest_chromium_")
+        args = [
+            chromium_executable(),
+            f"--remote-debugging-port={self.cdp_port}",
+            "--remote-debugging-address=127.0.0.1",
+            f"--user-data-dir={self.profile_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            *LAUNCH_ARGS,
+        ]
+        if self.headless:
+            args.append("--headless=new")
+        # Nouveau groupe de processus : on peut tuer Chromium ET tous ses enfants d'un coup
+        popen_kwargs = {"start_new_session": True} if os.name != "nt" else {
+            "creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **popen_kwargs)
+        self.jobs_served = 0
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                httpx.get(f"{self.cdp_endpoint}/json/version", timeout=1).raise_for_status()
+                logger.info("Chromium pret (pid %s, CDP %s)", self.process.pid, self.cdp_endpoint)
+                return
+            except httpx.HTTPError:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"Chromium s'est arrete au demarrage (code {self.process.returncode})")
+                time.sleep(0.2)
+        self._kill()
+        raise RuntimeError("Chromium ne repond pas sur le port CDP")
+
+    def _kill(self):
+        if self.process and self.process.poll() is None:
+            try:
+                if os.name != "nt":
+                    os.killpg(self.process.pid, signal.SIGTERM)
+                else:
+                    self.process.terminate()
+                self.process.wait(timeout=10)
+            except (subprocess.TimeoutExpired, ProcessLookupError):
+                if os.name != "nt":
+                    try:
+                        os.killpg(self.process.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                else:
+                    self.process.kill()
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+        self.process = None
+
+    def memory_mb(self) -> float | None:
+        return process_tree_rss_mb(self.process.pid) if self.process else None
+
+    def _reap_expired(self):
+        """Reprend les baux non renouvelés depuis lease_ttl (appelé sous self._cond)"""
+        limit = time.monotonic() - self.lease_ttl
+        for lease_id in [k for k, seen in self.active_leases.items() if seen < limit]:
+            logger.warning("Bail %s expire (aucun renouvellement depuis %.0fs), repris", lease_id[:8], self.lease_ttl)
+            del self.active_leases[lease_id]
+
+    def _needs_recycle(self) -> str | None:
+        self._reap_expired()
+        if self.process is None or self.process.poll() is not None:
+            return "navigateur arrete"
+        if self.jobs_served >= self.max_jobs:
+            return f"{self.jobs_served} jobs servis"
+        memory = self.memory_mb()
+        if memory is not None and memory > self.max_memory_mb:
+            return f"memoire {memory:.0f} Mo"
+        return None
+
+    # ---- baux ----
+    def acquire(self, jobs: int = 1, timeout: float = 300) -> dict:
+        """Attribue un bail ; si un recyclage est dû, attend que les baux en cours soient rendus"""
+        with self._cond:
+            deadline = time.monotonic() + timeout
+            reason = self._needs_recycle()
+            while reason and self.active_leases:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Recyclage du navigateur bloque par des baux actifs")
+                # Réveil périodique : un bail peut expirer sans release ni notify
+                self._cond.wait(timeout=min(remaining, max(0.05, self.lease_ttl / 4)))
+                reason = self._needs_recycle()
+            if reason:
+                logger.info("Recyclage du navigateur (%s)", reason)
+                self._kill()
+                self._launch()
+
+            lease_id = uuid.uuid4().hex
+            self.active_leases[lease_id] = time.monotonic()
+            self.jobs_served += jobs
+            return {"lease_id": lease_id, "cdp_endpoint": self.cdp_endpoint, "ttl": self.lease_ttl}
+
+    def renew(self, lease_id: str) -> bool:
+        """Signe de vie d'un bail ; False s'il a déjà expiré (ou été rendu)"""
+        with self._cond:
+            if lease_id not in self.active_leases:
+                return False
+            self.active_leases[lease_id] = time.monotonic()
+            return True
+
+    def release(self, lease_id: str):
+        with self._cond:
+            self.active_leases.pop(lease_id, None)
+            self._cond.notify_all()
+
+    def status(self) -> dict:
+        return {
+            "pid": self.process.pid if self.process else None,
+            "jobs_served": self.jobs_served,
+            "active_leases": len(self.active_leases),
+            "memory_mb": self.memory_mb(),
+            "max_jobs": self.max_jobs,
+            "max_memory_mb": self.max_memory_mb,
+        }
+
+    # ---- serveur de contrôle ----
+    def serve_forever(self):
+        self._launch()
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        logger.info("Service navigateur en ecoute sur http://127.0.0.1:%s", self.port)
+        try:
+            self._server.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Arret du service navigateur")
+        if self._server:
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+        self._kill()
+
+
+def _make_handler(service: BrowserService):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logger.debug("control: " + format, *args)
+
+        def _json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/status":
+                return self._json(200, service.status())
+            self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/lease":
+                try:
+                    return self._json(200, service.acquire(jobs=int(payload.get("jobs", 1))))
+                except (TimeoutError, RuntimeError) as e:
+                    return self._json(503, {"error": str(e)})
+            if self.path.startswith("/renew/"):
+                renewed = service.renew(self.path.rsplit("/", 1)[-1])
+                return self._json(200 if renewed else 404, {"renewed": renewed})
+            if self.path.startswith("/release/"):
+                service.release(self.path.rsplit("/", 1)[-1])
+                return self._json(200, {"released": True})
+            self._json(404, {"error": "not found"})
+
+    return Handler
+
+
+class BrowserLease:
+    """Bail côté client : endpoint CDP à utiliser avec connect_over_cdp, renouvelé en tâche de fond
+    (tiers du TTL) tant qu'il est tenu, rendu à la fermeture"""
+
+    def __init__(self, service_url: str = None, jobs: int = 1):
+        self.service_url = (service_url or settings.BROWSER_SERVICE_URL).rstrip("/")
+        self.jobs = jobs
+        self.lease_id = None
+        self.cdp_endpoint = None
+        self._stop_renewal = threading.Event()
+
+    def acquire(self) -> "BrowserLease":
+        response = httpx.post(f"{self.service_url}/lease", json={"jobs": self.jobs}, timeout=330)
+        response.raise_for_status()
+        payload = response.json()
+        self.lease_id, self.cdp_endpoint = payload["lease_id"], payload["cdp_endpoint"]
+        logger.info("Bail navigateur %s -> %s", self.lease_id[:8], self.cdp_endpoint)
+        ttl = float(payload.get("ttl") or settings.BROWSER_LEASE_TTL)
+        self._stop_renewal.clear()
+        threading.Thread(target=self._renew_loop, args=(self.lease_id, ttl / 3), daemon=True).start()
+        return self
+
+    def _renew_loop(self, lease_id: str, interval: float):
+        while not self._stop_renewal.wait(interval):
+            try:
+                httpx.post(f"{self.service_url}/renew/{lease_id}", timeout=10)
+            except httpx.HTTPError as e:
+                logger.warning("Renouvellement du bail %s impossible : %s", lease_id[:8], e)
+
+    def release(self):
+        self._stop_renewal.set()
+        if not self.lease_id:
+            return
+        try:
+            httpx.post(f"{self.service_url}/release/{self.lease_id}", timeout=10)
+        except httpx.HTTPError as e:
+            logger.warning("Liberation du bail %s impossible : %s", self.lease_id[:8], e)
+        self.lease_id = None
+
+
+def main():
+    logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    service = BrowserService()
+
+    def stop(signum, frame):
+        service.shutdown()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    service.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from src.config.settings import settings
+from src.minderest.tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_OPENER_SELECTOR = "#export-historical-calendar"
+# daterangepicker : le panneau de gauche sert de référence pour la navigation
+CALENDAR_HEADER_SELECTOR = ".drp-calendar.left th.month, .calendar-title, .datepicker-title"
+CALENDAR_PREV_SELECTOR = ".prev > span"
+CALENDAR_NEXT_SELECTOR = ".next > span"
+CALENDAR_LEFT_DAYS_SELECTOR = ".drp-calendar.left td.available:not(.off)"
+CALENDAR_POPUP_SELECTOR = ".daterangepicker"
+# Repli hors daterangepicker : cellules du mois affiché uniquement ; les jours des mois voisins
+# (off / old / new selon la librairie) portent le même numéro et ne doivent jamais être cliqués
+CALENDAR_MONTH_DAYS_SELECTOR = (
+    f"{CALENDAR_POPUP_SELECTOR} td:not(.off):not(.old):not(.new):not(.disabled), "
+    ".datepicker-days td.day:not(.old):not(.new):not(.disabled)"
+)
+
+MONTHS = {
+    "janv": 1, "jan": 1, "févr": 2, "fevr": 2, "feb": 2, "mars": 3, "mar": 3,
+    "avr": 4, "apr": 4, "mai": 5, "may": 5, "juin": 6, "jun": 6,
+    "juil": 7, "jul": 7, "août": 8, "aout": 8, "aug": 8, "sept": 9, "sep": 9,
+    "oct": 10, "nov": 11, "déc": 12, "dec": 12,
+}
+
+# Attend que le titre du mois affiché change (remplace les wait_for_timeout après chaque clic)
+_HEADER_CHANGED_JS = """([sel, old]) => {
+    const el = document.querySelector(sel);
+    return el !== null && el.textContent.trim() !== old;
+}"""
+
+
+@dataclass(frozen=True)
+class DateRange:
+    """Période d'export, bornes incluses"""
+    start: date
+    end: date
+
+    def __post_init__(self):
+        if self.start > self.end:
+            raise ValueError(f"Periode invalide : {self.start} > {self.end}")
+
+    @classmethod
+    def last_days(cls, days: int = None, today: date = None) -> "DateRange":
+        """Fenêtre glissante historique : de today - days jusqu'à hier"""
+        today = today or date.today()
+        days = days or settings.PERIOD_DAYS
+        return cls(today - timedelta(days=days), today - timedelta(days=1))
+
+    @property
+    def days(self) -> int:
+        return (self.end - self.start).days + 1
+
+    def __str__(self):
+        return f"{self.start:%Y-%m-%d} → {self.end:%Y-%m-%d}"
+
+
+def parse_month_header(text: str, today: date = None) -> tuple[int, int] | None:
+    """'nov. 2025' / 'Novembre 2025' / 'Nov' -> (2025, 11) ; année absente = la plus récente ≤ aujourd'hui"""
+    if not text:
+        return None
+    lowered = text.strip().lower()
+    month = None
+    # abréviations les plus longues d'abord ('juil' avant 'jul', 'mars' avant 'mar')
+    for abbr in sorted(MONTHS, key=len, reverse=True):
+        if abbr in lowered:
+            month = MONTHS[abbr]
+            break
+    if month is None:
+        return None
+
+    year_match = re.search(r"(19|20)\d{2}", lowered)
+    if year_match:
+        return int(year_match.group(0)), month
+    today = today or date.today()
+    return (today.year if month <= today.month else today.year - 1), month
+
+
+def month_delta(shown: tuple[int, int], target: date) -> int:
+    """Nombre de clics 'next' (positif) ou 'prev' (négatif) pour afficher le mois cible"""
+    year, month = shown
+    return (target.year - year) * 12 + (target.month - month)
+
+
+def format_range_input(date_range: DateRange) -> str:
+    """Texte attendu par le champ de saisie de la période (format configurable)"""
+    fmt = settings.CALENDAR_INPUT_FORMAT
+    return f"{date_range.start.strftime(fmt)}{settings.CALENDAR_INPUT_SEPARATOR}{date_range.end.strftime(fmt)}"
+
+
+class CalendarPicker:
+    """Sélection de période sur le calendrier d'export (API Playwright sync)
+
+    Deux stratégies : saisie directe dans le champ (CALENDAR_MODE=input) ou navigation
+    directe au mois cible d'après le titre du calendrier (CALENDAR_MODE=calendar, défaut).
+    """
+
+    def __init__(self, page, tracer: Tracer = None):
+        self.page = page
+        self.tracer = tracer or Tracer(enabled=False)
+
+    def select(self, date_range: DateRange):
+        if settings.CALENDAR_MODE == "input":
+            with self.tracer.span("calendar.type_range") as span:
+                typed = self._type_range(date_range)
+                span.set(success=typed)
+            if typed:
+                logger.info("  Periode saisie directement : %s", date_range)
+                return
+
+        with self.tracer.span("calendar.open"):
+            self.page.locator(CALENDAR_OPENER_SELECTOR).click()
+            self.page.wait_for_selector(CALENDAR_PREV_SELECTOR, timeout=5_000)
+
+        for label, day in (("start", date_range.start), ("end", date_range.end)):
+            with self.tracer.span("calendar.go_to_month", bound=label) as span:
+                span.set(months=self._go_to_month(day))
+            with self.tracer.span("calendar.click_day", bound=label):
+                self._click_day(day)
+
+        with self.tracer.span("calendar.apply"):
+            self.page.get_by_role("button", name="Appliquer").click()
+            self.page.locator(CALENDAR_POPUP_SELECTOR).first.wait_for(state="hidden", timeout=5_000)
+        logger.info("  Periode appliquee via calendrier : %s", date_range)
+
+    def _type_range(self, date_range: DateRange) -> bool:
+        text = format_range_input(date_range)
+        try:
+            field = self.page.locator(f"input{CALENDAR_OPENER_SELECTOR}, {CALENDAR_OPENER_SELECTOR} input").first
+            field.fill(text, timeout=3_000)
+            field.press("Enter")
+            return field.input_value() == text
+        except Exception as e:
+            logger.info("  Saisie directe impossible (%s), bascule calendrier", e)
+            return False
+
+    def _header_text(self) -> str:
+        header = self.page.locator(CALENDAR_HEADER_SELECTOR).first
+        header.wait_for(state="visible", timeout=5_000)
+        return header.text_content().strip()
+
+    def _go_to_month(self, target: date):
+        header = self._header_text()
+        shown = parse_month_header(header)
+        if shown is None:
+            raise RuntimeError(f"Titre du calendrier illisible : {header!r}")
+
+        delta = month_delta(shown, target)
+        arrow = CALENDAR_NEXT_SELECTOR if delta > 0 else CALENDAR_PREV_SELECTOR
+        for _ in range(abs(delta)):
+            self.page.locator(arrow).first.click()
+            self.page.wait_for_function(_HEADER_CHANGED_JS, arg=[CALENDAR_HEADER_SELECTOR, header], timeout=5_000)
+            header = self._header_text()
+        logger.debug("  Calendrier : %d mois -> %s", delta, header)
+        return delta
+
+    def _click_day(self, day: date):
+        exact_day = re.compile(rf"^\s*{day.day}\s*$")
+        for selector in (CALENDAR_LEFT_DAYS_SELECTOR, CALENDAR_MONTH_DAYS_SELECTOR):
+            cell = self.page.locator(selector).filter(has_text=exact_day)
+            if cell.count():
+                cell.first.click()
+                return
+        raise RuntimeError(f"Jour {day} introuvable dans le mois affiche")
+
+
+class AsyncCalendarPicker:
+    """Même stratégie que CalendarPicker, pour l'API Playwright async"""
+
+    def __init__(self, page, tracer: Tracer = None):
+        self.page = page
+        self.tracer = tracer or Tracer(enabled=False)
+
+    async def select(self, date_range: DateRange):
+        if settings.CALENDAR_MODE == "input":
+            with self.tracer.span("calendar.type_range") as span:
+                typed = await self._type_range(date_range)
+                span.set(success=typed)
+            if typed:
+                return
+
+        with self.tracer.span("calendar.open"):
+            await self.page.locator(CALENDAR_OPENER_SELECTOR).click()
+            await self.page.wait_for_selector(CALENDAR_PREV_SELECTOR, timeout=5_000)
+
+        for label, day in (("start", date_range.start), ("end", date_range.end)):
+            with self.tracer.span("calendar.go_to_month", bound=label) as span:
+                span.set(months=await self._go_to_month(day))
+            with self.tracer.span("calendar.click_day", bound=label):
+                await self._click_day(day)
+
+        with self.tracer.span("calendar.apply"):
+            await self.page.get_by_role("button", name="Appliquer").click()
+            await self.page.locator(CALENDAR_POPUP_SELECTOR).first.wait_for(state="hidden", timeout=5_000)
+
+    async def _type_range(self, date_range: DateRange) -> bool:
+        text = format_range_input(date_range)
+        try:
+            field = self.page.locator(f"input{CALENDAR_OPENER_SELECTOR}, {CALENDAR_OPENER_SELECTOR} input").first
+            await field.fill(text, timeout=3_000)
+            await field.press("Enter")
+            return await field.input_value() == text
+        except Exception:
+            return False
+
+    async def _header_text(self) -> str:
+        header = self.page.locator(CALENDAR_HEADER_SELECTOR).first
+        await header.wait_for(state="visible", timeout=5_000)
+        return (await header.text_content()).strip()
+
+    async def _go_to_month(self, target: date):
+        header = await self._header_text()
+        shown = parse_month_header(header)
+        if shown is None:
+            raise RuntimeError(f"Titre du calendrier illisible : {header!r}")
+
+        delta = month_delta(shown, target)
+        arrow = CALENDAR_NEXT_SELECTOR if delta > 0 else CALENDAR_PREV_SELECTOR
+        for _ in range(abs(delta)):
+            await self.page.locator(arrow).first.click()
+            await self.page.wait_for_function(_HEADER_CHANGED_JS, arg=[CALENDAR_HEADER_SELECTOR, header], timeout=5_000)
+            header = await self._header_text()
+        return delta
+
+    async def _click_day(self, day: date):
+        exact_day = re.compile(rf"^\s*{day.day}\s*$")
+        for selector in (CALENDAR_LEFT_DAYS_SELECTOR, CALENDAR_MONTH_DAYS_SELECTOR):
+            cell = self.page.locator(selector).filter(has_text=exact_day)
+            if await cell.count():
+                await cell.first.click()
+                return
+        raise RuntimeError(f"Jour {day} introuvable dans le mois affiche")
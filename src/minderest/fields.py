@@ -0,0 +1,157 @@
+import logging
+import re
+from dataclasses import dataclass, field
+
+from src.minderest.browser import FIELD_SELECTORS
+
+logger = logging.getLogger(__name__)
+
+FIELD_SCROLLER_SELECTOR = ".vue-recycle-scroller"
+SELECTED = ("checked", "already_checked")
+MISSING = ("not_found", "failed", "invalid_selector")
+
+# Une seule évaluation dans la page : résout l'état de tous les champs, coche ceux qui doivent
+# l'être, et fait défiler la liste virtuelle pour faire rendre les éléments pas encore affichés.
+# Texte comparé sans casse ni espaces superflus (comme :has-text) : libellé exact d'abord, puis,
+# seulement pour les champs encore introuvables, second défilement acceptant un libellé contenant
+# le texte (« Stock » ne coche jamais « My Stock » quand « Stock » existe).
+SELECT_FIELDS_JS = """async ({specs, scrollerSelector, maxScrolls}) => {
+    const scroller = document.querySelector(scrollerSelector);
+    const pending = new Map(Object.entries(specs));
+    const report = {};
+    const claimed = new Set();   // libellés déjà attribués à un champ (les vues de la liste sont recyclées)
+    const rendered = () => new Promise(resolve => {
+        let done = false;
+        const finish = () => { if (!done) { done = true; resolve(); } };
+        requestAnimationFrame(() => requestAnimationFrame(finish));
+        setTimeout(finish, 50);  // rAF suspendu si l'onglet n'est pas affiché
+    });
+    const norm = (text) => (text || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    const find = (spec, loose) => {
+        const candidates = document.querySelectorAll(spec.css);
+        if (!spec.text) return candidates[0] || null;
+        const text = norm(spec.text);
+        return Array.from(candidates).find(el => {
+            const label = norm(el.textContent);
+            return loose ? !claimed.has(label) && label.includes(text) : label === text;
+        }) || null;
+    };
+    const resolveRendered = (loose) => {
+        for (const [name, spec] of Array.from(pending)) {
+            if (loose && !spec.text) continue;
+            let el;
+            try { el = find(spec, loose); }
+            catch (e) { report[name] = {status: 'invalid_selector', error: String(e)}; pending.delete(name); continue; }
+            if (!el) continue;
+            if (spec.text) claimed.add(norm(el.textContent));
+            const box = el.matches('input[type=checkbox]') ? el : (el.querySelector('input[type=checkbox]') || el);
+            if (box.disabled || box.getAttribute('aria-disabled') === 'true') {
+                report[name] = {status: 'disabled'};
+            } else if (box.checked === true || box.getAttribute('aria-checked') === 'true') {
+                report[name] = {status: 'already_checked'};
+            } else {
+                box.click();
+                const ok = box.checked === true || box.getAttribute('aria-checked') === 'true' || box.checked === undefined;
+                report[name] = {status: ok ? 'checked' : 'failed'};
+            }
+            pending.delete(name);
+        }
+    };
+
+    let scrolls = 0;
+    const sweep = async (loose) => {
+        if (scroller) { scroller.scrollTop = 0; await rendered(); }
+        resolveRendered(loose);
+        while (pending.size && scroller && scrolls < maxScrolls) {
+            const before = scroller.scrollTop;
+            scroller.scrollTop = before + Math.max(scroller.clientHeight - 32, 32);
+            await rendered();
+            scrolls++;
+            resolveRendered(loose);
+            if (scroller.scrollTop === before) break;  // bas de la liste atteint
+        }
+    };
+    await sweep(false);
+    if (Array.from(pending.values()).some(spec => spec.text)) await sweep(true);
+    for (const name of pending.keys()) report[name] = {status: 'not_found'};
+    return {report, scrolls};
+}"""
+
+_HAS_TEXT = re.compile(r'^(?P<css>.*?):has-text\("(?P<text>.*)"\)$')
+
+
+def field_spec(field_name: str) -> dict:
+    """Sélecteur Playwright -> spécification CSS (+ texte) exploitable par querySelectorAll"""
+    selector = FIELD_SELECTORS.get(field_name, f"#{field_name}")
+    match = _HAS_TEXT.match(selector)
+    if match:
+        return {"css": match.group("css") or "*", "text": match.group("text")}
+    return {"css": selector, "text": None}
+
+
+@dataclass
+class FieldSelectionReport:
+    """Résultat de la sélection : statut par champ (checked, already_checked, disabled, not_found, failed)"""
+    results: dict[str, str]
+    scrolls: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_js(cls, fields: list[str], payload: dict) -> "FieldSelectionReport":
+        report = payload["report"]
+        return cls(
+            results={name: report.get(name, {}).get("status", "not_found") for name in fields},
+            scrolls=payload.get("scrolls", 0),
+            errors={name: r["error"] for name, r in report.items() if r.get("error")},
+        )
+
+    @property
+    def selected(self) -> list[str]:
+        return [name for name, status in self.results.items() if status in SELECTED]
+
+    @property
+    def disabled(self) -> list[str]:
+        return [name for name, status in self.results.items() if status == "disabled"]
+
+    @property
+    def missing(self) -> list[str]:
+        return [name for name, status in self.results.items() if status in MISSING]
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def log(self, prefix: str = ""):
+        logger.info("%s    Champs : %d selectionnes, %d grises, %d manquants (%d defilements)",
+                    prefix, len(self.selected), len(self.disabled), len(self.missing), self.scrolls)
+        for name in self.disabled:
+            logger.info("%s    [GRISÉ] %s (ignoré)", prefix, name)
+        for name in self.missing:
+            logger.warning("%s    [✗] %s : %s", prefix, name, self.results[name])
+
+    def as_dict(self) -> dict:
+        return {"results": self.results, "scrolls": self.scrolls}
+
+
+class FieldSelectionError(Exception):
+    def __init__(self, report: FieldSelectionReport):
+        super().__init__(f"Champs non selectionnes : {', '.join(report.missing)}")
+        self.report = report
+
+
+def _args(fields: list[str], max_scrolls: int) -> dict:
+    return {
+        "specs": {name: field_spec(name) for name in fields},
+        "scrollerSelector": FIELD_SCROLLER_SELECTOR,
+        "maxScrolls": max_scrolls,
+    }
+
+
+def select_fields(page, fields: list[str], max_scrolls: int = 200) -> FieldSelectionReport:
+    """Sélection groupée des champs (API sync) : un seul aller-retour navigateur"""
+    return FieldSelectionReport.from_js(fields, page.evaluate(SELECT_FIELDS_JS, _args(fields, max_scrolls)))
+
+
+async def select_fields_async(page, fields: list[str], max_scrolls: int = 200) -> FieldSelectionReport:
+    payload = await page.evaluate(SELECT_FIELDS_JS, _args(fields, max_scrolls))
+    return FieldSelectionReport.from_js(fields, payload)
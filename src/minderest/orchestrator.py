@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from playwright.async_api import async_playwright
+
+from src.config.settings import settings
+from src.minderest.async_scraper import AsyncMinderestScraper
+from src.minderest.browser import BrowserProfile
+from src.minderest.browser_service import BrowserLease
+from src.minderest.calendar import DateRange
+from src.minderest.routing import RoutePolicy
+from src.minderest.session import SessionCache
+from src.minderest.tracing import Tracer
+from src.minderest.workflow import AsyncExportWorkflow, Checkpoint
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExportJob:
+    """Un export à produire : compte, champs et nom de fichier (None = valeurs par défaut)"""
+    email: str = None
+    password: str = None
+    fields: list[str] = None
+    file_name: str = None
+    date_range: DateRange = None
+    submit: bool = True
+    label: str = None
+
+
+@dataclass
+class ExportResult:
+    job: ExportJob
+    success: bool
+    file_name: str = None
+    error: str = None
+    duration: float = 0.0
+    screenshot: str = None
+    submit_started: bool = False
+    extra: dict = field(default_factory=dict)
+
+
+class ExportOrchestrator:
+    """Exécute N exports en parallèle sur UN seul Chromium, un contexte isolé par export"""
+
+    def __init__(self, concurrency: int = None, headless: bool = None, use_session_cache: bool = None,
+                 base_url: str = None, profile: str = None):
+        self.concurrency = concurrency or settings.ORCHESTRATOR_CONCURRENCY
+        self.base_url = base_url or settings.MINDEREST_BASE_URL
+        # Profil "throughput" par défaut (ORCHESTRATOR_PROFILE) : exécution sur serveur, sans fenêtre
+        self.profile = BrowserProfile.from_settings(profile or settings.ORCHESTRATOR_PROFILE, headless=headless)
+        self.headless = self.profile.headless
+        if use_session_cache is None:
+            use_session_cache = settings.SESSION_CACHE_ENABLED
+        self.session_cache = SessionCache() if use_session_cache else None
+        self.route_policy = RoutePolicy.from_settings(self.base_url) if self.profile.block_resources else None
+        self._account_locks: dict[str, asyncio.Lock] = {}
+        self.tracers: list[Tracer] = []
+
+    def _account_lock(self, email: str) -> asyncio.Lock:
+        # Un seul login à la fois par compte : les jobs suivants réutilisent la session sauvegardée
+        return self._account_locks.setdefault((email or "").lower(), asyncio.Lock())
+
+    @asynccontextmanager
+    async def browser(self, expected_jobs: int = 1):
+        """Chromium partagé : bail sur le service navigateur (CDP) ou lancement local ;
+        à la sortie, fermeture/déconnexion et export des traces des jobs exécutés"""
+        lease = None
+        async with async_playwright() as playwright:
+            if settings.BROWSER_SERVICE_URL:
+                lease = await asyncio.to_thread(BrowserLease(jobs=expected_jobs).acquire)
+                browser = await playwright.chromium.connect_over_cdp(lease.cdp_endpoint,
+                                                                     slow_mo=self.profile.slow_mo)
+            else:
+                browser = await playwright.chromium.launch(**self.profile.launch_options())
+            try:
+                yield browser
+            finally:
+                await browser.close()
+                if lease:
+                    await asyncio.to_thread(lease.release)
+                if self.tracers:
+                    Tracer.merged(self.tracers).export()
+                    self.tracers = []
+
+    async def run(self, jobs: list[ExportJob]) -> list[ExportResult]:
+        """Lance tous les jobs (au plus `concurrency` en même temps), résultats dans l'ordre des jobs"""
+        logger.info("="*60)
+        logger.info("ORCHESTRATEUR : %d export(s), concurrence %d", len(jobs), self.concurrency)
+        logger.info("="*60)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with self.browser(expected_jobs=len(jobs)) as browser:
+            results = await asyncio.gather(
+                *(self._run_guarded(browser, semaphore, job, i) for i, job in enumerate(jobs))
+            )
+
+        ok = sum(r.success for r in results)
+        logger.info("ORCHESTRATEUR TERMINE : %d/%d succes", ok, len(results))
+        return list(results)
+
+    async def _run_guarded(self, browser, semaphore, job: ExportJob, index: int) -> ExportResult:
+        async with semaphore:
+            return await self.run_job(browser, job, label=job.label or f"job{index + 1}")
+
+    async def run_job(self, browser, job: ExportJob, label: str = None,
+                      before_submit: Callable[[str], Awaitable[None]] = None) -> ExportResult:
+        """Pipeline complet d'un job dans son propre contexte ; n'échoue jamais (erreur dans le résultat)
+
+        `before_submit(file_name)` est attendu juste avant le clic d'envoi (journal de la file de jobs) ;
+        `ExportResult.submit_started` indique si l'échec est survenu après ce point.
+        """
+        started = time.perf_counter()
+        tracer = Tracer(labels={"job": label})
+        if tracer.enabled:
+            self.tracers.append(tracer)
+        scraper = AsyncMinderestScraper(
+            browser, job.email, job.password, session_cache=self.session_cache, label=label,
+            route_policy=self.route_policy, base_url=self.base_url, tracer=tracer, profile=self.profile,
+        )
+        # Même machine à états et mêmes politiques de reprise que le parcours sync (run_full_process)
+        workflow = AsyncExportWorkflow(scraper, fields=job.fields, file_name=job.file_name,
+                                       date_range=job.date_range, submit=job.submit)
+        submit_started = False
+        try:
+            async with self._account_lock(scraper.email):
+                await scraper.__aenter__()
+                await workflow.run(until=Checkpoint.LOGGED_IN)
+            file_name = await workflow.run(until=Checkpoint.DATES_APPLIED)
+            if job.submit:
+                if before_submit:
+                    await before_submit(file_name)
+                submit_started = True
+                await workflow.run()
+            tracer.incr("runs_total", status="success")
+            extra = {"fields": scraper.field_report.as_dict()}
+            if scraper.route_stats:
+                extra["route_stats"] = scraper.route_stats.as_dict()
+            return ExportResult(job, True, file_name=file_name, duration=time.perf_counter() - started,
+                                submit_started=submit_started, extra=extra)
+        except Exception as e:
+            logger.error("[%s] ERREUR PROCESSUS : %s (dernier checkpoint : %s)", label, e, workflow.checkpoint.name)
+            tracer.incr("runs_total", status="failure")
+            screenshot = await scraper.screenshot() if scraper.page and self.profile.screenshot_on_failure else None
+            return ExportResult(job, False, error=str(e), duration=time.perf_counter() - started,
+                                screenshot=screenshot, submit_started=submit_started)
+        finally:
+            await scraper.__aexit__(None, None, None)
+
+
+def run_exports(jobs: list[ExportJob], concurrency: int = None, headless: bool = None,
+                profile: str = None) -> list[ExportResult]:
+    """Point d'entrée synchrone (scripts, cron)"""
+    return asyncio.run(ExportOrchestrator(concurrency=concurrency, headless=headless, profile=profile).run(jobs))
@@ -0,0 +1,141 @@
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Taille moyenne estimée d'une ressource bloquée (octets) : le corps n'est jamais téléchargé,
+# on ne peut donc que l'estimer pour le compteur "octets économisés"
+ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 60_000,
+    "stylesheet": 30_000,
+    "script": 80_000,
+    "document": 100_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+@dataclass
+class RouteStats:
+    """Compteurs par run : requêtes vues, bloquées, et octets économisés
+
+    Une requête bloquée n'est jamais téléchargée : `bytes_saved_estimate` n'est pas mesuré, c'est la
+    somme des tailles moyennes par type (ESTIMATED_BYTES) ; à lire comme un ordre de grandeur.
+    """
+    requests_total: int = 0
+    requests_blocked: int = 0
+    bytes_saved_estimate: int = 0
+    blocked_by_type: Counter = field(default_factory=Counter)
+
+    def record(self, resource_type: str, blocked: bool):
+        self.requests_total += 1
+        if blocked:
+            self.requests_blocked += 1
+            self.blocked_by_type[resource_type] += 1
+            self.bytes_saved_estimate += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests_total": self.requests_total,
+            "requests_blocked": self.requests_blocked,
+            "bytes_saved_estimate": self.bytes_saved_estimate,
+            "blocked_by_type": dict(self.blocked_by_type),
+        }
+
+    def log_summary(self):
+        logger.info("Requetes bloquees : %d/%d (~%.1f Mo economises, estimation par type) %s",
+                    self.requests_blocked, self.requests_total,
+                    self.bytes_saved_estimate / 1_000_000, dict(self.blocked_by_type))
+
+
+@dataclass
+class RoutePolicy:
+    """Politique context.route : liste d'autorisation prioritaire, puis blocage par type et par URL
+
+    - allow_url_patterns   : regex ; une URL correspondante n'est jamais bloquée
+    - block_resource_types : types Playwright (image, media, font, stylesheet, ...)
+    - block_url_patterns   : regex (analytics, widgets d'onboarding, ...)
+    - block_third_party_frames : documents d'iframe hors domaine Minderest (popup interactive-frame)
+    """
+    block_resource_types: frozenset = frozenset()
+    block_url_patterns: tuple = ()
+    allow_url_patterns: tuple = ()
+    block_third_party_frames: bool = True
+    first_party_host: str = ""
+
+    def __post_init__(self):
+        self._block_re = re.compile("|".join(self.block_url_patterns), re.I) if self.block_url_patterns else None
+        self._allow_re = re.compile("|".join(self.allow_url_patterns), re.I) if self.allow_url_patterns else None
+
+    @classmethod
+    def from_settings(cls, base_url: str = None) -> "RoutePolicy":
+        return cls(
+            block_resource_types=frozenset(settings.BLOCK_RESOURCE_TYPES),
+            block_url_patterns=tuple(settings.BLOCK_URL_PATTERNS),
+            allow_url_patterns=tuple(settings.ALLOW_URL_PATTERNS),
+            block_third_party_frames=settings.BLOCK_THIRD_PARTY_FRAMES,
+            first_party_host=urlparse(base_url or settings.MINDEREST_BASE_URL).hostname or "",
+        )
+
+    def should_block(self, url: str, resource_type: str, is_subframe_document: bool = False) -> bool:
+        if self._allow_re and self._allow_re.search(url):
+            return False
+        if resource_type in self.block_resource_types:
+            return True
+        if self._block_re and self._block_re.search(url):
+            return True
+        if self.block_third_party_frames and is_subframe_document and self.first_party_host:
+            return not self.is_first_party(urlparse(url).hostname or "")
+        return False
+
+    def is_first_party(self, host: str) -> bool:
+        """Hôte Minderest ou sous-domaine (pas un simple suffixe : evilminderest.com est tiers)"""
+        host, first_party = host.lower(), self.first_party_host.lower()
+        return host == first_party or host.endswith("." + first_party)
+
+    def _decide(self, route, stats: RouteStats) -> bool:
+        request = route.request
+        is_subframe_document = False
+        if request.resource_type == "document":
+            try:
+                is_subframe_document = request.frame.parent_frame is not None
+            except Exception:
+                # Frame déjà détachée : on la traite comme une iframe
+                is_subframe_document = True
+        blocked = self.should_block(request.url, request.resource_type, is_subframe_document)
+        stats.record(request.resource_type, blocked)
+        return blocked
+
+    def install(self, context) -> RouteStats:
+        """Installe la politique sur un BrowserContext sync ; retourne les compteurs du run"""
+        stats = RouteStats()
+
+        def handler(route):
+            if self._decide(route, stats):
+                route.abort("blockedbyclient")
+            else:
+                route.continue_()
+
+        context.route("**/*", handler)
+        logger.info("Blocage ressources actif : types=%s, %d motif(s) URL",
+                    sorted(self.block_resource_types), len(self.block_url_patterns))
+        return stats
+
+    async def install_async(self, context) -> RouteStats:
+        """Même chose pour un BrowserContext async"""
+        stats = RouteStats()
+
+        async def handler(route):
+            if self._decide(route, stats):
+                await route.abort("blockedbyclient")
+            else:
+                await route.continue_()
+
+        await context.route("**/*", handler)
+        return stats
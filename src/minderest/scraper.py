@@ -1,10 +1,29 @@
 import os
 import re
+import sys
 from playwright.sync_api import sync_playwright
-from datetime import datetime, timedelta
-from tenacity import retry, stop_after_attempt, wait_exponential, wait_fixed
+from datetime import datetime
 import logging
 from src.config.settings import settings
+from src.minderest.browser import (
+    BrowserProfile,
+    ANTI_DETECTION_SCRIPT,
+    EXPORTS_TITLE_SELECTOR,
+    EXTRA_HTTP_HEADERS,
+    POPUP_FRAME_SELECTOR,
+    REQUEST_BUTTON_SELECTOR,
+    SIGNIN_SELECTOR,
+    SUCCESS_TOAST_SELECTOR,
+    export_file_name,
+)
+from src.minderest.browser_service import BrowserLease
+from src.minderest.calendar import CalendarPicker, DateRange
+from src.minderest.fields import FieldSelectionError, select_fields
+from src.minderest.routing import RoutePolicy
+from src.minderest.session import SessionCache
+from src.minderest.tracing import Tracer, traced
+from src.minderest.watermark import SyncWatermark
+from src.minderest.workflow import ExportWorkflow
 
 logger = logging.getLogger(__name__)
 
@@ -12,81 +31,109 @@ logger = logging.getLogger(__name__)
 class MinderestScraper:
     """Scraper pour Minderest - Gère popup, zoom, et navigation complète"""
     
-    def __init__(self, email: str = None, password: str = None):
+    def __init__(self, email: str = None, password: str = None, use_session_cache: bool = None,
+                 base_url: str = None, headless: bool = None, profile: str = None):
         self.email = email or settings.MINDEREST_EMAIL
         self.password = password or settings.MINDEREST_PASSWORD
+        self.base_url = base_url or settings.MINDEREST_BASE_URL
+        self.profile = BrowserProfile.from_settings(profile, headless=headless)
+        self.headless = self.profile.headless
         self.browser = None
         self.context = None
         self.page = None
+        self.lease = None
+        self._playwright = None
+        if use_session_cache is None:
+            use_session_cache = settings.SESSION_CACHE_ENABLED
+        self.session_cache = SessionCache() if use_session_cache else None
+        self.session_restored = False
+        self.route_policy = RoutePolicy.from_settings(self.base_url) if self.profile.block_resources else None
+        self.route_stats = None
+        self.tracer = Tracer()
+        self.field_report = None
     
     def __enter__(self):
         """Context manager optimisé pour Windows (plein écran + anti-detection)"""
-        logger.info("=== DEMARRAGE NAVIGATEUR PLAYWRIGHT ===")
+        try:
+            return self._open()
+        except BaseException:
+            # __exit__ n'est pas appelé si __enter__ échoue : libérer driver, navigateur et bail ici
+            self.__exit__(*sys.exc_info())
+            raise
+    
+    def _open(self):
+        logger.info("=== DEMARRAGE NAVIGATEUR PLAYWRIGHT (profil %s, headless=%s) ===",
+                    self.profile.name, self.profile.headless)
         
-        playwright = sync_playwright().start()
+        self._playwright = sync_playwright().start()
         
-        # === CORRECTIF ZOOM/DPI WINDOWS (100% garanti) ===
-        self.browser = playwright.chromium.launch(
-            headless=False,                       # Changer à True pour headless (lancé programme sans affichage UI)
-            slow_mo=100,
-            args=[
-                '--start-maximized',              # Plein écran
-                '--force-device-scale-factor=1',  # Force zoom 100%
-                '--high-dpi-support=1',           # Support DPI correct
-                '--disable-dev-shm-usage',        # Évite erreurs mémoire
-                '--no-sandbox',                   # Windows compatibility
-                '--disable-setuid-sandbox',
-                '--disable-blink-features=AutomationControlled',  # Anti-detection
-            ],
-            ignore_default_args=[
-                '--enable-automation',
-                '--disable-default-apps',
-            ]
-        )
+        if settings.BROWSER_SERVICE_URL:
+            # Navigateur chaud partagé : on ne crée qu'un contexte neuf
+            self.lease = BrowserLease().acquire()
+            self.browser = self._playwright.chromium.connect_over_cdp(
+                self.lease.cdp_endpoint, slow_mo=self.profile.slow_mo,
+            )
+        else:
+            self.browser = self._playwright.chromium.launch(**self.profile.launch_options())
         
-        # === CORRECTIF VIEWPORT : Forcer résolution exacte ===
-        self.context = self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},  # FULL HD strict
-            screen={'width': 1920, 'height': 1080},
-            device_scale_factor=1,  # Désactive scaling DPI
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
+        # === SESSION EN CACHE (cookies + localStorage du dernier login) ===
+        storage_state = self.session_cache.load(self.email) if self.session_cache else None
+        self.session_restored = storage_state is not None
+        if self.session_restored:
+            logger.info("Session en cache trouvee : %s", storage_state)
         
-        # === ANTI-DETECTION SUPPLÉMENTAIRE ===
-        self.context.set_extra_http_headers({
-            "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
-            "Accept-Encoding": "gzip, deflate, br",
-        })
+        self.context = self.browser.new_context(**self.profile.context_options(), storage_state=storage_state)
+        self.profile.apply_timeouts(self.context)
+        self.context.set_extra_http_headers(EXTRA_HTTP_HEADERS)
+        # Au niveau du contexte : appliqué aussi aux onglets rouverts par la reprise (workflow, page_closed)
+        self.context.add_init_script(ANTI_DETECTION_SCRIPT)
+        if self.profile.trace:
+            self.context.tracing.start(screenshots=True, snapshots=True, sources=True)
+        if self.route_policy:
+            self.route_stats = self.route_policy.install(self.context)
         
         self.page = self.context.new_page()
         
-        # Désactiver la détection WebDriver
-        self.page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-            window.chrome = {
-                runtime: {}
-            };
-        """)
-        
-        logger.info("Navigateur lancé en plein écran / zoom 100%")
+        logger.info("Navigateur lancé (%dx%d, zoom 100%%)", self.profile.viewport["width"],
+                    self.profile.viewport["height"])
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Ferme le navigateur proprement"""
         logger.info("=== FERMETURE NAVIGATEUR ===")
-        if self.browser:
-            self.browser.close()
+        if self.route_stats:
+            self.route_stats.log_summary()
+            for key in ("requests_total", "requests_blocked", "bytes_saved_estimate"):
+                self.tracer.gauge(f"route_{key}", getattr(self.route_stats, key))
+        if self.page:
+            self.tracer.record_page_metrics(self.page, phase="final")
+        try:
+            if self.profile.trace and self.context:
+                trace_path = self.profile.trace_path(self.email or "run")
+                trace_path.parent.mkdir(parents=True, exist_ok=True)
+                self.context.tracing.stop(path=str(trace_path))
+                logger.info("Trace Playwright : %s (npx playwright show-trace)", trace_path)
+            if self.lease and self.context:
+                self.context.close()
+            if self.browser:
+                # Navigateur lancé : fermeture ; navigateur CDP : simple déconnexion (il reste chaud)
+                self.browser.close()
+        finally:
+            if self.lease:
+                self.lease.release()
+            if self._playwright:
+                self._playwright.stop()  # sinon le driver node Playwright reste en vie
+                self._playwright = None
+            self.tracer.export()
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    @traced("login")
     def login(self):
         """Se connecter avec gestion popup et détection bouton"""
         logger.info("CONNEXION MINDEREST")
         
         # Navigation
         logger.info("  [1] Navigation page login...")
-        self.page.goto(f"{settings.MINDEREST_BASE_URL}/user/login", wait_until='networkidle')
+        self.page.goto(f"{self.base_url}/user/login", wait_until='networkidle')
         
         # Username
         logger.info("  [2] Remplissage username...")
@@ -106,10 +153,7 @@ class MinderestScraper:
         # Sign In (avec timeout plus long et multi-sélecteurs)
         logger.info("  [8] Recherche bouton Sign In...")
         try:
-            signin_btn = self.page.wait_for_selector(
-                'button[type="submit"], button:has-text("Sign in"), button:has-text("Connexion")',
-                timeout=5000
-            )
+            signin_btn = self.page.wait_for_selector(SIGNIN_SELECTOR, timeout=5000)
             signin_btn.click()
             logger.info("  [9] Sign In clique")
         except:
@@ -119,16 +163,52 @@ class MinderestScraper:
         
         # Attendre dashboard
         logger.info("  [10] Attente dashboard...")
-        self.page.wait_for_url(f"{settings.MINDEREST_BASE_URL}/dashboard", timeout=60000)
+        self.page.wait_for_url(f"{self.base_url}/dashboard", timeout=60000)
         logger.info(">>> CONNEXION REUSSIE <<<")
+        self.tracer.record_page_metrics(self.page, phase="login")
+        
+        if self.session_cache:
+            self.session_cache.save(self.email, self.context.storage_state())
+    
+    def is_session_valid(self) -> bool:
+        """Sonde légère : GET /dashboard sans suivre les redirections (pas de rendu de page)"""
+        try:
+            response = self.context.request.get(
+                f"{self.base_url}/dashboard",
+                max_redirects=0,
+                timeout=10000,
+            )
+        except Exception as e:
+            logger.warning("  Sonde session en echec : %s", e)
+            return False
+        
+        location = response.headers.get("location", "")
+        valid = response.ok and "/user/login" not in response.url and "/user/login" not in location
+        logger.info("  Sonde session : HTTP %s -> %s", response.status, "valide" if valid else "expiree")
+        return valid
+    
+    @traced("ensure_logged_in")
+    def ensure_logged_in(self):
+        """Réutilise la session en cache si elle est encore valide, sinon login complet"""
+        if self.session_restored and self.is_session_valid():
+            logger.info(">>> SESSION REUTILISEE (login ignore) <<<")
+            self.tracer.incr("session_reused_total")
+            return
+        
+        if self.session_restored:
+            logger.info("Session en cache refusee, login complet")
+            self.session_cache.invalidate(self.email)
+            self.context.clear_cookies()
+            self.session_restored = False
+        self.login()
     
-    @retry(stop=stop_after_attempt(2), wait=wait_fixed(5000))
+    @traced("navigate_to_exports")
     def navigate_to_exports(self):
         """Navigation avec fermeture popup Custom Exports dans iframe"""
         logger.info("NAVIGATION VERS EXPORTS")
         
         # Aller à la page
-        self.page.goto(f"{settings.MINDEREST_BASE_URL}/exports/historical", wait_until='networkidle')
+        self.page.goto(f"{self.base_url}/exports/historical", wait_until='networkidle')
         
         # === GESTION DU POPUP CUSTOM EXPORTS (Iframe) ===
         logger.info("  Detection popup Custom Exports...")
@@ -136,7 +216,7 @@ class MinderestScraper:
         try:
             # Sélecteur EXACT du popup (depuis codegen)
             # On entre dans l'iframe puis on cherche le bouton Close
-            close_btn = self.page.frame_locator('[data-test-id="interactive-frame"]') \
+            close_btn = self.page.frame_locator(POPUP_FRAME_SELECTOR) \
                                .get_by_role("button", name="Close")
             
             # Vérifier si le bouton existe et est visible
@@ -150,19 +230,27 @@ class MinderestScraper:
             logger.info("  Pas de popup ou erreur : %s", str(e))
         
         # Vérifier qu'on est bien sur la bonne page
-        self.page.wait_for_selector('h1:has-text("Export historique")', timeout=10000)
+        self.page.wait_for_selector(EXPORTS_TITLE_SELECTOR, timeout=10000)
         logger.info("Navigation reussie")
+        self.tracer.record_page_metrics(self.page, phase="exports")
         
     
-    def fill_export_form(self):
+    @traced("fill_export_form")
+    def fill_export_form(self, fields: list[str] = None, file_name: str = None, date_range: DateRange = None):
         """Remplit le formulaire avec sélecteurs robustes + calendrier stable"""
         logger.info("="*60)
         logger.info("REMPLISSAGE FORMULAIRE EXPORT")
         logger.info("="*60)
 
+        file_name = self.set_export_name(file_name)
+        self.select_export_fields(fields)
+        self.select_date_range(date_range)
+        return file_name
+
+    def set_export_name(self, file_name: str = None) -> str:
+        """Nom du fichier + type d'exportation 'Lignes'"""
         # 1. NOM DU FICHIER
-        now = datetime.now()
-        file_name = f"Exports_Minderset_{now:%d-%m-%Y_%Hh%M}s"
+        file_name = file_name or export_file_name(datetime.now())
         logger.info("  [1] Nom : %s", file_name)
 
         name_field = self.page.get_by_role("textbox", name="Entrez un nom")
@@ -174,175 +262,84 @@ class MinderestScraper:
         logger.info("  [2.1] Choix Type d'exportation : Lignes")
         self.page.get_by_role("button", name="Lignes").click()
         logger.info("  [2.2] Type d'exportation 'Lignes' choisi")
+        return file_name
 
-        # 2. LISTE DES CHAMPS (inchangé)
+    def select_export_fields(self, fields: list[str] = None):
+        """Ouvre la liste des champs, coche les champs demandés, referme la liste"""
+        # 2. LISTE DES CHAMPS
         logger.info("  [3] Ouverture liste champs...")
         list_opener = self.page.get_by_text("items selected")
         list_opener.wait_for(state='visible', timeout=10_000)
         list_opener.click()
         self.page.wait_for_selector(".vue-recycle-scroller__item-view", timeout=5_000)
-        self.page.wait_for_timeout(500)
 
-        field_selectors = {
-            "historical_cli_min_price": "#historical_cli_min_price",
-            "historical_cli_max_price": "#historical_cli_max_price",
-            "historical_cli_avg_price": "#historical_cli_avg_price",
-            "historical_cli_avg_stock": "#historical_cli_avg_stock",
-            "cli_category_level_3": "#cli_category_level_3",
-            "cli_category_level_4": "#cli_category_level_4",
-            "historical_cli_offer": "#historical_cli_offer",
-            "historical_cli_stock": "#historical_cli_stock",
-            "historical_comp_offer": "#historical_comp_offer",
-            "historical_comp_stock": "#historical_comp_stock",
-            "historical_cli_price": "#historical_cli_price",
-            "historical_cli_cost": "#historical_cli_cost",
-            "historical_comp_avg_stock": "#historical_comp_avg_stock",
-            "my_price_before_offer": 'div.filter:has-text("My Price before offer")',
-            "my_stock": 'div.filter:has-text("My Stock")',
-            "stock": 'div.filter:has-text("Stock")',
-        }
-        for field_name in settings.EXPORT_FIELDS:
-            try:
-                sel = field_selectors.get(field_name, f"#{field_name}")
-                el  = self.page.locator(sel).first
-                if not el.is_visible(timeout=1_000):
-                    logger.warning("    [INVISIBLE] %s", field_name)
-                    continue
-                if el.is_disabled():
-                    logger.info("    [GRISÉ] %s (ignoré)", field_name)
-                    continue
-                try:
-                    if el.is_checked():
-                        logger.debug("    [DÉJÀ COCHÉ] %s", field_name)
-                        continue
-                except Exception:
-                    pass
-                el.check()
-                logger.info("    [✓] %s coché", field_name)
-                if field_name in ["my_price_before_offer", "my_stock", "stock"]:
-                    self.page.press('body', 'ArrowDown')
-            except Exception as e:
-                logger.warning("    [✗] %s : %s", field_name, str(e))
+        # Un seul aller-retour : état de tous les champs + cochage + défilement de la liste virtuelle
+        fields = list(fields or settings.EXPORT_FIELDS)
+        with self.tracer.span("select_fields", requested=len(fields)) as span:
+            self.field_report = select_fields(self.page, fields)
+            span.set(**self.field_report.results, scrolls=self.field_report.scrolls)
+        self.field_report.log()
 
         self.page.keyboard.press("Escape")
         logger.info("  [7] Liste fermée")
+        if settings.FIELDS_STRICT and not self.field_report.complete:
+            raise FieldSelectionError(self.field_report)
 
-        # === 6. SÉLECTION DES DATES (codegen exact : 11 prev + 11 next) ===
-        logger.info("  [8] Sélection période (11 mois glissants exacts)")
-
-        today      = datetime.now()
-        start_date = today - timedelta(days=365)   # même jour, -1 an
-        end_date   = today - timedelta(days=1)     # hier
-
-        DAY_START  = today.day        # 25 par exemple
-        DAY_END    = end_date.day     # 24
-
-        # 1. Ouvrir le calendrier
-        self.page.locator("#export-historical-calendar").click()
-        self.page.wait_for_selector(".prev > span", timeout=5_000)
-
-        # 2. REVENIR de 11 mois (prev)
-        for _ in range(11):
-            self.page.locator(".prev > span").click()
-            self.page.wait_for_timeout(150)
-
-        # 3. Cliquer sur le jour d’aujourd’hui (dans le passé)
-        self.page.get_by_role("cell", name=str(DAY_START)).first.click()
-
-        # 4. AVANCER de 11 mois (next)
-        for _ in range(11):
-            self.page.locator(".next > span").click()
-            self.page.wait_for_timeout(150)
-
-        # 5. Cliquer sur le jour d’hier
-        self.page.get_by_role("cell", name=str(DAY_END)).nth(1).click()
-
-        # 6. Appliquer
-        self.page.get_by_role("button", name="Appliquer").click()
-        logger.info("  [9] Dates sélectionnées (%s → %s)",
-                    start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
-
-        return file_name
-    
-    def _navigate_to_month(self, target: datetime):
-        """Navigue mois par mois jusqu’à afficher le mois cible."""
-        month_abbr = {
-            1: ("janv", "jan"), 2: ("févr", "feb"), 3: ("mars", "mar"),
-            4: ("avr", "apr"),   5: ("mai", "may"), 6: ("juin", "jun"),
-            7: ("juil", "jul"),  8: ("août", "aug"), 9: ("sept", "sep"),
-            10: ("oct", "oct"), 11: ("nov", "nov"), 12: ("déc", "dec"),
-        }
-        tgt = month_abbr[target.month]
-
-        for _ in range(24):  # 24 mois max
-            # ---- mois affiché (header) ----
-            # chez Minderest le titre est : <div class="calendar-title">nov. 2025</div>
-            hdr = self.page.locator('.calendar-title, .datepicker-title').first
-            if hdr.is_visible(timeout=1_000):
-                txt = hdr.text_content().lower()
-                if any(m in txt for m in tgt):
-                    return  # on est arrivé
-
-            # ---- clic sur la bonne flèche ----
-            current_num = self._month_number(hdr.text_content())
-            if current_num and current_num > target.month:
-                self.page.locator(".prev > span").click()
-            else:
-                self.page.locator(".next > span").click()
-            self.page.wait_for_timeout(300)
-
-        logger.warning("Impossible d'atteindre le mois %s", tgt[0])
-
-    @staticmethod
-    def _month_number(text: str) -> int | None:
-        mapping = {
-            "janv": 1, "jan": 1, "févr": 2, "feb": 2, "mars": 3, "mar": 3,
-            "avr": 4, "apr": 4, "mai": 5, "may": 5, "juin": 6, "jun": 6,
-            "juil": 7, "jul": 7, "août": 8, "aug": 8, "sept": 9, "sep": 9,
-            "oct": 10, "nov": 11, "déc": 12, "dec": 12,
-        }
-        for abbr, num in mapping.items():
-            if abbr in text.lower():
-                return num
-        return None
+    def select_date_range(self, date_range: DateRange = None) -> DateRange:
+        # === 6. SÉLECTION DES DATES (navigation directe au mois, attentes sur le DOM) ===
+        date_range = date_range or DateRange.last_days()
+        logger.info("  [8] Sélection période %s (%d jours)", date_range, date_range.days)
+        CalendarPicker(self.page, self.tracer).select(date_range)
+        logger.info("  [9] Dates sélectionnées (%s)", date_range)
+        return date_range
     
+    @traced("submit_request")
     def submit_request(self):
         """Soumettre la requête d'export"""
         logger.info("SOUMISSION REQUÊTE")
         
-        request_btn = self.page.locator('button:has-text("Requête"), button:has-text("Exporter")').first
+        request_btn = self.page.locator(REQUEST_BUTTON_SELECTOR).first
         request_btn.wait_for(state='visible')
         request_btn.click()
         
-        self.page.wait_for_selector('.alert-success, .toast-success', timeout=30000)
+        self.page.wait_for_selector(SUCCESS_TOAST_SELECTOR, timeout=30000)
         logger.info("  ✅ Requête validée")
         
     
-    def run_full_process(self):
-        """Execute le processus complet"""
+    def run_full_process(self, submit: bool = False, fields: list[str] = None, date_range: DateRange = None):
+        """Execute le processus complet (machine à états avec reprise au dernier checkpoint)"""
         logger.info("="*60)
         logger.info("DEBUT PROCESSUS COMPLET MINDEREST")
         logger.info("="*60)
         
+        # Sans période explicite : seule la période absente de DATA_HISTORIQUE est demandée
+        watermark, plan = None, None
+        if date_range is None and settings.SYNC_ENABLED:
+            watermark = SyncWatermark()
+            plan = watermark.plan(self.email)
+            logger.info("Synchro : %s", plan)
+            if plan.date_range is None:
+                return True, None
+            date_range = plan.date_range
+        
+        # submit=False par défaut : passer submit=True pour envoyer réellement la requête
+        workflow = ExportWorkflow(self, fields=fields, date_range=date_range, submit=submit)
         try:
-            self.login()
-            self.navigate_to_exports()
-            file_name = self.fill_export_form()
-            # self.submit_request()         décommenter la ligne suivante pour envoyer la requête
+            file_name = workflow.run()
+            if submit and watermark:
+                watermark.record_submitted(self.email, file_name, date_range, plan.full)
             
             logger.info("="*60)
             logger.info("PROCESSUS TERMINE : %s", file_name)
             logger.info("="*60)
-            
-            # Attendre 20 seconds avant de fermer la page pour s'assurer que tout est bien pris en compte
-            logger.info("Attente 60 s avant fermeture du navigateur...")
-            import time
-            time.sleep(20)
+            self.tracer.incr("runs_total", status="success")
             return True, file_name
         
         except Exception as e:
-            logger.error("ERREUR PROCESSUS : %s", e)
-            screenshot_path = f"logs/error_process_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-            self.page.screenshot(path=screenshot_path)
-            logger.error("Screenshot : %s", screenshot_path)
-            return False, str(e)
\ No newline at end of file
+            logger.error("ERREUR PROCESSUS : %s (dernier checkpoint : %s)", e, workflow.checkpoint.name)
+            self.tracer.incr("runs_total", status="failure")
+            if self.profile.screenshot_on_failure:
+                screenshot_path = f"logs/error_process_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+                self.page.screenshot(path=screenshot_path)
+                logger.error("Screenshot : %s", screenshot_path)
+            return False, str(e)
@@ -0,0 +1,54 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionCache:
+    """Cache disque du storage_state Playwright (cookies + localStorage), un fichier par compte"""
+
+    def __init__(self, directory: str = None, max_age_hours: float = None):
+        self.directory = Path(directory or settings.SESSION_DIR)
+        self.max_age_hours = settings.SESSION_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+
+    def path_for(self, account: str) -> Path:
+        """Chemin du fichier de session (email haché : pas d'identifiant en clair sur disque)"""
+        key = hashlib.sha256((account or "").strip().lower().encode("utf-8")).hexdigest()[:16]
+        return self.directory / f"storage_state_{key}.json"
+
+    def load(self, account: str) -> str | None:
+        """Retourne le chemin du storage_state s'il existe et n'est pas expiré, sinon None"""
+        path = self.path_for(account)
+        if not path.exists():
+            return None
+
+        age_hours = (time.time() - path.stat().st_mtime) / 3600
+        if self.max_age_hours and age_hours > self.max_age_hours:
+            logger.info("  Session en cache expiree (%.1f h), suppression", age_hours)
+            self.invalidate(account)
+            return None
+        return str(path)
+
+    def save(self, account: str, state: dict):
+        """Écrit le storage_state de façon atomique (fichier temporaire puis rename)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(account)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+        logger.info("  Session sauvegardee : %s", path)
+
+    def invalidate(self, account: str):
+        """Supprime la session en cache (ex : session refusée par le serveur)"""
+        try:
+            self.path_for(account).unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,262 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PROM_PREFIX = "minderest"
+# Noms des processus Chromium lancés par le driver Playwright (navigateur, renderers, GPU)
+CHROMIUM_PROCESS_NAMES = ("chrom", "headless_shell")
+
+# Timing de navigation + volume réseau depuis le chargement de la page (Resource Timing API)
+PAGE_METRICS_JS = """() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const resources = performance.getEntriesByType('resource');
+    return {
+        dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd : null,
+        load_ms: nav ? nav.loadEventEnd : null,
+        document_bytes: nav ? nav.transferSize : 0,
+        resource_count: resources.length,
+        resource_bytes: resources.reduce((total, r) => total + (r.transferSize || 0), 0),
+    };
+}"""
+
+
+class _NullSpan:
+    """Span inactif : aucune allocation ni horloge quand le tracing est désactivé"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "parent", "start", "duration", "status")
+
+    def __init__(self, tracer, name: str, attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.start = 0.0
+        self.duration = 0.0
+        self.status = "ok"
+
+    def __enter__(self):
+        self.parent = self.tracer._stack[-1].name if self.tracer._stack else None
+        self.tracer._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter() - self.start
+        self.tracer._stack.pop()
+        if exc_type is not None:
+            self.status = "error"
+            self.attrs["error"] = f"{exc_type.__name__}: {exc_val}"
+        self.tracer._finish(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Spans par étape/sous-étape, compteurs et jauges d'un run ; export JSON lines + textfile Prometheus
+
+    Désactivé (TRACE_ENABLED=false) : span() renvoie NULL_SPAN et les compteurs sont ignorés.
+    """
+
+    def __init__(self, enabled: bool = None, run_id: str = None, labels: dict = None):
+        self.enabled = settings.TRACE_ENABLED if enabled is None else enabled
+        self.run_id = run_id or f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        self.labels = labels or {}
+        self.spans: list[dict] = []
+        self.counters: dict[tuple, float] = defaultdict(float)
+        self.gauges: dict[tuple, float] = {}
+        self._stack: list[Span] = []
+        self._wall_start = time.time() - time.perf_counter()
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def _finish(self, span: Span):
+        self.spans.append({
+            "run_id": self.run_id,
+            "name": span.name,
+            "parent": span.parent,
+            "start": round(self._wall_start + span.start, 6),
+            "duration_s": round(span.duration, 6),
+            "status": span.status,
+            "labels": self.labels,
+            **span.attrs,
+        })
+
+    def incr(self, name: str, value: float = 1, **labels):
+        if self.enabled:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def gauge(self, name: str, value: float, **labels):
+        if self.enabled and value is not None:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def gauge_max(self, name: str, value: float, **labels):
+        """Jauge qui ne garde que le maximum observé (pics mémoire)"""
+        if self.enabled and value is not None:
+            key = (name, tuple(sorted(labels.items())))
+            self.gauges[key] = max(value, self.gauges.get(key, value))
+
+    @classmethod
+    def merged(cls, tracers: list["Tracer"], run_id: str = None) -> "Tracer":
+        """Fusionne les tracers de plusieurs jobs (un par contexte async) en un seul export ;
+        les labels de chaque tracer (ex : job) sont reportés sur ses compteurs et jauges."""
+        merged = cls(enabled=True, run_id=run_id)
+        for tracer in tracers:
+            if not tracer.enabled:
+                continue
+            extra = tuple(tracer.labels.items())
+            merged.spans.extend(tracer.spans)
+            for (name, labels), value in tracer.counters.items():
+                merged.counters[(name, tuple(sorted(labels + extra)))] += value
+            for (name, labels), value in tracer.gauges.items():
+                merged.gauges[(name, tuple(sorted(labels + extra)))] = value
+        return merged
+
+    # ---- collecte navigateur ----
+    def record_page_metrics(self, page, phase: str):
+        """Timing de navigation, volume réseau et heap JS de la page (sync)"""
+        if not self.enabled:
+            return
+        try:
+            metrics = page.evaluate(PAGE_METRICS_JS)
+            heap = page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : null")
+        except Exception as e:
+            logger.debug("Metriques page indisponibles : %s", e)
+            return
+        self._store_page_metrics(metrics, heap, phase)
+
+    async def record_page_metrics_async(self, page, phase: str):
+        if not self.enabled:
+            return
+        try:
+            metrics = await page.evaluate(PAGE_METRICS_JS)
+            heap = await page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : null")
+        except Exception as e:
+            logger.debug("Metriques page indisponibles : %s", e)
+            return
+        self._store_page_metrics(metrics, heap, phase)
+
+    def _store_page_metrics(self, metrics: dict, heap, phase: str):
+        for key, value in metrics.items():
+            self.gauge(f"page_{key}", value, phase=phase)
+        self.gauge_max("browser_js_heap_peak_bytes", heap)
+        self.record_browser_memory()
+
+    def record_browser_memory(self):
+        """Pic de mémoire résidente de l'arbre de processus Chromium lancé par ce processus (le heap JS
+        de la page n'en est qu'une partie) ; navigateur distant (service CDP) : voir GET /status"""
+        if not self.enabled:
+            return
+        from src.minderest.browser_service import process_tree_rss_mb
+
+        rss_mb = process_tree_rss_mb(os.getpid(), CHROMIUM_PROCESS_NAMES)
+        if rss_mb:
+            self.gauge_max("browser_rss_peak_bytes", int(rss_mb * 1_048_576))
+
+    # ---- export ----
+    def export(self, directory: str = None, prom_file: str = None):
+        """Écrit les spans (JSON lines, un fichier par run) et le textfile Prometheus (écrasé)"""
+        if not self.enabled:
+            return
+        directory = Path(directory or settings.TRACE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        jsonl_path = directory / f"run_{self.run_id}.jsonl"
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for span in self.spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+        prom_path = Path(prom_file or settings.TRACE_PROM_FILE)
+        prom_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = prom_path.with_suffix(".tmp")
+        tmp_path.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp_path, prom_path)  # node_exporter ne doit jamais lire un fichier partiel
+        logger.info("Traces : %s (%d spans), metriques : %s", jsonl_path, len(self.spans), prom_path)
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        def emit(name, kind, samples):
+            metric = f"{PROM_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in samples:
+                all_labels = {**self.labels, **dict(labels)}
+                rendered = ",".join(f'{k}="{escape_label(v)}"' for k, v in sorted(all_labels.items()))
+                lines.append(f"{metric}{{{rendered}}} {value}" if rendered else f"{metric} {value}")
+
+        # Durée des étapes de premier niveau (dernière tentative)
+        steps = {}
+        for span in self.spans:
+            if span["parent"] is None:
+                key = (("step", span["name"]),) + tuple(sorted(span["labels"].items()))
+                steps[key] = span["duration_s"]
+        if steps:
+            emit("step_duration_seconds", "gauge", steps.items())
+        emit("run_timestamp_seconds", "gauge", [((), round(time.time(), 3))])
+
+        by_name = defaultdict(list)
+        for (name, labels), value in self.counters.items():
+            by_name[name].append((labels, value))
+        for name, samples in sorted(by_name.items()):
+            emit(name, "counter", samples)
+
+        by_name = defaultdict(list)
+        for (name, labels), value in self.gauges.items():
+            by_name[name].append((labels, value))
+        for name, samples in sorted(by_name.items()):
+            emit(name, "gauge", samples)
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value) -> str:
+    """Valeur de label au format texte Prometheus (antislash, guillemet et saut de ligne échappés)"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def traced(name: str):
+    """Décorateur de méthode : span `name` autour de chaque appel (self.tracer), sync ou async"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(self, *args, **kwargs):
+                with self.tracer.span(name):
+                    return await fn(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
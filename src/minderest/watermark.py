@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from src.config.settings import settings
+from src.minderest.calendar import DateRange
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_FILE = "_watermark.json"
+# Exports déjà archivés (avant le suivi du watermark) : exports complets, couverts jusqu'à la veille
+LEGACY_EXPORT_RE = re.compile(r"Exports_Minderset_(\d{2}-\d{2}-\d{4})_")
+MAX_PENDING = 50
+
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class SyncPlan:
+    """Période à demander : complète (rafraîchissement) ou delta depuis le watermark ; None = déjà à jour"""
+    date_range: DateRange | None
+    full: bool
+    reason: str
+
+    def __str__(self):
+        kind = "complet" if self.full else "delta"
+        return f"{kind} {self.date_range} ({self.reason})" if self.date_range else f"a jour ({self.reason})"
+
+
+class SyncWatermark:
+    """Watermark par compte sur les données présentes dans DATA_HISTORIQUE
+
+    - covered_until : dernier jour dont les données sont stockées (sans trou depuis le dernier export complet)
+    - last_full_refresh : date du dernier export complet, pour rattraper périodiquement les corrections tardives
+    - pending : exports soumis mais pas encore arrivés ; promus en « couverts » quand un fichier à leur
+      nom apparaît dans DATA_HISTORIQUE ou DATA_INPUT (pièce jointe téléchargée), ou retirés par
+      mark_stored quand l'ingestion dans le dataset Parquet couvre leur période
+    """
+
+    def __init__(self, directory: str = None, full_refresh_days: int = None, overlap_days: int = None,
+                 input_dir: str = None):
+        self.directory = Path(directory or settings.DATA_HISTORIQUE)
+        self.input_dir = Path(input_dir or settings.DATA_INPUT)
+        self.path = self.directory / WATERMARK_FILE
+        self.full_refresh_days = (settings.SYNC_FULL_REFRESH_DAYS if full_refresh_days is None
+                                  else full_refresh_days)
+        self.overlap_days = settings.SYNC_OVERLAP_DAYS if overlap_days is None else overlap_days
+
+    # ---- lecture / écriture ----
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"accounts": {}}
+
+    def _write(self, data: dict):
+        """Écriture atomique (fichier temporaire puis rename)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _entry(self, data: dict, account: str) -> dict:
+        key = (account or settings.MINDEREST_EMAIL or "").strip().lower()
+        entry = data["accounts"].get(key)
+        if entry is None:
+            entry = data["accounts"][key] = self._bootstrap(key)
+        return entry
+
+    def _bootstrap(self, account: str) -> dict:
+        """Premier passage : déduit le watermark des exports déjà archivés (compte principal uniquement)"""
+        entry = {"covered_until": None, "last_full_refresh": None, "pending": []}
+        if account != (settings.MINDEREST_EMAIL or "").strip().lower() or not self.directory.exists():
+            return entry
+        export_dates = []
+        for path in self.directory.iterdir():
+            match = LEGACY_EXPORT_RE.search(path.name)
+            if match:
+                export_dates.append(datetime.strptime(match.group(1), "%d-%m-%Y").date())
+        if export_dates:
+            latest = max(export_dates)
+            entry["covered_until"] = (latest - timedelta(days=1)).isoformat()
+            entry["last_full_refresh"] = latest.isoformat()
+            logger.info("Watermark initialise depuis %d export(s) archive(s) : couvert jusqu'au %s",
+                        len(export_dates), entry["covered_until"])
+        return entry
+
+    def _stored_names(self) -> set[str]:
+        """Fichiers arrivés : archivés (DATA_HISTORIQUE) ou téléchargés depuis le mail (DATA_INPUT)"""
+        names = set()
+        for directory in (self.directory, self.input_dir):
+            if directory.exists():
+                names.update(path.stem for path in directory.iterdir()
+                             if path.is_file() and path.name != WATERMARK_FILE)
+        return names
+
+    def _promote_arrived(self, entry: dict):
+        """Les exports en attente dont le fichier est arrivé font avancer le watermark"""
+        if not entry["pending"]:
+            return
+        stored = self._stored_names()
+        still_pending = []
+        for item in sorted(entry["pending"], key=lambda p: p["start"]):
+            if any(name.startswith(item["file_name"]) for name in stored):
+                self._advance(entry, DateRange(date.fromisoformat(item["start"]), date.fromisoformat(item["end"])),
+                              item["full"])
+            else:
+                still_pending.append(item)
+        entry["pending"] = still_pending
+
+    @staticmethod
+    def _advance(entry: dict, date_range: DateRange, full: bool):
+        covered = date.fromisoformat(entry["covered_until"]) if entry["covered_until"] else None
+        if full:
+            entry["last_full_refresh"] = (date_range.end + timedelta(days=1)).isoformat()
+            entry["covered_until"] = max(date_range.end, covered or date_range.end).isoformat()
+        elif covered is not None and date_range.start <= covered + timedelta(days=1):
+            entry["covered_until"] = max(date_range.end, covered).isoformat()
+        else:
+            # Delta sans continuité avec l'existant : ne pas masquer le trou
+            logger.warning("Delta %s non contigu au watermark (%s), watermark inchange", date_range, covered)
+
+    # ---- API ----
+    def covered_until(self, account: str = None) -> date | None:
+        with _lock:
+            data = self._read()
+            entry = self._entry(data, account)
+            self._promote_arrived(entry)
+            self._write(data)
+        return date.fromisoformat(entry["covered_until"]) if entry["covered_until"] else None
+
+    def plan(self, account: str = None, today: date = None) -> SyncPlan:
+        """Période à exporter pour ce compte d'après ce qui est déjà stocké"""
+        today = today or date.today()
+        yesterday = today - timedelta(days=1)
+        with _lock:
+            data = self._read()
+            entry = self._entry(data, account)
+            self._promote_arrived(entry)
+            self._write(data)
+
+        full_range = DateRange.last_days(today=today)
+        if not entry["covered_until"]:
+            return SyncPlan(full_range, True, "aucune donnee stockee")
+        last_full = date.fromisoformat(entry["last_full_refresh"]) if entry["last_full_refresh"] else None
+        if self.full_refresh_days and (last_full is None or (today - last_full).days >= self.full_refresh_days):
+            return SyncPlan(full_range, True, f"rafraichissement complet (dernier : {last_full})")
+
+        covered = date.fromisoformat(entry["covered_until"])
+        if covered >= yesterday:
+            return SyncPlan(None, False, f"couvert jusqu'au {covered}")
+        # Fenêtre de recouvrement : quelques jours déjà stockés sont redemandés (corrections récentes)
+        start = max(covered + timedelta(days=1) - timedelta(days=self.overlap_days), full_range.start)
+        return SyncPlan(DateRange(start, yesterday), False, f"couvert jusqu'au {covered}")
+
+    def record_submitted(self, account: str, file_name: str, date_range: DateRange, full: bool):
+        """Export soumis : en attente jusqu'à son arrivée (fichier ou ingestion)"""
+        with _lock:
+            data = self._read()
+            entry = self._entry(data, account)
+            entry["pending"] = [p for p in entry["pending"] if p["file_name"] != file_name][-(MAX_PENDING - 1):]
+            entry["pending"].append({
+                "file_name": file_name,
+                "start": date_range.start.isoformat(),
+                "end": date_range.end.isoformat(),
+                "full": full,
+                "submitted_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            self._write(data)
+
+    def mark_stored(self, account: str, date_range: DateRange, full: bool = False):
+        """Données effectivement stockées pour cette période (appelé par l'ingestion) ; les exports en
+        attente dont la période est couverte ne sont plus attendus"""
+        with _lock:
+            data = self._read()
+            entry = self._entry(data, account)
+            self._advance(entry, date_range, full)
+            entry["pending"] = [
+                p for p in entry["pending"]
+                if not (date_range.start <= date.fromisoformat(p["start"])
+                        and date.fromisoformat(p["end"]) <= date_range.end)
+            ]
+            self._write(data)
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from enum import IntEnum
+from typing import Callable
+
+from playwright.sync_api import Error as PlaywrightError
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from src.config.settings import settings
+from src.minderest.browser import EXPORTS_TITLE_SELECTOR, export_file_name
+from src.minderest.calendar import CALENDAR_OPENER_SELECTOR, DateRange
+from src.minderest.fields import FieldSelectionError
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint(IntEnum):
+    """Étapes franchies, dans l'ordre ; la reprise repart de la dernière étape confirmée"""
+    START = 0
+    LOGGED_IN = 1
+    ON_EXPORTS = 2
+    NAME_SET = 3
+    FIELDS_SELECTED = 4
+    DATES_APPLIED = 5
+    SUBMITTED = 6
+
+
+@dataclass(frozen=True)
+class BackoffPolicy:
+    base: float
+    maximum: float
+    reset_to: Checkpoint | None = None   # None : reprise d'après l'état détecté de la page
+
+    def delay(self, attempt: int) -> float:
+        return min(self.maximum, self.base * 2 ** (attempt - 1))
+
+
+# Attente selon la nature de l'échec (et non un délai unique pour tout)
+FAILURE_POLICIES = {
+    "auth": BackoffPolicy(0, 0, reset_to=Checkpoint.START),   # redirigé vers le login : se reconnecter
+    "page_closed": BackoffPolicy(0, 0),                        # onglet planté : rouvrir et détecter
+    "selection": BackoffPolicy(1, 3),                          # champ non coché (liste pas encore rendue)
+    "timeout": BackoffPolicy(2, 10),                           # sélecteur ou page lents
+    "network": BackoffPolicy(5, 30),                           # net::ERR_*, serveur indisponible
+    "unknown": BackoffPolicy(3, 15),
+}
+
+
+class ExportWorkflow:
+    """Parcours d'export comme machine à états avec checkpoints (API sync, MinderestScraper ;
+    AsyncExportWorkflow pour l'orchestrateur)
+
+    Chaque étape n'est rejouée qu'elle-même : un sélecteur instable dans les dates ne refait ni le
+    login ni la sélection des champs. Après un échec, l'état réel de la page est détecté pour ne
+    pas repartir au-delà de ce qui est encore valide (formulaire réinitialisé, session expirée...).
+    L'envoi (SUBMITTED) n'est jamais rejoué : un clic déjà parti ne doit pas produire un doublon.
+    """
+
+    def __init__(self, scraper, fields: list[str] = None, file_name: str = None,
+                 date_range: DateRange = None, submit: bool = True, max_attempts: int = None):
+        self.scraper = scraper
+        self.fields = list(fields or settings.EXPORT_FIELDS)
+        self.file_name = file_name or export_file_name(datetime.now())
+        self.date_range = date_range or DateRange.last_days()
+        self.target = Checkpoint.SUBMITTED if submit else Checkpoint.DATES_APPLIED
+        self.max_attempts = max_attempts or settings.WORKFLOW_MAX_ATTEMPTS
+        self.checkpoint = Checkpoint.START
+        self.attempts: dict[Checkpoint, int] = {}
+        self.failures: list[tuple[str, str, str]] = []
+
+    @property
+    def steps(self) -> dict[Checkpoint, tuple[str, Callable[[], None], int]]:
+        """checkpoint courant -> (nom, action menant au checkpoint suivant, tentatives max)"""
+        s = self.scraper
+        return {
+            Checkpoint.START: ("login", s.ensure_logged_in, self.max_attempts),
+            Checkpoint.LOGGED_IN: ("navigate_to_exports", s.navigate_to_exports, self.max_attempts),
+            Checkpoint.ON_EXPORTS: ("set_export_name", lambda: s.set_export_name(self.file_name), self.max_attempts),
+            Checkpoint.NAME_SET: ("select_export_fields", lambda: s.select_export_fields(self.fields),
+                                  self.max_attempts),
+            Checkpoint.FIELDS_SELECTED: ("select_date_range", lambda: s.select_date_range(self.date_range),
+                                         self.max_attempts),
+            Checkpoint.DATES_APPLIED: ("submit_request", s.submit_request, 1),
+        }
+
+    def run(self, until: Checkpoint = None) -> str:
+        """Joue les étapes jusqu'à `until` (défaut : la cible) ; relançable pour continuer plus loin"""
+        target = min(until, self.target) if until is not None else self.target
+        while self.checkpoint < target:
+            current = self.checkpoint
+            name, action, max_attempts = self.steps[current]
+            try:
+                with self.scraper.tracer.span(f"workflow.{name}", checkpoint=current.name):
+                    action()
+            except Exception as e:
+                kind = self._on_failure(name, max_attempts, e)
+                self._recover(name, kind, self.attempts[current], e)
+                continue
+            self._advance(current)
+        return self.file_name
+
+    def _on_failure(self, step: str, max_attempts: int, error: Exception) -> str:
+        """Compte l'échec et le classe ; relève l'erreur si l'étape a épuisé ses tentatives"""
+        current = self.checkpoint
+        self.attempts[current] = self.attempts.get(current, 0) + 1
+        kind = self.classify(error)
+        self.failures.append((step, kind, str(error)))
+        if self.attempts[current] >= max_attempts:
+            logger.error("Etape %s abandonnee apres %d essai(s) (%s)", step, self.attempts[current], kind)
+            raise error
+        return kind
+
+    def _advance(self, current: Checkpoint):
+        self.checkpoint = Checkpoint(current + 1)
+        logger.info("  Checkpoint : %s", self.checkpoint.name)
+
+    def _recover(self, step: str, kind: str, attempt: int, error: Exception):
+        delay = self._backoff(step, kind, attempt, error)
+        if delay:
+            time.sleep(delay)
+        if kind == "page_closed":
+            self.scraper.page = self.scraper.context.new_page()
+        reset_to = FAILURE_POLICIES[kind].reset_to
+        self._resume(kind, reset_to if reset_to is not None else self.detect_state())
+
+    def _backoff(self, step: str, kind: str, attempt: int, error: Exception) -> float:
+        delay = FAILURE_POLICIES[kind].delay(attempt)
+        logger.warning("Echec %s (%s, essai %d) : %s -> reprise dans %.0fs", step, kind, attempt, error, delay)
+        self.scraper.tracer.incr("retries_total", step=step, reason=kind)
+        return delay
+
+    def _resume(self, kind: str, state: Checkpoint):
+        """Repart de `state` sans jamais dépasser le dernier checkpoint confirmé"""
+        if kind == "auth" and self.scraper.session_cache:
+            self.scraper.session_cache.invalidate(self.scraper.email)
+            self.scraper.session_restored = False
+
+        resumed = min(self.checkpoint, state)
+        if resumed != self.checkpoint:
+            logger.info("  Retour au checkpoint %s (etait %s)", resumed.name, self.checkpoint.name)
+        self.checkpoint = resumed
+
+    def classify(self, error: Exception) -> str:
+        try:
+            if "/user/login" in self.scraper.page.url and self.checkpoint >= Checkpoint.LOGGED_IN:
+                return "auth"
+        except Exception:
+            return "page_closed"
+        if isinstance(error, FieldSelectionError):
+            return "selection"
+        if isinstance(error, PlaywrightTimeoutError):
+            return "timeout"
+        message = str(error)
+        if isinstance(error, PlaywrightError):
+            if "Target closed" in message or "has been closed" in message or "crashed" in message:
+                return "page_closed"
+            if "net::ERR_" in message or "NS_ERROR" in message:
+                return "network"
+        return "unknown"
+
+    def detect_state(self) -> Checkpoint:
+        """Étape réellement atteinte d'après la page (jamais au-delà de ce qu'on peut vérifier)"""
+        page = self.scraper.page
+        try:
+            url = page.url
+            if url in ("", "about:blank") or "/user/login" in url:
+                return Checkpoint.START
+            if "/exports/historical" not in url or not page.locator(EXPORTS_TITLE_SELECTOR).is_visible():
+                return Checkpoint.LOGGED_IN
+
+            name_field = page.get_by_role("textbox", name="Entrez un nom")
+            if not name_field.is_visible() or name_field.input_value(timeout=2_000) != self.file_name:
+                return Checkpoint.ON_EXPORTS
+            if self.checkpoint < Checkpoint.FIELDS_SELECTED:
+                return Checkpoint.NAME_SET
+
+            start = self.date_range.start.strftime(settings.CALENDAR_INPUT_FORMAT)
+            calendar_value = page.locator(f"input{CALENDAR_OPENER_SELECTOR}, {CALENDAR_OPENER_SELECTOR} input").first.input_value(timeout=2_000)
+            if start in calendar_value:
+                return Checkpoint.DATES_APPLIED
+            return Checkpoint.FIELDS_SELECTED
+        except PlaywrightError as e:
+            logger.info("  Detection d'etat incomplete (%s), reprise prudente", e)
+            return Checkpoint.ON_EXPORTS if self.checkpoint >= Checkpoint.ON_EXPORTS else Checkpoint.START
+
+
+class AsyncExportWorkflow(ExportWorkflow):
+    """Même machine à états pour AsyncMinderestScraper (orchestrateur) : mêmes étapes, mêmes
+    politiques de reprise ; seules l'exécution des étapes, l'attente et la détection sont asynchrones"""
+
+    async def run(self, until: Checkpoint = None) -> str:
+        target = min(until, self.target) if until is not None else self.target
+        while self.checkpoint < target:
+            current = self.checkpoint
+            name, action, max_attempts = self.steps[current]
+            try:
+                with self.scraper.tracer.span(f"workflow.{name}", checkpoint=current.name):
+                    await action()
+            except Exception as e:
+                kind = self._on_failure(name, max_attempts, e)
+                await self._recover(name, kind, self.attempts[current], e)
+                continue
+            self._advance(current)
+        return self.file_name
+
+    async def _recover(self, step: str, kind: str, attempt: int, error: Exception):
+        delay = self._backoff(step, kind, attempt, error)
+        if delay:
+            await asyncio.sleep(delay)
+        if kind == "page_closed":
+            self.scraper.page = await self.scraper.context.new_page()
+        reset_to = FAILURE_POLICIES[kind].reset_to
+        self._resume(kind, reset_to if reset_to is not None else await self.detect_state())
+
+    async def detect_state(self) -> Checkpoint:
+        page = self.scraper.page
+        try:
+            url = page.url
+            if url in ("", "about:blank") or "/user/login" in url:
+                return Checkpoint.START
+            if "/exports/historical" not in url or not await page.locator(EXPORTS_TITLE_SELECTOR).is_visible():
+                return Checkpoint.LOGGED_IN
+
+            name_field = page.get_by_role("textbox", name="Entrez un nom")
+            if not await name_field.is_visible() or await name_field.input_value(timeout=2_000) != self.file_name:
+                return Checkpoint.ON_EXPORTS
+            if self.checkpoint < Checkpoint.FIELDS_SELECTED:
+                return Checkpoint.NAME_SET
+
+            start = self.date_range.start.strftime(settings.CALENDAR_INPUT_FORMAT)
+            calendar_value = await page.locator(f"input{CALENDAR_OPENER_SELECTOR}, {CALENDAR_OPENER_SELECTOR} input").first.input_value(timeout=2_000)
+            if start in calendar_value:
+                return Checkpoint.DATES_APPLIED
+            return Checkpoint.FIELDS_SELECTED
+        except PlaywrightError as e:
+            logger.info("  Detection d'etat incomplete (%s), reprise prudente", e)
+            return Checkpoint.ON_EXPORTS if self.checkpoint >= Checkpoint.ON_EXPORTS else Checkpoint.START
@@ -0,0 +1,75 @@
+"""
+File de jobs d'export Minderest
+Usage:
+    python -m src.scheduler enqueue --account compte@exemple.com [--fields a,b] [--start 2025-01-01 --end 2025-12-31]
+                                    # sans --start/--end : période manquante d'après le watermark (SYNC_ENABLED)
+    python -m src.scheduler run [--concurrency 4] [--forever]
+    python -m src.scheduler status
+    python -m src.scheduler requeue JOB_ID      # job 'uncertain' vérifié comme non reçu
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import date
+
+from src.config.settings import settings
+from src.minderest.watermark import SyncWatermark
+from src.scheduler.queue import JobQueue
+from src.scheduler.scheduler import Scheduler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="File de jobs d'export Minderest")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = sub.add_parser("enqueue", help="ajouter un job")
+    enqueue.add_argument("--account", default=settings.MINDEREST_EMAIL)
+    enqueue.add_argument("--fields", help="liste separee par des virgules (defaut : EXPORT_FIELDS)")
+    enqueue.add_argument("--start", type=date.fromisoformat)
+    enqueue.add_argument("--end", type=date.fromisoformat)
+    enqueue.add_argument("--name-template", help="ex : Exports_Minderset_{now:%%d-%%m-%%Y_%%Hh%%M}s")
+    enqueue.add_argument("--priority", type=int, default=0)
+
+    run = sub.add_parser("run", help="traiter la file")
+    run.add_argument("--concurrency", type=int)
+    run.add_argument("--forever", action="store_true", help="ne pas s'arreter quand la file est vide")
+
+    sub.add_parser("status", help="compteurs par statut")
+    requeue = sub.add_parser("requeue", help="remettre en file un job 'uncertain'")
+    requeue.add_argument("job_id", type=int)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    queue = JobQueue()
+
+    if args.command == "enqueue":
+        if bool(args.start) != bool(args.end):
+            parser.error("--start et --end vont ensemble")
+        fields = [f.strip() for f in args.fields.split(",")] if args.fields else None
+        if not args.start and settings.SYNC_ENABLED:
+            # Période déduite du watermark : delta depuis les données déjà stockées
+            plan = SyncWatermark().plan(args.account)
+            print(f"synchro : {plan}")
+            if plan.date_range is None:
+                return 0
+            args.start, args.end = plan.date_range.start, plan.date_range.end
+        job_id, created = queue.enqueue(args.account, fields, args.start, args.end,
+                                        args.name_template, args.priority)
+        print(f"job {job_id} {'ajoute' if created else 'deja en file'}")
+    elif args.command == "run":
+        counts = asyncio.run(Scheduler(queue, args.concurrency).run(until_empty=not args.forever))
+        return 1 if counts.get("failed") or counts.get("uncertain") else 0
+    elif args.command == "status":
+        for status, n in sorted(queue.counts().items()):
+            print(f"{status:<12} {n}")
+        for job in queue.jobs("uncertain"):
+            print(f"  a verifier : job {job.id} {job.file_name} ({job.error})")
+    elif args.command == "requeue":
+        queue.requeue_uncertain(args.job_id)
+        print(f"job {args.job_id} remis en file")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+from src.config.settings import settings
+from src.minderest.browser import EXPORT_NAME_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAME_TEMPLATE = EXPORT_NAME_TEMPLATE
+
+# pending -> running -> submitting -> submitted
+#                  \-> pending (retry) / failed        \-> uncertain (crash ou erreur après le clic)
+ACTIVE_STATUSES = ("pending", "running", "submitting")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    account       TEXT    NOT NULL,
+    fields        TEXT    NOT NULL,
+    start_date    TEXT,
+    end_date      TEXT,
+    name_template TEXT    NOT NULL,
+    file_name     TEXT,
+    priority      INTEGER NOT NULL DEFAULT 0,
+    status        TEXT    NOT NULL DEFAULT 'pending',
+    dedup_key     TEXT    NOT NULL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL DEFAULT 3,
+    not_before    REAL    NOT NULL DEFAULT 0,
+    worker        TEXT,
+    heartbeat     REAL,
+    error         TEXT,
+    created_at    REAL    NOT NULL,
+    updated_at    REAL    NOT NULL
+);
+-- Un seul job actif par combinaison identique (compte, champs, période, gabarit de nom)
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_dedup ON jobs(dedup_key)
+    WHERE status IN ('pending', 'running', 'submitting');
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs(status, priority DESC, id);
+CREATE TABLE IF NOT EXISTS accounts (
+    account      TEXT PRIMARY KEY,
+    last_started REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+@dataclass
+class QueuedJob:
+    id: int
+    account: str
+    fields: list[str]
+    start_date: date | None
+    end_date: date | None
+    name_template: str
+    file_name: str | None
+    priority: int
+    status: str
+    attempts: int
+    max_attempts: int
+    error: str | None = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "QueuedJob":
+        return cls(
+            id=row["id"],
+            account=row["account"],
+            fields=json.loads(row["fields"]),
+            start_date=date.fromisoformat(row["start_date"]) if row["start_date"] else None,
+            end_date=date.fromisoformat(row["end_date"]) if row["end_date"] else None,
+            name_template=row["name_template"],
+            file_name=row["file_name"],
+            priority=row["priority"],
+            status=row["status"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            error=row["error"],
+        )
+
+
+def render_file_name(template: str, job_id: int, account: str, now: datetime = None) -> str:
+    return template.format(now=now or datetime.now(), job_id=job_id, account=account.split("@")[0])
+
+
+class JobQueue:
+    """File de jobs d'export durable (SQLite, WAL) partagée par les workers
+
+    Garantie « jamais soumis deux fois » : un job passe à `submitting` (commit) juste avant le clic
+    d'envoi. Un job resté `submitting` après un crash devient `uncertain` et n'est jamais relancé
+    automatiquement ; un job resté `running` (rien n'a été envoyé) repasse en `pending`.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or settings.SCHEDULER_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # ---- production ----
+    def enqueue(self, account: str, fields: list[str] = None, start_date: date = None, end_date: date = None,
+                name_template: str = None, priority: int = 0, max_attempts: int = 3) -> tuple[int, bool]:
+        """Ajoute un job ; retourne (id, créé). Un job identique déjà actif n'est pas dupliqué."""
+        fields = list(fields or settings.EXPORT_FIELDS)
+        name_template = name_template or DEFAULT_NAME_TEMPLATE
+        key_source = json.dumps([account.lower(), sorted(fields), str(start_date), str(end_date), name_template])
+        dedup_key = hashlib.sha256(key_source.encode()).hexdigest()
+        now = time.time()
+
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """INSERT OR IGNORE INTO jobs (account, fields, start_date, end_date, name_template, priority,
+                                               dedup_key, max_attempts, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (account, json.dumps(fields), start_date.isoformat() if start_date else None,
+                 end_date.isoformat() if end_date else None, name_template, priority, dedup_key,
+                 max_attempts, now, now),
+            )
+            if cursor.rowcount:
+                return cursor.lastrowid, True
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE dedup_key = ? AND status IN ('pending', 'running', 'submitting')",
+                (dedup_key,),
+            ).fetchone()
+            logger.info("Job identique deja en file (id %s), ignore", row["id"])
+            return row["id"], False
+
+    # ---- consommation ----
+    def claim(self, per_account_concurrency: int = None, account_min_interval: float = None) -> QueuedJob | None:
+        """Prend le job éligible le plus prioritaire en respectant les limites par compte"""
+        per_account_concurrency = per_account_concurrency or settings.SCHEDULER_PER_ACCOUNT_CONCURRENCY
+        if account_min_interval is None:
+            account_min_interval = settings.SCHEDULER_ACCOUNT_MIN_INTERVAL
+        now = time.time()
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                """SELECT j.* FROM jobs j
+                   LEFT JOIN accounts a ON a.account = j.account
+                   WHERE j.status = 'pending' AND j.not_before <= ?
+                     AND COALESCE(a.last_started, 0) <= ?
+                     AND (SELECT COUNT(*) FROM jobs r
+                          WHERE r.account = j.account AND r.status IN ('running', 'submitting')) < ?
+                   ORDER BY j.priority DESC, j.id
+                   LIMIT 1""",
+                (now, now - account_min_interval, per_account_concurrency),
+            ).fetchone()
+            if row is None:
+                return None
+
+            # Le nom est figé à la première prise : une reprise réutilise le même nom de fichier
+            file_name = row["file_name"] or render_file_name(row["name_template"], row["id"], row["account"])
+            conn.execute(
+                """UPDATE jobs SET status = 'running', file_name = ?, attempts = attempts + 1, worker = ?,
+                                   heartbeat = ?, updated_at = ? WHERE id = ?""",
+                (file_name, self.worker_id, now, now, row["id"]),
+            )
+            conn.execute(
+                """INSERT INTO accounts (account, last_started) VALUES (?, ?)
+                   ON CONFLICT(account) DO UPDATE SET last_started = excluded.last_started""",
+                (row["account"], now),
+            )
+            job = QueuedJob.from_row(row)
+            job.file_name, job.status, job.attempts = file_name, "running", row["attempts"] + 1
+            return job
+
+    def heartbeat(self, job_ids: list[int]):
+        if not job_ids:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany("UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ?",
+                             [(now, job_id, self.worker_id) for job_id in job_ids])
+
+    def mark_submitting(self, job_id: int, file_name: str):
+        """Point de non-retour : doit être committé AVANT le clic d'envoi"""
+        self._set_status(job_id, "submitting", file_name=file_name, expected="running")
+
+    def mark_submitted(self, job_id: int):
+        self._set_status(job_id, "submitted", error=None)
+
+    def mark_failed(self, job_id: int, error: str, submit_started: bool, retry_delay: float = None):
+        """Après le clic d'envoi : `uncertain` ; sinon nouvelle tentative différée ou `failed`"""
+        if submit_started:
+            self._set_status(job_id, "uncertain", error=error)
+            return
+        retry_delay = settings.SCHEDULER_RETRY_DELAY if retry_delay is None else retry_delay
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row["attempts"] < row["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = 'pending', error = ?, not_before = ?, updated_at = ? WHERE id = ?",
+                    (error, now + retry_delay * 2 ** (row["attempts"] - 1), now, job_id),
+                )
+            else:
+                conn.execute("UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                             (error, now, job_id))
+
+    def _set_status(self, job_id: int, status: str, expected: str = None, **columns):
+        assignments = ", ".join(f"{k} = ?" for k in columns)
+        sql = f"UPDATE jobs SET status = ?, updated_at = ?{', ' + assignments if assignments else ''} WHERE id = ?"
+        params = [status, time.time(), *columns.values(), job_id]
+        if expected:
+            sql += " AND status = ?"
+            params.append(expected)
+        with self._transaction() as conn:
+            if conn.execute(sql, params).rowcount != 1:
+                raise RuntimeError(f"Job {job_id} : transition vers {status} refusee")
+
+    # ---- reprise après crash ----
+    def recover(self, stale_after: float = None) -> dict[str, int]:
+        """Jobs de workers morts (heartbeat trop ancien) : running -> pending, submitting -> uncertain"""
+        stale_after = stale_after or settings.SCHEDULER_STALE_AFTER
+        cutoff, now = time.time() - stale_after, time.time()
+        with self._transaction() as conn:
+            requeued = conn.execute(
+                """UPDATE jobs SET status = 'pending', worker = NULL, updated_at = ?,
+                                   error = 'interrompu (reprise)'
+                   WHERE status = 'running' AND COALESCE(heartbeat, 0) < ?""",
+                (now, cutoff),
+            ).rowcount
+            uncertain = conn.execute(
+                """UPDATE jobs SET status = 'uncertain', updated_at = ?,
+                                   error = 'interrompu pendant la soumission : verifier avant de relancer'
+                   WHERE status = 'submitting' AND COALESCE(heartbeat, 0) < ?""",
+                (now, cutoff),
+            ).rowcount
+        if requeued or uncertain:
+            logger.warning("Reprise : %d job(s) remis en file, %d job(s) a verifier (uncertain)",
+                           requeued, uncertain)
+        return {"requeued": requeued, "uncertain": uncertain}
+
+    def requeue_uncertain(self, job_id: int):
+        """Décision manuelle après vérification que l'export n'a pas été reçu"""
+        self._set_status(job_id, "pending", expected="uncertain", not_before=0)
+
+    # ---- consultation ----
+    def counts(self) -> dict[str, int]:
+        with self._connect() as conn:
+            return {row["status"]: row["n"] for row in
+                    conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+
+    def jobs(self, status: str = None, limit: int = 100) -> list[QueuedJob]:
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit))
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+            return [QueuedJob.from_row(row) for row in rows]
+
+    def has_runnable(self) -> bool:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT 1 FROM jobs WHERE status IN ('pending', 'running', 'submitting') LIMIT 1"
+            ).fetchone() is not None
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+
+from src.config.settings import settings
+from src.minderest.calendar import DateRange
+from src.minderest.orchestrator import ExportJob, ExportOrchestrator
+from src.minderest.watermark import SyncWatermark
+from src.scheduler.queue import JobQueue, QueuedJob
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Consomme la file SQLite avec `concurrency` workers asyncio sur un Chromium partagé"""
+
+    def __init__(self, queue: JobQueue = None, concurrency: int = None, orchestrator: ExportOrchestrator = None):
+        self.queue = queue or JobQueue()
+        self.concurrency = concurrency or settings.SCHEDULER_CONCURRENCY
+        self.orchestrator = orchestrator or ExportOrchestrator(concurrency=self.concurrency)
+        self._running: set[int] = set()
+        self._stop = asyncio.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    async def run(self, until_empty: bool = True) -> dict[str, int]:
+        """Traite la file ; `until_empty=False` = service permanent (arrêt via stop())"""
+        recovered = await asyncio.to_thread(self.queue.recover)
+        pending = (await asyncio.to_thread(self.queue.counts)).get("pending", 0)
+        logger.info("="*60)
+        logger.info("SCHEDULER : %d job(s) en attente, %d worker(s) (reprise : %s)",
+                    pending, self.concurrency, recovered)
+        logger.info("="*60)
+
+        async with self.orchestrator.browser(expected_jobs=max(pending, 1)) as browser:
+            heartbeat = asyncio.create_task(self._heartbeat())
+            try:
+                await asyncio.gather(*(self._worker(browser, i + 1, until_empty) for i in range(self.concurrency)))
+            finally:
+                heartbeat.cancel()
+
+        counts = await asyncio.to_thread(self.queue.counts)
+        logger.info("SCHEDULER TERMINE : %s", counts)
+        return counts
+
+    async def _heartbeat(self):
+        """Heartbeat des jobs en cours + reprise périodique des jobs de workers morts pendant le service
+        (crash d'un autre processus, ou redémarrage avant SCHEDULER_STALE_AFTER)"""
+        while True:
+            await asyncio.sleep(settings.SCHEDULER_HEARTBEAT)
+            await asyncio.to_thread(self.queue.heartbeat, list(self._running))
+            await asyncio.to_thread(self.queue.recover)
+
+    async def _worker(self, browser, index: int, until_empty: bool):
+        while not self._stop.is_set():
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                # File vide = plus aucun job actif, y compris ceux d'un worker mort pas encore repris
+                if until_empty and not await asyncio.to_thread(self.queue.has_runnable):
+                    return
+                # Rien d'éligible pour l'instant (limites par compte, backoff) : attendre
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=settings.SCHEDULER_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._running.add(job.id)
+            try:
+                await self._execute(browser, job, index)
+            finally:
+                self._running.discard(job.id)
+
+    async def _execute(self, browser, job: QueuedJob, index: int):
+        """Exécute un job ; toute exception termine en mark_failed (le worker et le job ne restent jamais
+        bloqués en `running`), sauf si la requête est déjà enregistrée comme soumise"""
+        state = {"submit_started": False, "submitted": False}
+        try:
+            await self._run_job(browser, job, index, state)
+        except Exception as e:
+            logger.exception("[worker %d] job %d : erreur inattendue : %s", index, job.id, e)
+            if not state["submitted"]:
+                await asyncio.to_thread(self.queue.mark_failed, job.id, f"{type(e).__name__}: {e}",
+                                        state["submit_started"])
+
+    async def _run_job(self, browser, job: QueuedJob, index: int, state: dict):
+        logger.info("[worker %d] job %d : %s (%s, essai %d/%d)", index, job.id, job.file_name,
+                    job.account, job.attempts, job.max_attempts)
+        date_range = DateRange(job.start_date, job.end_date) if job.start_date and job.end_date else None
+        export_job = ExportJob(
+            email=job.account,
+            password=settings.password_for(job.account),
+            fields=job.fields,
+            file_name=job.file_name,
+            date_range=date_range,
+        )
+
+        async def before_submit(file_name: str):
+            await asyncio.to_thread(self.queue.mark_submitting, job.id, file_name)
+            state["submit_started"] = True
+
+        result = await self.orchestrator.run_job(browser, export_job, label=f"job{job.id}",
+                                                 before_submit=before_submit)
+        if result.success:
+            await asyncio.to_thread(self.queue.mark_submitted, job.id)
+            state["submitted"] = True
+            if settings.SYNC_ENABLED:
+                # Sans période : export complet ; une période aussi longue que PERIOD_DAYS compte comme complète
+                submitted_range = date_range or DateRange.last_days()
+                await asyncio.to_thread(SyncWatermark().record_submitted, job.account, job.file_name,
+                                        submitted_range, submitted_range.days >= settings.PERIOD_DAYS)
+            logger.info("[worker %d] job %d soumis en %.1fs", index, job.id, result.duration)
+        else:
+            await asyncio.to_thread(self.queue.mark_failed, job.id, result.error, result.submit_started)
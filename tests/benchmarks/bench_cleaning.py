@@ -0,0 +1,97 @@
+"""Benchmark du nettoyage vectorisé sur un export synthétique
+
+Usage :
+    python -m tests.benchmarks.bench_cleaning                       # 2 millions de lignes
+    python -m tests.benchmarks.bench_cleaning --rows 5000000 --batch-rows 1000000
+    python -m tests.benchmarks.bench_cleaning --max-seconds 60      # échoue au-delà (fenêtre de nuit)
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning.cleaning import (
+    CleaningReport,
+    fill_gaps,
+    flag_outliers,
+    normalize_values,
+    validate_price_bounds,
+)
+
+STAGES = (
+    ("normalize_values", normalize_values),
+    ("validate_price_bounds", validate_price_bounds),
+    ("fill_gaps", fill_gaps),
+    ("flag_outliers", flag_outliers),
+)
+
+
+def synthetic_export(rows: int, competitors: int = 8, days: int = 365, seed: int = 0) -> pd.DataFrame:
+    """Lignes (produit × concurrent × jour) au format brut d'un export : prix en texte français,
+    stocks en libellés, ~2 % de trous et quelques prix concurrents aberrants"""
+    rng = np.random.default_rng(seed)
+    products = max(1, rows // (competitors * days))
+    index = np.arange(rows)
+    product = index // (competitors * days) % products
+    competitor = index // days % competitors
+    day = index % days
+
+    base = rng.uniform(5, 500, products).astype(np.float32)[product]
+    avg = np.round(base * rng.uniform(0.95, 1.05, rows), 2)
+    comp = np.round(avg * rng.uniform(0.8, 1.2, rows), 2)
+    comp[rng.random(rows) < 0.001] *= 20
+    comp_text = pd.Series(comp).map("{:,.2f} €".format).str.replace(",", " ").str.replace(".", ",")
+    comp_text[rng.random(rows) < 0.02] = None
+
+    return pd.DataFrame({
+        "product_id": pd.Categorical(np.char.add("SKU", product.astype(str))),
+        "competitor": pd.Categorical(np.char.add("Concurrent ", competitor.astype(str))),
+        "comp_country": pd.Categorical(np.where(competitor % 2, "FR", "ES")),
+        "date": pd.Timestamp("2025-01-01") + pd.to_timedelta(day, unit="D"),
+        "historical_cli_min_price": (avg * 0.9).astype(np.float32),
+        "historical_cli_avg_price": avg.astype(np.float32),
+        "historical_cli_max_price": (avg * 1.1).astype(np.float32),
+        "historical_cli_price": avg.astype(np.float32),
+        "historical_comp_offer": comp_text.astype(object),
+        "historical_comp_stock": pd.Series(np.where(rng.random(rows) < 0.9, "En stock", "Rupture"), dtype=object),
+    })
+
+
+def run_benchmark(rows: int, batch_rows: int = 1_000_000, seed: int = 0) -> dict[str, float]:
+    """Secondes par étape (génération des données exclue), lots de `batch_rows` lignes"""
+    timings = {name: 0.0 for name, _ in STAGES}
+    report = CleaningReport()
+    for start in range(0, rows, batch_rows):
+        frame = synthetic_export(min(batch_rows, rows - start), seed=seed + start)
+        report.rows += len(frame)
+        for name, stage in STAGES:
+            started = time.perf_counter()
+            frame = stage(frame, report)
+            timings[name] += time.perf_counter() - started
+    report.log()
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--batch-rows", type=int, default=1_000_000)
+    parser.add_argument("--max-seconds", type=float)
+    args = parser.parse_args(argv)
+
+    timings = run_benchmark(args.rows, args.batch_rows)
+    total = sum(timings.values())
+    for name, seconds in timings.items():
+        print(f"{name:<22} {seconds:6.2f}s")
+    print(f"{'total':<22} {total:6.2f}s  ({args.rows / total:,.0f} lignes/s)")
+
+    if args.max_seconds and total > args.max_seconds:
+        print(f"REGRESSION nettoyage : {total:.2f}s > {args.max_seconds:.2f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Benchmark des étapes du scraper contre le faux Minderest local
+
+Usage :
+    python -m tests.benchmarks.bench_scraper                    # mesure + comparaison à la baseline
+    python -m tests.benchmarks.bench_scraper --update-baseline  # enregistre les mesures comme baseline
+    python -m tests.benchmarks.bench_scraper --latency 0.2      # latence serveur simulée (s)
+    python -m tests.benchmarks.bench_scraper --profile throughput              # profil navigateur
+    python -m tests.benchmarks.bench_scraper --compare-profiles default throughput
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from src.minderest.scraper import MinderestScraper
+from tests.mock_minderest.server import MockMinderest
+
+STEPS = ("login", "navigate_to_exports", "fill_export_form", "submit_request")
+BASELINE_FILE = Path(__file__).with_name("baseline_scraper.json")
+DEFAULT_PROFILE = "throughput"   # profil des exécutions serveur (orchestrateur, file de jobs)
+DEFAULT_TOLERANCE = 0.25   # +25 % ...
+ABSOLUTE_SLACK = 0.2       # ... + 200 ms, pour absorber le bruit des étapes très courtes
+
+
+def run_once(app: MockMinderest, profile: str = DEFAULT_PROFILE) -> dict[str, float]:
+    timings = {}
+    # Toujours headless (machines sans affichage) : seules les autres options du profil varient
+    with MinderestScraper(app.email, app.password, use_session_cache=False,
+                          base_url=app.base_url, headless=True, profile=profile) as scraper:
+        for step in STEPS:
+            started = time.perf_counter()
+            getattr(scraper, step)()
+            timings[step] = time.perf_counter() - started
+    return timings
+
+
+def run_benchmark(rounds: int = 3, latency: float = 0.0, profile: str = DEFAULT_PROFILE) -> dict[str, float]:
+    """Médiane par étape sur `rounds` runs complets (navigateur neuf à chaque run)"""
+    samples = {step: [] for step in STEPS}
+    with MockMinderest(latency=latency) as app:
+        for _ in range(rounds):
+            for step, seconds in run_once(app, profile).items():
+                samples[step].append(seconds)
+    return {step: statistics.median(values) for step, values in samples.items()}
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> dict | None:
+    """Baseline mesurée (--update-baseline sur la machine de référence) ; None si jamais générée"""
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_regressions(results: dict[str, float], baseline: dict) -> list[str]:
+    tolerance = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    regressions = []
+    for step, seconds in results.items():
+        reference = baseline["steps"].get(step)
+        if reference is None:
+            continue
+        limit = reference * (1 + tolerance) + ABSOLUTE_SLACK
+        if seconds > limit:
+            regressions.append(f"{step}: {seconds:.2f}s > {limit:.2f}s (baseline {reference:.2f}s)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="profil navigateur (settings.BROWSER_PROFILES)")
+    parser.add_argument("--compare-profiles", nargs="+", metavar="PROFIL",
+                        help="mesurer plusieurs profils côte à côte (sans comparaison à la baseline)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.compare_profiles:
+        table = {name: run_benchmark(args.rounds, args.latency, name) for name in args.compare_profiles}
+        print(f"{'':<22}" + "".join(f"{name:>12}" for name in table))
+        for step in (*STEPS, "total"):
+            print(f"{step:<22}" + "".join(
+                f"{(sum(r.values()) if step == 'total' else r[step]):11.2f}s" for r in table.values()))
+        return 0
+
+    results = run_benchmark(args.rounds, args.latency, args.profile)
+    for step, seconds in results.items():
+        print(f"{step:<22} {seconds:6.2f}s")
+
+    if args.update_baseline:
+        baseline = {"tolerance": DEFAULT_TOLERANCE, "latency": args.latency, "profile": args.profile,
+                    "steps": {k: round(v, 3) for k, v in results.items()}}
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline mise a jour : {BASELINE_FILE}")
+        return 0
+
+    baseline = load_baseline()
+    if baseline is None:
+        print(f"ERREUR aucune baseline ({BASELINE_FILE.name}) : lancer avec --update-baseline pour l'enregistrer")
+        return 1
+    if baseline.get("profile", DEFAULT_PROFILE) != args.profile:
+        print(f"ERREUR baseline mesuree avec le profil {baseline.get('profile', DEFAULT_PROFILE)}, "
+              f"pas {args.profile} : relancer avec --profile {baseline.get('profile', DEFAULT_PROFILE)}")
+        return 1
+    regressions = find_regressions(results, baseline)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
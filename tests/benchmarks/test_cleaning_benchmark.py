@@ -0,0 +1,6 @@
+from tests.benchmarks.bench_cleaning import STAGES, run_benchmark
+
+
+def test_cleaning_benchmark_runs_every_stage():
+    timings = run_benchmark(rows=20_000, batch_rows=8_000)
+    assert list(timings) == [name for name, _ in STAGES]
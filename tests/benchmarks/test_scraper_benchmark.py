@@ -0,0 +1,18 @@
+from tests.benchmarks.bench_scraper import DEFAULT_PROFILE, find_regressions, load_baseline, run_benchmark
+from tests.conftest import requires_chromium
+
+
+@requires_chromium
+def test_scraper_steps_within_baseline():
+    baseline = load_baseline()
+    # Baseline absente = régression non détectable : échec, pas de skip
+    assert baseline is not None, ("baseline_scraper.json absente : "
+                                  "python -m tests.benchmarks.bench_scraper --update-baseline")
+    results = run_benchmark(rounds=3, latency=baseline.get("latency", 0.0),
+                            profile=baseline.get("profile", DEFAULT_PROFILE))
+    assert not find_regressions(results, baseline)
+
+def test_find_regressions_applies_tolerance_and_slack():
+    baseline = {"tolerance": 0.5, "steps": {"login": 1.0, "submit_request": 0.1}}
+    assert find_regressions({"login": 1.6, "submit_request": 0.25}, baseline) == []
+    assert find_regressions({"login": 1.8}, baseline) == ["login: 1.80s > 1.70s (baseline 1.00s)"]
@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+
+def _chromium_available() -> bool:
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            return os.path.exists(p.chromium.executable_path)
+    except Exception:
+        return False
+
+
+requires_chromium = pytest.mark.skipif(
+    not _chromium_available(), reason="Chromium Playwright non installe (playwright install chromium)"
+)
@@ -0,0 +1,29 @@
+from playwright.sync_api import sync_playwright
+
+from src.minderest.fields import select_fields
+from tests.conftest import requires_chromium
+
+# Libellés proches : « Stock » est contenu dans « My Stock », casse et espaces différents du sélecteur
+FILTERS_PAGE = """
+<div class="filter"><input type="checkbox" id="f-my-stock"> My Stock</div>
+<div class="filter"><input type="checkbox" id="f-stock">  STOCK </div>
+<div class="filter"><input type="checkbox" id="f-offer"> My price before offer (€)</div>
+"""
+
+
+@requires_chromium
+def test_text_fields_prefer_exact_label_case_insensitive():
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            page = browser.new_page()
+            page.set_content(FILTERS_PAGE)
+
+            report = select_fields(page, ["stock", "my_price_before_offer"])
+
+            assert report.results == {"stock": "checked", "my_price_before_offer": "checked"}
+            checked = page.eval_on_selector_all("input:checked", "els => els.map(el => el.id)")
+            # Exact d'abord (« STOCK », pas « My Stock ») ; libellé contenant le texte en dernier recours
+            assert sorted(checked) == ["f-offer", "f-stock"]
+        finally:
+            browser.close()
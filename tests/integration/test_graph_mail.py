@@ -0,0 +1,76 @@
+from src.graph_api.auth import ClientCredentialsToken
+from src.graph_api.client import GraphClient
+from src.graph_api.mail import MailboxPoller
+from tests.mock_graph.server import MockGraph
+
+XLSX = b"PK\x03\x04" + b"x" * 300_000
+
+
+def poller(app: MockGraph, tmp_path, workers=3) -> MailboxPoller:
+    token = ClientCredentialsToken(app.tenant, app.client_id, app.client_secret, authority=app.authority)
+    client = GraphClient(base_url=app.base_url, token_provider=token)
+    return MailboxPoller(client, mailbox=app.mailbox, download_dir=tmp_path / "input",
+                         state_dir=tmp_path / "graph", workers=workers)
+
+
+def test_delta_poll_downloads_only_new_export_mails(tmp_path):
+    with MockGraph() as app:
+        app.add_message("Newsletter")
+        app.add_message("Export pret : Exports_Minderset_01-06-2025_08h00s",
+                        attachments={"Exports_Minderset_01-06-2025_08h00s.xlsx": XLSX})
+        app.add_message("Votre export Exports_Minderset_01-06-2025_09h30s",
+                        links={"Exports_Minderset_01-06-2025_09h30s.xlsx": XLSX[:1000]})
+        mailbox = poller(app, tmp_path)
+
+        first = mailbox.poll()
+        assert sorted(p.name for p in first) == ["Exports_Minderset_01-06-2025_08h00s.xlsx",
+                                                 "Exports_Minderset_01-06-2025_09h30s.xlsx"]
+        assert (tmp_path / "input" / "Exports_Minderset_01-06-2025_08h00s.xlsx").read_bytes() == XLSX
+        assert app.external_auth_headers == []       # jeton jamais envoyé hors de Graph
+
+        app.add_message("Export Exports_Minderset_02-06-2025_08h00s",
+                        attachments={"Exports_Minderset_02-06-2025_08h00s.xlsx": XLSX})
+        app.throttle(1)
+        second = poller(app, tmp_path).poll()
+
+        assert [p.name for p in second] == ["Exports_Minderset_02-06-2025_08h00s.xlsx"]
+        assert app.full_listings == 0
+        assert app.token_requests == 2
+
+
+def test_wait_for_returns_as_soon_as_expected_export_arrives(tmp_path):
+    with MockGraph() as app:
+        mailbox = poller(app, tmp_path)
+        app.add_message("Export Exports_Minderset_03-06-2025_08h00s",
+                        attachments={"Exports_Minderset_03-06-2025_08h00s.csv": b"a;b\n1;2\n"})
+        app.expire_tokens()
+
+        paths = mailbox.wait_for(["Exports_Minderset_03-06-2025_08h00s"], timeout=5, interval=0.1)
+
+        assert [p.name for p in paths] == ["Exports_Minderset_03-06-2025_08h00s.csv"]
+
+
+def test_wait_for_sees_exports_already_fetched_by_an_earlier_poll(tmp_path):
+    name = "Exports_Minderset_05-06-2025_08h00s"
+    with MockGraph() as app:
+        app.add_message(f"Export {name}", attachments={f"{name}.xlsx": XLSX})
+        assert [p.name for p in poller(app, tmp_path).poll()] == [f"{name}.xlsx"]   # relève séparée
+
+        # Le mail est déjà marqué traité : sans vérification préalable, attente jusqu'au timeout
+        assert [p.name for p in poller(app, tmp_path).wait_for([name], timeout=0.5, interval=0.1)] == [f"{name}.xlsx"]
+        (tmp_path / "input" / f"{name}.xlsx").unlink()      # déjà ingéré et déplacé
+        assert poller(app, tmp_path).wait_for([name], timeout=0.5, interval=0.1) == []
+
+
+def test_dropped_connections_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.graph_api.client.time.sleep", lambda seconds: None)
+    with MockGraph() as app:
+        app.add_message("Export Exports_Minderset_04-06-2025_08h00s",
+                        links={"Exports_Minderset_04-06-2025_08h00s.xlsx": XLSX})
+        mailbox = poller(app, tmp_path, workers=1)
+        mailbox.client.get_json(f"users/{app.mailbox}/mailFolders/inbox/messages")   # jeton déjà obtenu
+        app.drop_connections(2)       # deux coupures réseau consécutives : rejouées
+
+        paths = mailbox.poll()
+
+        assert [p.read_bytes() for p in paths] == [XLSX]
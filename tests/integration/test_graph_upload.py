@@ -0,0 +1,94 @@
+import os
+
+from src.config.settings import settings
+from src.graph_api.auth import ClientCredentialsToken
+from src.graph_api.client import GraphClient
+from src.graph_api.upload import CHUNK_UNIT, DriveUploader, chunk_size_bytes
+from tests.mock_graph.server import MockGraph
+
+
+def uploader(app: MockGraph, tmp_path) -> DriveUploader:
+    token = ClientCredentialsToken(app.tenant, app.client_id, app.client_secret, authority=app.authority)
+    client = GraphClient(base_url=app.base_url, token_provider=token)
+    return DriveUploader(client, drive_id="drive1", folder="Minderest", chunk_mb=0.3125, workers=2,
+                         state_dir=tmp_path / "graph")
+
+
+def test_chunk_size_is_a_multiple_of_320_kib():
+    assert chunk_size_bytes(10) % CHUNK_UNIT == 0
+    assert chunk_size_bytes(0.01) == CHUNK_UNIT
+    assert chunk_size_bytes(500) == 60 * 1024 * 1024
+
+
+def test_upload_sessions_in_parallel_then_skip_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_SIMPLE_UPLOAD_MAX_MB", 0.5)
+    output = tmp_path / "output"
+    output.mkdir()
+    files = {"grand_a.xlsx": os.urandom(3 * CHUNK_UNIT + 123), "grand_b.xlsx": os.urandom(2 * CHUNK_UNIT),
+             "petit.csv": b"sku;prix\n1;2\n"}
+    for name, content in files.items():
+        (output / name).write_bytes(content)
+
+    with MockGraph() as app:
+        results = uploader(app, tmp_path).upload_directory(output)
+
+        assert {r.status for r in results} == {"uploaded"}
+        assert app.drive == {f"Minderest/{n}": c for n, c in files.items()}
+        assert app.sessions_created == 2 and app.simple_uploads == 1
+        assert app.external_auth_headers == []      # URL de session pré-authentifiée : pas de jeton
+
+        (output / "petit.csv").write_bytes(b"sku;prix\n1;3\n")
+        again = uploader(app, tmp_path).upload_directory(output)
+
+        assert sorted(r.status for r in again) == ["skipped", "skipped", "uploaded"]
+        assert app.drive["Minderest/petit.csv"] == b"sku;prix\n1;3\n"
+
+
+def test_interrupted_session_resumes_from_next_expected_range(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_SIMPLE_UPLOAD_MAX_MB", 0.5)
+    monkeypatch.setattr(settings, "GRAPH_MAX_RETRIES", 1)
+    content = os.urandom(4 * CHUNK_UNIT + 10)
+    path = tmp_path / "export_nettoye.xlsx"
+    path.write_bytes(content)
+
+    with MockGraph() as app:
+        app.fail_chunks(2, after=2)
+        failed = uploader(app, tmp_path).upload_file(path)
+        assert failed.status == "failed"
+        assert app.bytes_received == 2 * CHUNK_UNIT
+
+        resumed = uploader(app, tmp_path).upload_file(path)
+
+        assert resumed.status == "resumed"
+        assert resumed.bytes_sent == len(content) - 2 * CHUNK_UNIT
+        assert app.sessions_created == 1
+        assert app.drive["Minderest/export_nettoye.xlsx"] == content
+
+
+def test_network_errors_are_retried_or_fail_only_their_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_SIMPLE_UPLOAD_MAX_MB", 0.5)
+    monkeypatch.setattr(settings, "GRAPH_MAX_RETRIES", 1)
+    monkeypatch.setattr("src.graph_api.client.time.sleep", lambda seconds: None)
+    big = tmp_path / "grand.xlsx"
+    big.write_bytes(os.urandom(2 * CHUNK_UNIT + 7))
+
+    with MockGraph() as app:
+        client = uploader(app, tmp_path)
+        client.upload_file(big)     # jeton obtenu : la coupure suivante tombe sur un morceau
+        big.write_bytes(os.urandom(2 * CHUNK_UNIT + 7))
+        app.drop_connections(1)
+        assert client.upload_file(big).status == "uploaded"
+        assert app.drive["Minderest/grand.xlsx"] == big.read_bytes()
+
+        # Deux coupures de suite sur un seul fichier : essais épuisés, le lot continue
+        monkeypatch.setattr(settings, "GRAPH_MAX_RETRIES", 0)
+        paths = []
+        for index in range(3):
+            path = tmp_path / f"petit_{index}.csv"
+            path.write_bytes(f"sku;prix\n{index};1\n".encode())
+            paths.append(path)
+        app.drop_connections(1)
+        results = client.upload_many(paths, workers=1)
+
+    assert [r.status for r in results] == ["failed", "uploaded", "uploaded"]
+    assert "Minderest/petit_0.csv" not in app.drive
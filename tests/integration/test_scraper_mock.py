@@ -0,0 +1,49 @@
+from datetime import date
+
+from src.minderest.calendar import DateRange
+from src.minderest.scraper import MinderestScraper
+from src.minderest.workflow import Checkpoint, ExportWorkflow
+from tests.conftest import requires_chromium
+from tests.mock_minderest.server import MockMinderest
+
+
+@requires_chromium
+def test_full_export_against_mock():
+    date_range = DateRange(date(2025, 3, 4), date(2026, 2, 27))
+    with MockMinderest() as app:
+        with MinderestScraper(app.email, app.password, use_session_cache=False,
+                              base_url=app.base_url, headless=True) as scraper:
+            scraper.login()
+            scraper.navigate_to_exports()
+            file_name = scraper.fill_export_form(
+                # historical_comp_stock n'est pas rendu à l'ouverture de la liste virtuelle,
+                # historical_cli_margin est grisé
+                fields=["historical_comp_stock", "cli_category_level_3", "historical_cli_margin"],
+                date_range=date_range,
+            )
+            scraper.submit_request()
+
+    assert scraper.field_report.results == {
+        "historical_comp_stock": "checked",
+        "cli_category_level_3": "checked",
+        "historical_cli_margin": "disabled",
+    }
+    assert app.received_exports == [{
+        "name": file_name,
+        "type": "rows",
+        "fields": ["cli_category_level_3", "historical_comp_stock"],
+        "period": {"from": "04/03/2025", "to": "27/02/2026"},
+    }]
+
+
+@requires_chromium
+def test_tab_reopened_after_crash_keeps_anti_detection_script():
+    with MockMinderest() as app:
+        with MinderestScraper(app.email, app.password, use_session_cache=False,
+                              base_url=app.base_url, headless=True) as scraper:
+            scraper.page.close()     # onglet planté : la reprise page_closed en ouvre un nouveau
+            workflow = ExportWorkflow(scraper, fields=["cli_category_level_3"], submit=False, max_attempts=2)
+            workflow.run(until=Checkpoint.ON_EXPORTS)
+
+            assert workflow.failures[0][1] == "page_closed"
+            assert scraper.page.evaluate("navigator.webdriver") is None
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+from playwright.sync_api import sync_playwright
+
+from src.config.settings import settings
+from src.minderest.scraper import MinderestScraper
+from tests.conftest import requires_chromium
+from tests.mock_minderest.server import SESSION_COOKIE, MockMinderest
+
+
+def probe(app: MockMinderest, token: str = None) -> bool:
+    """is_session_valid sur un contexte HTTP Playwright (pas de navigateur) portant le cookie `token`"""
+    cookies = [{"name": SESSION_COOKIE, "value": token, "domain": urlparse(app.origin).hostname, "path": "/",
+                "expires": -1, "httpOnly": True, "secure": False, "sameSite": "Lax"}] if token else []
+    scraper = MinderestScraper(app.email, app.password, use_session_cache=False, base_url=app.base_url)
+    with sync_playwright() as p:
+        request = p.request.new_context(storage_state={"cookies": cookies, "origins": []})
+        try:
+            scraper.context = SimpleNamespace(request=request)
+            return scraper.is_session_valid()
+        finally:
+            request.dispose()
+
+
+def test_session_probe_detects_the_login_redirect():
+    with MockMinderest() as app:
+        token = app.issue_session()
+        assert probe(app, token)
+        assert not probe(app)
+
+        app.expire_sessions()        # cookie encore présent, session refusée côté serveur (302 -> login)
+        assert not probe(app, token)
+
+
+@requires_chromium
+def test_cached_session_skips_login_until_it_expires(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_DIR", str(tmp_path))
+    with MockMinderest() as app:
+        def ensure_logged_in() -> bool:
+            with MinderestScraper(app.email, app.password, use_session_cache=True,
+                                  base_url=app.base_url, headless=True) as scraper:
+                scraper.ensure_logged_in()
+                return scraper.session_restored
+
+        assert not ensure_logged_in()
+        assert app.logins == 1
+
+        assert ensure_logged_in()        # storage_state rechargé, sonde OK : pas de nouveau login
+        assert app.logins == 1
+
+        app.expire_sessions()
+        assert not ensure_logged_in()    # session refusée : cache invalidé puis login complet
+        assert app.logins == 2
+        assert ensure_logged_in() and app.logins == 2
@@ -0,0 +1,305 @@
+"""Serveur local imitant Microsoft Graph (jeton, delta des messages, pièces jointes, liens, upload)"""
+import json
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+GRAPH_PREFIX = "/v1.0"
+PAGE_SIZE = 2
+DRIVE_ITEM_RE = re.compile(r"^/drives/([^/]+)/root:/(.+):/(content|createUploadSession)$")
+
+
+class MockGraph:
+    """Graph factice sur 127.0.0.1, port libre
+
+    - add_message(subject, attachments={nom: octets}, links={nom: octets}) : nouveau mail
+    - throttle(n) : les n prochains appels Graph répondent 429 (Retry-After: 0)
+    - compteurs : token_requests, delta_requests, full_listings (listes complètes de la boîte)
+    - external_auth_headers : en-têtes Authorization reçus sur les liens externes (doit rester vide)
+    - drive : fichiers publiés {chemin: octets} ; fail_chunks(n, after) : n morceaux en 500 après `after` morceaux acceptés
+    - compteurs upload : simple_uploads, sessions_created, chunk_requests, bytes_received
+    - drop_connections(n) : les n prochaines requêtes GET/PUT sont coupées sans réponse (erreur réseau)
+    """
+
+    def __init__(self, tenant: str = "tenant", client_id: str = "client", client_secret: str = "secret",
+                 mailbox: str = "exports@example.com", token_ttl: int = 3600):
+        self.tenant = tenant
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.mailbox = mailbox
+        self.token_ttl = token_ttl
+        self.tokens: set[str] = set()
+        self.messages: list[dict] = []          # {"seq", "id", "message", "attachments"}
+        self.files: dict[str, bytes] = {}       # liens de téléchargement externes
+        self.token_requests = 0
+        self.delta_requests = 0
+        self.full_listings = 0
+        self.external_auth_headers: list[str] = []
+        self.drive: dict[str, bytes] = {}
+        self.sessions: dict[str, dict] = {}     # {"path", "size", "data"}
+        self.simple_uploads = 0
+        self.sessions_created = 0
+        self.chunk_requests = 0
+        self.bytes_received = 0
+        self._fail_chunks = 0
+        self._fail_after = 0
+        self._drop = 0
+        self._throttle = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def origin(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def authority(self) -> str:
+        return self.origin
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.origin}{GRAPH_PREFIX}"
+
+    def start(self) -> "MockGraph":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def throttle(self, count: int):
+        with self._lock:
+            self._throttle = count
+
+    def fail_chunks(self, count: int, after: int = 0):
+        with self._lock:
+            self._fail_chunks = count
+            self._fail_after = after
+
+    def drop_connections(self, count: int):
+        with self._lock:
+            self._drop = count
+
+    def expire_tokens(self):
+        with self._lock:
+            self.tokens.clear()
+
+    def add_message(self, subject: str, attachments: dict[str, bytes] = None, links: dict[str, bytes] = None,
+                    body: str = "") -> str:
+        with self._lock:
+            self._seq += 1
+            message_id = f"msg{self._seq}"
+            for name, content in (links or {}).items():
+                self.files[name] = content
+                body += f'<p><a href="{self.origin}/files/{name}">Telecharger {name}</a></p>'
+            self.messages.append({
+                "seq": self._seq,
+                "id": message_id,
+                "message": {"id": message_id, "subject": subject, "hasAttachments": bool(attachments),
+                            "receivedDateTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                            "bodyPreview": body[:255], "body": {"contentType": "html", "content": body}},
+                "attachments": [{"id": f"att{i}", "name": name, "size": len(content), "content": content}
+                                for i, (name, content) in enumerate((attachments or {}).items())],
+            })
+            return message_id
+
+
+def _make_handler(app: MockGraph):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _send(self, status: int, body: bytes = b"", content_type: str = "application/json", headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, payload, headers: dict = None):
+            self._send(status, json.dumps(payload).encode(), headers=headers)
+
+        def _dropped(self) -> bool:
+            """Connexion fermée sans réponse : le client voit une erreur de transport"""
+            with app._lock:
+                if not app._drop:
+                    return False
+                app._drop -= 1
+            self.close_connection = True
+            return True
+
+        def _authorized(self) -> bool:
+            auth = self.headers.get("Authorization", "")
+            return auth.startswith("Bearer ") and auth[7:] in app.tokens
+
+        def _graph_guard(self) -> bool:
+            """Throttling simulé puis contrôle du jeton ; False = réponse déjà envoyée"""
+            with app._lock:
+                if app._throttle:
+                    app._throttle -= 1
+                    self._json(429, {"error": {"code": "TooManyRequests"}}, {"Retry-After": "0"})
+                    return False
+            if not self._authorized():
+                self._json(401, {"error": {"code": "InvalidAuthenticationToken"}})
+                return False
+            return True
+
+        def _message(self, message_id: str) -> dict | None:
+            return next((m for m in app.messages if m["id"] == message_id), None)
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if path == f"/{app.tenant}/oauth2/v2.0/token":
+                form = parse_qs(self._body().decode())
+                if form.get("client_id") != [app.client_id] or form.get("client_secret") != [app.client_secret]:
+                    return self._json(401, {"error": "invalid_client"})
+                token = secrets.token_hex(16)
+                with app._lock:
+                    app.tokens.add(token)
+                    app.token_requests += 1
+                return self._json(200, {"access_token": token, "expires_in": app.token_ttl, "token_type": "Bearer"})
+            match = DRIVE_ITEM_RE.match(unquote(path)[len(GRAPH_PREFIX):])
+            if match and match.group(3) == "createUploadSession":
+                self._body()
+                if not self._graph_guard():
+                    return
+                session_id = secrets.token_hex(8)
+                with app._lock:
+                    app.sessions[session_id] = {"path": match.group(2), "data": bytearray()}
+                    app.sessions_created += 1
+                expires = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 3600))
+                return self._json(200, {"uploadUrl": f"{app.origin}/upload/{session_id}",
+                                        "expirationDateTime": expires})
+            self._send(404)
+
+        def _item(self, remote_path: str) -> dict:
+            return {"id": f"item-{remote_path}", "name": remote_path.rsplit("/", 1)[-1],
+                    "size": len(app.drive[remote_path])}
+
+        def do_PUT(self):
+            path = unquote(urlparse(self.path).path)
+            body = self._body()
+            if self._dropped():
+                return
+            if path.startswith("/upload/"):
+                return self._chunk(path[len("/upload/"):], body)
+            match = DRIVE_ITEM_RE.match(path[len(GRAPH_PREFIX):]) if path.startswith(GRAPH_PREFIX) else None
+            if not match or match.group(3) != "content":
+                return self._send(404)
+            if not self._graph_guard():
+                return
+            with app._lock:
+                app.drive[match.group(2)] = body
+                app.simple_uploads += 1
+            self._json(201, self._item(match.group(2)))
+
+        def _chunk(self, session_id: str, body: bytes):
+            """Morceau d'une session : URL pré-authentifiée, octets reçus strictement dans l'ordre"""
+            if self.headers.get("Authorization"):
+                app.external_auth_headers.append(self.headers["Authorization"])
+            with app._lock:
+                session = app.sessions.get(session_id)
+                if session is None:
+                    return self._json(404, {"error": {"code": "itemNotFound"}})
+                app.chunk_requests += 1
+                if app._fail_chunks and not app._fail_after:
+                    app._fail_chunks -= 1
+                    return self._json(500, {"error": {"code": "generalException"}}, {"Retry-After": "0"})
+                start, end, total = map(int, re.match(r"bytes (\d+)-(\d+)/(\d+)",
+                                                      self.headers["Content-Range"]).groups())
+                if start != len(session["data"]) or end - start + 1 != len(body):
+                    return self._json(416, {"error": {"code": "invalidRange"}})
+                session["data"] += body
+                app._fail_after = max(0, app._fail_after - 1)
+                app.bytes_received += len(body)
+                if len(session["data"]) < total:
+                    return self._json(202, {"nextExpectedRanges": [f"{len(session['data'])}-"]})
+                app.drive[session["path"]] = bytes(session["data"])
+                del app.sessions[session_id]
+                item = self._item(session["path"])
+            self._json(201, item)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            path, query = unquote(url.path), parse_qs(url.query)
+            if self._dropped():
+                return
+            if path.startswith("/files/"):
+                name = path[len("/files/"):]
+                if self.headers.get("Authorization"):
+                    app.external_auth_headers.append(self.headers["Authorization"])
+                if name not in app.files:
+                    return self._send(404)
+                return self._send(200, app.files[name], "application/octet-stream",
+                                  {"Content-Disposition": f'attachment; filename="{name}"'})
+            if path.startswith("/upload/"):
+                session = app.sessions.get(path[len("/upload/"):])
+                if session is None:
+                    return self._json(404, {"error": {"code": "itemNotFound"}})
+                return self._json(200, {"nextExpectedRanges": [f"{len(session['data'])}-"]})
+            if not path.startswith(GRAPH_PREFIX):
+                return self._send(404)
+            if not self._graph_guard():
+                return
+            parts = path[len(GRAPH_PREFIX):].strip("/").split("/")
+            # users/{mb}/mailFolders/{folder}/messages/delta
+            if len(parts) == 6 and parts[2] == "mailFolders" and parts[4:] == ["messages", "delta"]:
+                return self._delta(query)
+            if len(parts) == 5 and parts[2] == "mailFolders" and parts[4] == "messages":
+                with app._lock:
+                    app.full_listings += 1
+                return self._json(200, {"value": [m["message"] for m in app.messages]})
+            # users/{mb}/messages/{id}/attachments[/{aid}/$value]
+            if len(parts) >= 5 and parts[2] == "messages" and parts[4] == "attachments":
+                message = self._message(parts[3])
+                if message is None:
+                    return self._json(404, {"error": {"code": "ErrorItemNotFound"}})
+                if len(parts) == 5:
+                    return self._json(200, {"value": [
+                        {"@odata.type": "#microsoft.graph.fileAttachment", "id": a["id"], "name": a["name"],
+                         "size": a["size"]} for a in message["attachments"]]})
+                attachment = next((a for a in message["attachments"] if a["id"] == parts[5]), None)
+                if attachment is None or parts[6:] != ["$value"]:
+                    return self._send(404)
+                return self._send(200, attachment["content"], "application/octet-stream")
+            self._send(404)
+
+        def _delta(self, query: dict):
+            with app._lock:
+                app.delta_requests += 1
+                since = int(query.get("$deltatoken", ["0"])[0])
+                skip = int(query.get("$skiptoken", ["0"])[0])
+                changed = [m for m in app.messages if m["seq"] > since]
+                current = app._seq
+            page = changed[skip:skip + PAGE_SIZE]
+            base = f"{app.base_url}/users/{app.mailbox}/mailFolders/inbox/messages/delta"
+            payload = {"value": [m["message"] for m in page]}
+            if skip + PAGE_SIZE < len(changed):
+                payload["@odata.nextLink"] = f"{base}?$deltatoken={since}&$skiptoken={skip + PAGE_SIZE}"
+            else:
+                payload["@odata.deltaLink"] = f"{base}?$deltatoken={current}"
+            self._json(200, payload)
+
+    return Handler
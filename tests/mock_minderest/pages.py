@@ -0,0 +1,222 @@
+"""Pages HTML du faux Minderest : mêmes sélecteurs que ceux utilisés par MinderestScraper"""
+
+# Liste complète des champs de la liste virtuelle (vue-recycle-scroller) : les champs demandés
+# sont dispersés pour qu'une partie ne soit pas rendue à l'ouverture, comme sur le vrai site
+ALL_FIELDS = [
+    "cli_id", "cli_name", "cli_brand", "cli_ean", "cli_category_level_1", "cli_category_level_2",
+    "cli_category_level_3", "cli_category_level_4", "comp_name", "comp_country", "comp_url",
+    "historical_cli_price", "historical_cli_min_price", "historical_cli_max_price",
+    "historical_cli_avg_price", "historical_cli_cost", "historical_cli_offer", "historical_cli_stock",
+    "historical_cli_avg_stock", "historical_cli_margin", "historical_cli_position",
+    "historical_comp_price", "historical_comp_min_price", "historical_comp_max_price",
+    "historical_comp_offer", "historical_comp_stock", "historical_comp_avg_stock",
+    "historical_comp_shipping", "historical_comp_rating", "historical_price_index",
+]
+DISABLED_FIELDS = ["historical_cli_margin"]
+
+LOGIN_PAGE = """<!doctype html>
+<html lang="fr"><head><meta charset="utf-8"><title>Connexion</title></head>
+<body>
+  <form id="login" method="post" action="/fr/user/login">
+    <label for="username">Email</label>
+    <input id="username" name="username" type="email">
+    <button type="button" id="continue">Continuer</button>
+    <div id="step2" hidden>
+      <label for="password">Mot de passe</label>
+      <input id="password" name="password" type="password">
+      <button type="submit">Sign in</button>
+    </div>
+  </form>
+  <script>
+    document.getElementById('continue').addEventListener('click', () => {
+      setTimeout(() => { document.getElementById('step2').hidden = false; }, 50);
+    });
+  </script>
+</body></html>
+"""
+
+DASHBOARD_PAGE = """<!doctype html>
+<html lang="fr"><head><meta charset="utf-8"><title>Dashboard</title></head>
+<body><h1>Tableau de bord</h1><img src="/static/logo.png" alt="logo"></body></html>
+"""
+
+WIDGET_PAGE = """<!doctype html>
+<html><body><h2>Custom Exports</h2>
+<button aria-label="Close" onclick="parent.postMessage('close-widget', '*')">×</button>
+</body></html>
+"""
+
+EXPORTS_PAGE = """<!doctype html>
+<html lang="fr"><head><meta charset="utf-8"><title>Export historique</title>
+<link rel="stylesheet" href="/static/fonts.css">
+<style>
+  .vue-recycle-scroller { position: relative; height: 256px; width: 360px; overflow-y: auto; border: 1px solid #ccc; }
+  .vue-recycle-scroller__item-wrapper { position: relative; }
+  .vue-recycle-scroller__item-view { position: absolute; left: 0; right: 0; height: 32px; }
+  .daterangepicker { position: absolute; background: #fff; border: 1px solid #ccc; }
+  .drp-calendar { display: inline-block; vertical-align: top; margin: 4px; }
+  td.off { color: #bbb; }
+  td.active { background: #36c; color: #fff; }
+  .toast-success { background: #cfc; }
+  iframe[data-test-id="interactive-frame"] { position: fixed; top: 10px; right: 10px; width: 300px; height: 160px; }
+</style></head>
+<body>
+  <h1>Export historique</h1>
+  <img src="/static/banner.png" alt="" width="10" height="10">
+  <input type="text" placeholder="Entrez un nom" aria-label="Entrez un nom" id="export-name">
+  <div><span>Types d'exportation</span>
+    <button type="button" class="export-type" data-type="summary">Résumé</button>
+    <button type="button" class="export-type" data-type="rows">Lignes</button>
+  </div>
+  <div id="fields-opener" style="cursor:pointer"><span id="selected-count">0</span> items selected</div>
+  <div id="fields-dropdown" hidden>
+    <div class="vue-recycle-scroller" id="scroller">
+      <div class="vue-recycle-scroller__item-wrapper" id="wrapper"></div>
+    </div>
+  </div>
+  <input id="export-historical-calendar" type="text" readonly style="width:240px">
+  <div class="daterangepicker" id="picker" hidden>
+    <div class="drp-calendar left"></div>
+    <div class="drp-calendar right"></div>
+    <div class="drp-buttons"><button type="button" id="apply">Appliquer</button></div>
+  </div>
+  <button type="button" id="request">Requête</button>
+  <div id="toasts"></div>
+  <iframe data-test-id="interactive-frame" src="__WIDGET_URL__"></iframe>
+
+<script>
+const ALL_FIELDS = __ALL_FIELDS__;
+const DISABLED = new Set(__DISABLED_FIELDS__);
+const ITEM_HEIGHT = 32, BUFFER = 2;
+const checked = new Set();
+let exportType = null;
+
+// ---- popup d'onboarding (iframe tierce) ----
+window.addEventListener('message', (e) => {
+  if (e.data === 'close-widget') document.querySelector('[data-test-id="interactive-frame"]').remove();
+});
+
+// ---- type d'export ----
+document.querySelectorAll('.export-type').forEach(b => b.addEventListener('click', () => { exportType = b.dataset.type; }));
+
+// ---- liste virtuelle : seuls les éléments visibles (+ tampon) existent dans le DOM ----
+const scroller = document.getElementById('scroller');
+const wrapper = document.getElementById('wrapper');
+wrapper.style.height = (ALL_FIELDS.length * ITEM_HEIGHT) + 'px';
+function renderList() {
+  const first = Math.max(0, Math.floor(scroller.scrollTop / ITEM_HEIGHT) - BUFFER);
+  const last = Math.min(ALL_FIELDS.length, Math.ceil((scroller.scrollTop + scroller.clientHeight) / ITEM_HEIGHT) + BUFFER);
+  wrapper.innerHTML = '';
+  for (let i = first; i < last; i++) {
+    const name = ALL_FIELDS[i];
+    const view = document.createElement('div');
+    view.className = 'vue-recycle-scroller__item-view';
+    view.style.transform = `translateY(${i * ITEM_HEIGHT}px)`;
+    view.innerHTML = `<label><input type="checkbox" id="${name}"> ${name}</label>`;
+    const box = view.querySelector('input');
+    box.checked = checked.has(name);
+    box.disabled = DISABLED.has(name);
+    box.addEventListener('change', () => {
+      box.checked ? checked.add(name) : checked.delete(name);
+      document.getElementById('selected-count').textContent = checked.size;
+    });
+    wrapper.appendChild(view);
+  }
+}
+scroller.addEventListener('scroll', renderList);
+document.getElementById('fields-opener').addEventListener('click', () => {
+  document.getElementById('fields-dropdown').hidden = false;
+  renderList();
+});
+document.addEventListener('keydown', (e) => {
+  if (e.key === 'Escape') document.getElementById('fields-dropdown').hidden = true;
+});
+
+// ---- calendrier façon daterangepicker ----
+const MONTHS = ['janv.', 'févr.', 'mars', 'avr.', 'mai', 'juin', 'juil.', 'août', 'sept.', 'oct.', 'nov.', 'déc.'];
+const picker = document.getElementById('picker');
+const input = document.getElementById('export-historical-calendar');
+const today = new Date();
+let left = new Date(today.getFullYear(), today.getMonth(), 1);
+let start = null, end = null;
+const pad = (n) => String(n).padStart(2, '0');
+const fmt = (d) => `${pad(d.getDate())}/${pad(d.getMonth() + 1)}/${d.getFullYear()}`;
+const iso = (d) => `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+const same = (a, b) => a && b && a.getTime() === b.getTime();
+
+function renderMonth(container, month, side) {
+  const year = month.getFullYear(), m = month.getMonth();
+  const firstDay = new Date(year, m, 1);
+  const offset = (firstDay.getDay() + 6) % 7;
+  let html = '<table><thead><tr>';
+  html += side === 'left' ? '<th class="prev available"><span>‹</span></th>' : '<th></th>';
+  html += `<th colspan="5" class="month">${MONTHS[m]} ${year}</th>`;
+  html += side === 'right' ? '<th class="next available"><span>›</span></th>' : '<th></th>';
+  html += '</tr></thead><tbody>';
+  let day = new Date(year, m, 1 - offset);
+  for (let w = 0; w < 6; w++) {
+    html += '<tr>';
+    for (let d = 0; d < 7; d++) {
+      const cls = [day.getMonth() === m ? 'available' : 'off available'];
+      if (same(day, start) || same(day, end)) cls.push('active');
+      html += `<td class="${cls.join(' ')}" data-date="${iso(day)}">${day.getDate()}</td>`;
+      day = new Date(day.getFullYear(), day.getMonth(), day.getDate() + 1);
+    }
+    html += '</tr>';
+  }
+  container.innerHTML = html + '</tbody></table>';
+}
+function renderCalendars() {
+  renderMonth(picker.querySelector('.left'), left, 'left');
+  renderMonth(picker.querySelector('.right'), new Date(left.getFullYear(), left.getMonth() + 1, 1), 'right');
+}
+// Re-rendu asynchrone (comme Vue/jQuery) : le scraper doit attendre le DOM, pas un délai fixe
+picker.addEventListener('click', (e) => {
+  const target = e.target.closest('th.prev, th.next, td.available');
+  if (!target) return;
+  if (target.matches('th.prev')) left = new Date(left.getFullYear(), left.getMonth() - 1, 1);
+  else if (target.matches('th.next')) left = new Date(left.getFullYear(), left.getMonth() + 1, 1);
+  else {
+    const [y, m, d] = target.dataset.date.split('-').map(Number);
+    const date = new Date(y, m - 1, d);
+    if (!start || end) { start = date; end = null; }
+    else if (date < start) { start = date; }
+    else { end = date; }
+  }
+  setTimeout(renderCalendars, 30);
+});
+input.addEventListener('click', () => { picker.hidden = false; renderCalendars(); });
+input.removeAttribute('readonly');
+input.addEventListener('keyup', (e) => {
+  const match = input.value.match(/^(\\d{2})\\/(\\d{2})\\/(\\d{4}) - (\\d{2})\\/(\\d{2})\\/(\\d{4})$/);
+  if (e.key === 'Enter' && match) {
+    start = new Date(+match[3], +match[2] - 1, +match[1]);
+    end = new Date(+match[6], +match[5] - 1, +match[4]);
+  }
+});
+document.getElementById('apply').addEventListener('click', () => {
+  if (start && end) input.value = `${fmt(start)} - ${fmt(end)}`;
+  picker.hidden = true;
+});
+
+// ---- soumission : XHR vers l'API d'export puis toast ----
+document.getElementById('request').addEventListener('click', async () => {
+  const [from, to] = input.value.split(' - ');
+  const response = await fetch('/fr/api/exports/historical', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json', 'X-CSRF-Token': 'mock-csrf'},
+    body: JSON.stringify({
+      name: document.getElementById('export-name').value,
+      type: exportType,
+      fields: ALL_FIELDS.filter(f => checked.has(f)),
+      period: {from, to},
+    }),
+  });
+  const toast = document.createElement('div');
+  toast.className = response.ok ? 'toast-success' : 'toast-error';
+  toast.textContent = response.ok ? 'Requête envoyée' : 'Erreur';
+  document.getElementById('toasts').appendChild(toast);
+});
+</script>
+</body></html>
+"""
@@ -0,0 +1,162 @@
+"""Serveur local imitant Minderest pour les tests (aucun accès au vrai site ni identifiants réels)"""
+import json
+import secrets
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from tests.mock_minderest.pages import (
+    ALL_FIELDS, DASHBOARD_PAGE, DISABLED_FIELDS, EXPORTS_PAGE, LOGIN_PAGE, WIDGET_PAGE,
+)
+
+PREFIX = "/fr"
+EXPORT_API_PATH = f"{PREFIX}/api/exports/historical"
+SESSION_COOKIE = "MINDEREST_SESSID"
+# Ressources "lourdes" servies avec une vraie taille, pour mesurer l'effet du blocage
+STATIC_SIZES = {"/static/logo.png": 40_000, "/static/banner.png": 120_000, "/static/fonts.css": 20_000}
+
+
+class MockMinderest:
+    """Application Minderest factice sur 127.0.0.1, port libre
+
+    - latency : secondes ajoutées à chaque réponse (float) ou par chemin ({"/fr/dashboard": 0.2})
+    - received_exports : corps JSON des exports reçus par l'endpoint API
+    - logins : nombre de connexions réussies (pour vérifier la réutilisation de session)
+
+    Pages : /fr/user/login (2 étapes), /fr/dashboard, /fr/exports/historical (popup iframe servie
+    depuis "localhost" = domaine tiers, liste vue-recycle-scroller virtuelle, calendrier, toast).
+    """
+
+    def __init__(self, email: str = "user@example.com", password: str = "secret", latency=0.0):
+        self.email = email
+        self.password = password
+        self.latency = latency
+        self.sessions: set[str] = set()
+        self.received_exports: list[dict] = []
+        self.logins = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def origin(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        """Équivalent de settings.MINDEREST_BASE_URL"""
+        return f"{self.origin}{PREFIX}"
+
+    def start(self) -> "MockMinderest":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def issue_session(self) -> str:
+        token = secrets.token_hex(16)
+        with self._lock:
+            self.sessions.add(token)
+        return token
+
+    def expire_sessions(self):
+        with self._lock:
+            self.sessions.clear()
+
+    def delay(self, path: str):
+        latency = self.latency.get(path, 0.0) if isinstance(self.latency, dict) else self.latency
+        if latency:
+            time.sleep(latency)
+
+
+def _make_handler(app: MockMinderest):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        # ---- utilitaires ----
+        def _session(self) -> str | None:
+            cookie = SimpleCookie(self.headers.get("Cookie", ""))
+            token = cookie[SESSION_COOKIE].value if SESSION_COOKIE in cookie else None
+            return token if token in app.sessions else None
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8",
+                  headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, payload):
+            self._send(status, json.dumps(payload).encode(), "application/json")
+
+        def _redirect(self, location: str, headers: dict = None):
+            self._send(302, headers={"Location": location, **(headers or {})})
+
+        # ---- routes ----
+        def do_GET(self):
+            path = urlparse(self.path).path
+            app.delay(path)
+            if path == f"{PREFIX}/user/login":
+                return self._send(200, LOGIN_PAGE.encode())
+            if path in (f"{PREFIX}/dashboard", f"{PREFIX}/exports/historical"):
+                if not self._session():
+                    return self._redirect(f"{PREFIX}/user/login")
+                if path.endswith("/dashboard"):
+                    return self._send(200, DASHBOARD_PAGE.encode())
+                port = self.server.server_address[1]
+                page = (EXPORTS_PAGE
+                        .replace("__WIDGET_URL__", f"http://localhost:{port}/widget")
+                        .replace("__ALL_FIELDS__", json.dumps(ALL_FIELDS))
+                        .replace("__DISABLED_FIELDS__", json.dumps(DISABLED_FIELDS)))
+                return self._send(200, page.encode())
+            if path == "/widget":
+                return self._send(200, WIDGET_PAGE.encode())
+            if path in STATIC_SIZES:
+                content_type = "text/css" if path.endswith(".css") else "image/png"
+                return self._send(200, b"\0" * STATIC_SIZES[path], content_type)
+            self._send(404)
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            app.delay(path)
+            if path == f"{PREFIX}/user/login":
+                form = parse_qs(self._body().decode())
+                if form.get("username") == [app.email] and form.get("password") == [app.password]:
+                    token = app.issue_session()
+                    with app._lock:
+                        app.logins += 1
+                    return self._redirect(f"{PREFIX}/dashboard",
+                                          {"Set-Cookie": f"{SESSION_COOKIE}={token}; Path=/; HttpOnly"})
+                return self._redirect(f"{PREFIX}/user/login?error=1")
+            if path == EXPORT_API_PATH:
+                body = self._body()
+                if not self._session():
+                    return self._json(401, {"error": "unauthenticated"})
+                with app._lock:
+                    app.received_exports.append(json.loads(body or b"{}"))
+                return self._json(200, {"status": "queued"})
+            self._send(404)
+
+    return Handler
@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.historique.aggregates import RollingAggregates
+
+START = date(2025, 1, 1)
+
+
+def day_frame(day_offset, comp_price, cli_price=10.0, comp_stock=5.0):
+    return pd.DataFrame({
+        "product_id": ["SKU1"], "competitor": ["A"], "comp_country": ["FR"],
+        "date": [START + timedelta(days=day_offset)],
+        "historical_comp_offer": [comp_price], "historical_cli_price": [cli_price],
+        "historical_comp_stock": [comp_stock], "historical_cli_stock": [1.0],
+    })
+
+
+def recompute(prices, window):
+    values = [p for p in prices[-window:] if p is not None and not np.isnan(p)]
+    return np.mean(values), min(values), max(values)
+
+
+def test_incremental_update_matches_full_recompute(tmp_path):
+    aggregates = RollingAggregates(tmp_path, windows=(7, 30))
+    rng = np.random.default_rng(0)
+    prices = []
+    for offset in range(60):
+        price = float(rng.uniform(5, 15)) if offset % 11 else np.nan   # jours sans prix
+        prices.append(price)
+        aggregates.apply_day(START + timedelta(days=offset), day_frame(offset, price, comp_stock=offset % 3))
+
+    row = aggregates.snapshot().iloc[0]
+    for window in (7, 30):
+        avg, low, high = recompute(prices, window)
+        assert np.isclose(row[f"avg_price_{window}d"], avg, rtol=1e-5)
+        assert np.isclose(row[f"min_price_{window}d"], low) and np.isclose(row[f"max_price_{window}d"], high)
+    assert np.isclose(row["comp_stockout_rate_30d"], np.mean([o % 3 == 0 for o in range(30, 60)]))
+
+
+def test_late_correction_and_persistence(tmp_path):
+    aggregates = RollingAggregates(tmp_path, windows=(7,))
+    for offset in range(10):
+        aggregates.apply_day(START + timedelta(days=offset), day_frame(offset, 10.0))
+    aggregates.apply_day(START + timedelta(days=8), day_frame(8, 17.0))   # correction d'un jour déjà intégré
+    aggregates.save()
+
+    row = RollingAggregates.load(tmp_path, windows=(7,)).snapshot().iloc[0]
+    assert np.isclose(row["avg_price_7d"], 11.0)
+    assert row["max_price_7d"] == 17.0
+    assert np.isclose(row["price_index_7d"], 10.0 / 11.0 * 100, rtol=1e-5)
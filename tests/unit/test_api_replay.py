@@ -0,0 +1,115 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from src.minderest.api_replay import AuthExpiredError, ExportApiClient, ExportRequestTemplate
+from src.minderest.calendar import DateRange
+from tests.mock_minderest.server import EXPORT_API_PATH, SESSION_COOKIE, MockMinderest
+
+CAPTURED_RANGE = DateRange(date(2024, 10, 18), date(2025, 10, 17))
+CAPTURED_FIELDS = ["historical_cli_price", "historical_comp_stock"]
+
+
+@pytest.fixture
+def mock():
+    with MockMinderest() as app:
+        yield app
+
+
+def _captured_template(mock, token, fields=CAPTURED_FIELDS):
+    """Simule ce que capture_export_template relève dans le navigateur"""
+    post_data = json.dumps({
+        "name": "Exports_Minderset_18-10-2025_09h00s",
+        "type": "rows",
+        "fields": fields,
+        "period": {"from": "18/10/2024", "to": "17/10/2025"},
+    })
+    headers = {
+        "Content-Type": "application/json",
+        "Cookie": f"{SESSION_COOKIE}={token}",
+        "sec-fetch-mode": "cors",
+    }
+    return ExportRequestTemplate.from_capture(
+        mock.origin + EXPORT_API_PATH, "post", headers, post_data,
+        "Exports_Minderset_18-10-2025_09h00s", fields, CAPTURED_RANGE,
+    )
+
+
+def test_template_locates_and_renders_parameters(mock):
+    template = _captured_template(mock, mock.issue_session())
+
+    assert template.name_paths == [["name"]]
+    assert template.fields_paths == [["fields"]]
+    assert template.date_format == "%d/%m/%Y"
+    assert "cookie" in template.auth_headers and "sec-fetch-mode" not in template.headers
+
+    rendered = template.render("autre_nom", ["historical_cli_cost"], DateRange(date(2026, 1, 1), date(2026, 1, 31)))
+    body = json.loads(rendered["content"])
+    assert body == {
+        "name": "autre_nom",
+        "type": "rows",
+        "fields": ["historical_cli_cost"],
+        "period": {"from": "01/01/2026", "to": "31/01/2026"},
+    }
+
+
+def test_template_captured_with_a_single_field_substitutes_fields(mock):
+    template = _captured_template(mock, mock.issue_session(), fields=["historical_cli_price"])
+
+    assert template.fields_paths == [["fields"]]
+    body = json.loads(template.render("x", ["historical_cli_cost", "historical_cli_stock"])["content"])
+    assert body["fields"] == ["historical_cli_cost", "historical_cli_stock"]
+
+
+def test_submit_many_over_pooled_client(mock):
+    template = _captured_template(mock, mock.issue_session())
+    with ExportApiClient(template, max_connections=4) as client:
+        results = client.submit_many([{"file_name": f"export_{i}"} for i in range(20)])
+
+    assert all(ok for ok, _ in results)
+    assert sorted(e["name"] for e in mock.received_exports) == sorted(f"export_{i}" for i in range(20))
+
+
+def test_expired_auth_is_refreshed_once(mock):
+    template = _captured_template(mock, mock.issue_session())
+    mock.expire_sessions()
+    calls = []
+
+    def refresher(names):
+        calls.append(names)
+        return {"cookie": f"{SESSION_COOKIE}={mock.issue_session()}"}
+
+    with ExportApiClient(template, auth_refresher=refresher) as client:
+        client.submit("apres_expiration")
+        client.submit("session_reutilisee")
+
+    assert len(calls) == 1
+    assert [e["name"] for e in mock.received_exports] == ["apres_expiration", "session_reutilisee"]
+
+
+def test_concurrent_auth_failures_trigger_a_single_refresh(mock):
+    template = _captured_template(mock, mock.issue_session())
+    mock.expire_sessions()
+    calls = []
+
+    def refresher(names):
+        calls.append(names)
+        time.sleep(0.2)      # login navigateur : les autres threads reçoivent leur 401 pendant ce temps
+        return {"cookie": f"{SESSION_COOKIE}={mock.issue_session()}"}
+
+    with ExportApiClient(template, auth_refresher=refresher, max_connections=8) as client:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(client.submit, [f"export_{i}" for i in range(8)]))
+
+    assert len(calls) == 1
+    assert len(mock.received_exports) == 8
+
+
+def test_expired_auth_without_refresher_raises(mock):
+    template = _captured_template(mock, mock.issue_session())
+    mock.expire_sessions()
+    with ExportApiClient(template) as client, pytest.raises(AuthExpiredError):
+        client.submit("refuse")
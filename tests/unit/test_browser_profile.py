@@ -0,0 +1,31 @@
+import pytest
+
+from src.config.settings import settings
+from src.minderest.browser import BrowserProfile
+
+
+def test_throughput_profile_is_headless_and_lightweight():
+    profile = BrowserProfile.from_settings("throughput")
+
+    launch = profile.launch_options()
+    assert launch["headless"] and launch["slow_mo"] == 0
+    assert "--start-maximized" not in launch["args"] and "--disable-gpu" in launch["args"]
+    assert profile.context_options()["reduced_motion"] == "reduce"
+    assert profile.block_resources and not profile.trace
+
+
+def test_environment_overrides_apply_on_top_of_profile(monkeypatch):
+    monkeypatch.setattr(settings, "HEADLESS", "true")
+    monkeypatch.setattr(settings, "BROWSER_VIEWPORT", "1366x768")
+    monkeypatch.setattr(settings, "BLOCK_RESOURCES", "false")
+
+    profile = BrowserProfile.from_settings("default")
+
+    assert profile.headless and not profile.block_resources
+    assert profile.context_options()["viewport"] == {"width": 1366, "height": 768}
+    assert BrowserProfile.from_settings("debug", headless=False).headless is False
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(KeyError, match="throughput"):
+        BrowserProfile.from_settings("turbo")
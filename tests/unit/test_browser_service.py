@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from src.minderest.browser_service import BrowserService
+
+
+class FakeProcess:
+    pid = 4242
+
+    def poll(self):
+        return None
+
+
+class StubService(BrowserService):
+    """Service sans Chromium : lancement / arrêt comptés, mémoire fixée par le test"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.launches = 0
+        self.memory = 100.0
+
+    def _launch(self):
+        self.launches += 1
+        self.process = FakeProcess()
+        self.jobs_served = 0
+
+    def _kill(self):
+        self.process = None
+
+    def memory_mb(self):
+        return self.memory
+
+
+@pytest.fixture
+def service():
+    service = StubService(max_jobs=2, max_memory_mb=1000, lease_ttl=60)
+    service._launch()
+    return service
+
+
+def test_recycles_after_max_jobs_once_leases_are_released(service):
+    first = service.acquire()
+    second = service.acquire()
+    assert service.launches == 1 and len(service.active_leases) == 2
+
+    releaser = threading.Timer(0.1, lambda: [service.release(first["lease_id"]), service.release(second["lease_id"])])
+    releaser.start()
+    third = service.acquire(timeout=5)
+
+    assert service.launches == 2
+    assert list(service.active_leases) == [third["lease_id"]]
+
+
+def test_recycles_on_memory_threshold(service):
+    service.release(service.acquire()["lease_id"])
+    service.memory = 5000
+
+    service.acquire()
+
+    assert service.launches == 2
+
+
+def test_lease_of_crashed_client_expires_instead_of_blocking_recycle(service):
+    service.lease_ttl = 0.2
+    service.acquire()
+    service.acquire()                         # jamais rendus : client planté
+
+    service.acquire(timeout=5)
+
+    assert service.launches == 2 and len(service.active_leases) == 1
+
+
+def test_renewed_lease_is_kept_and_blocks_until_timeout(service):
+    service.lease_ttl = 0.3
+    held = service.acquire()["lease_id"]
+    service.acquire()
+    stop = threading.Event()
+
+    def keep_alive():
+        while not stop.wait(0.05):
+            service.renew(held)
+
+    threading.Thread(target=keep_alive, daemon=True).start()
+    try:
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            service.acquire(timeout=0.8)
+        assert time.monotonic() - started >= 0.8
+        assert held in service.active_leases and service.launches == 1
+    finally:
+        stop.set()
+    assert service.renew("inconnu") is False
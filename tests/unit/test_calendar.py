@@ -0,0 +1,42 @@
+from datetime import date
+
+import pytest
+
+from src.minderest.calendar import DateRange, month_delta, parse_month_header
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("nov. 2025", (2025, 11)),
+    ("Novembre 2025", (2025, 11)),
+    ("juil. 2024", (2024, 7)),
+    ("Mars 2025", (2025, 3)),
+    ("Août 2023", (2023, 8)),
+    ("déc. 2024", (2024, 12)),
+    ("September 2025", (2025, 9)),
+])
+def test_parse_month_header_french_and_english(text, expected):
+    assert parse_month_header(text) == expected
+
+
+def test_parse_month_header_without_year_uses_most_recent_past_month():
+    today = date(2025, 3, 15)
+    assert parse_month_header("Mars", today) == (2025, 3)
+    assert parse_month_header("Nov", today) == (2024, 11)
+    assert parse_month_header("", today) is None
+    assert parse_month_header("Calendrier", today) is None
+
+
+def test_month_delta_across_years():
+    assert month_delta((2025, 10), date(2024, 10, 18)) == -12
+    assert month_delta((2024, 12), date(2025, 1, 1)) == 1
+    assert month_delta((2025, 3), date(2025, 3, 31)) == 0
+
+
+def test_date_range_bounds_and_last_days():
+    window = DateRange.last_days(365, today=date(2025, 10, 18))
+
+    assert window == DateRange(date(2024, 10, 18), date(2025, 10, 17))
+    assert window.days == 365
+    assert DateRange(date(2025, 1, 1), date(2025, 1, 1)).days == 1
+    with pytest.raises(ValueError):
+        DateRange(date(2025, 1, 2), date(2025, 1, 1))
@@ -0,0 +1,65 @@
+import pandas as pd
+
+from src.historique.cdc import ChangeCapture, read_changes
+from src.historique.store import HistoryStore, ingest_exports
+from src.minderest.watermark import SyncWatermark
+
+
+def export(days, prices, products=("SKU1", "SKU2")):
+    rows = [(p, d, price) for d, price in zip(days, prices) for p in products]
+    return pd.DataFrame({
+        "product_id": [r[0] for r in rows],
+        "competitor": "A",
+        "comp_country": "FR",
+        "date": pd.to_datetime([r[1] for r in rows]),
+        "historical_comp_offer": [r[2] for r in rows],
+    })
+
+
+def run(directory, store, frame):
+    store.append(frame, "maison")
+    capture = ChangeCapture(directory)
+    capture.process(frame)
+    return capture.finish(store, "maison")
+
+
+def test_only_changes_are_logged(tmp_path):
+    store = HistoryStore(tmp_path / "dataset")
+    first = run(tmp_path / "cdc", store, export(["2025-01-01", "2025-01-02"], [10.0, 11.0]))
+    assert (first.inserted, first.changed, first.removed) == (4, 0, 0)
+
+    second = export(["2025-01-01", "2025-01-02"], [10.0, 12.0], products=("SKU1",))
+    stats = run(tmp_path / "cdc", store, second)
+
+    assert (stats.inserted, stats.changed, stats.removed, stats.unchanged) == (0, 1, 2, 1)
+    changes = read_changes(stats.changelog).astype({"op": str}).sort_values(["op", "date"])
+    assert changes["op"].tolist() == ["D", "D", "U"]
+    assert set(changes.loc[changes["op"] == "D", "product_id"]) == {"SKU2"}
+    assert changes.loc[changes["op"] == "U", "historical_comp_offer"].tolist() == [12.0]
+
+
+def test_delta_export_does_not_remove_days_it_does_not_cover(tmp_path):
+    store = HistoryStore(tmp_path / "dataset")
+    run(tmp_path / "cdc", store, export(["2025-01-01", "2025-01-02"], [10.0, 11.0]))
+
+    stats = run(tmp_path / "cdc", store, export(["2025-01-03"], [13.0]))
+
+    assert (stats.inserted, stats.removed, stats.unchanged) == (2, 0, 0)
+    # Ré-ingestion identique : aucun journal écrit
+    assert run(tmp_path / "cdc", store, export(["2025-01-03"], [13.0])).changelog is None
+
+
+def test_back_to_back_ingestions_keep_one_changelog_each(tmp_path):
+    paths = []
+    for index in range(2):
+        path = tmp_path / f"export_{index}.csv"
+        path.write_text("ID;Concurrent;Pays;Date;historical_comp_offer\n"
+                        f"SKU{index};A;FR;01/05/2025;10\n", encoding="utf-8")
+        paths.append(path)
+    store = HistoryStore(tmp_path / "dataset")
+
+    ingest_exports(paths, "maison", "a@example.com", store, SyncWatermark(tmp_path), workers=1)
+
+    changelogs = sorted(store.cdc_dir("maison").glob("changes-*.parquet"))
+    assert len(changelogs) == 2
+    assert sorted(read_changes(p)["product_id"].iloc[0] for p in changelogs) == ["SKU0", "SKU1"]
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning.cleaning import CleaningReport, clean_batch, flag_outliers, parse_prices, parse_stock
+
+
+def test_french_prices_and_stock_flags():
+    prices = parse_prices(pd.Series(["1 234,56 €", "1.234,56", "12.5", None, "n/a"], dtype=object))
+    np.testing.assert_allclose(prices.to_numpy()[:3], [1234.56, 1234.56, 12.5], rtol=1e-6)
+    assert prices.isna().tolist()[3:] == [True, True]
+    assert parse_stock(pd.Series(["En stock", "Rupture", "12", None], dtype=object)).tolist()[:3] == [1, 0, 12]
+
+
+def test_clean_batch_flags_bounds_fills_gaps_and_outliers():
+    frame = pd.DataFrame({
+        "product_id": ["P1"] * 4 + ["P2"] * 3,
+        "competitor": ["A", "A", "B", "C", "A", "B", "C"],
+        "comp_country": "FR",
+        "date": pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-01", "2025-01-01"] + ["2025-01-01"] * 3),
+        "historical_cli_min_price": ["10,00 €", "9", "10", "10", "5", "5", "5"],
+        "historical_cli_avg_price": [12, 8, 12, 12, 6, 6, 6],
+        "historical_cli_max_price": [15, 10, 15, 15, 7, 7, 7],
+        "historical_comp_offer": ["11,50 €", None, "12", "99", "6", "6,2", "5,9"],
+    })
+
+    cleaned, report = clean_batch(frame)
+
+    assert cleaned["invalid_bounds"].tolist() == [False, True, False, False, False, False, False]
+    # P1/A le 02/01 : prix concurrent manquant repris de la veille
+    assert cleaned.loc[1, "historical_comp_offer"] == np.float32(11.5)
+    assert bool(cleaned.loc[1, "filled"])
+    assert cleaned["comp_outlier"].tolist() == [False, False, False, True, False, False, False]
+    assert (report.invalid_bounds, report.outliers, report.rows) == (1, 1, 7)
+
+
+def test_outliers_in_small_groups_use_client_price_or_the_other_competitor():
+    frame = pd.DataFrame({
+        "product_id": ["P1", "P1", "P2", "P2"],
+        "date": pd.to_datetime(["2025-01-01"] * 4),
+        "historical_comp_offer": [10.0, 100.0, 10.0, 11.0],
+        "historical_cli_price": [np.nan, np.nan, 10.5, 10.5],
+    })
+
+    flagged = flag_outliers(frame, CleaningReport(rows=4), ratio=3)["comp_outlier"].tolist()
+
+    # P1 : médiane 55 avec le prix testé -> rien ; sans lui, 10 et 100 sont à 10x l'un de l'autre
+    assert flagged == [True, True, False, False]
+
+    frame.loc[1, "historical_cli_price"] = frame.loc[0, "historical_cli_price"] = 10.0
+    assert flag_outliers(frame, CleaningReport(rows=4), ratio=3)["comp_outlier"].tolist() == [False, True, False, False]
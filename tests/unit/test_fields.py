@@ -0,0 +1,38 @@
+import pytest
+
+from src.minderest.fields import FieldSelectionError, FieldSelectionReport, field_spec
+
+
+def test_field_spec_splits_has_text_selectors():
+    assert field_spec("historical_cli_price") == {"css": "#historical_cli_price", "text": None}
+    assert field_spec("stock") == {"css": "div.filter", "text": "Stock"}
+    assert field_spec("my_price_before_offer") == {"css": "div.filter", "text": "My Price before offer"}
+    # Champ inconnu de FIELD_SELECTORS : id du même nom
+    assert field_spec("historical_new_field") == {"css": "#historical_new_field", "text": None}
+
+
+def test_report_from_js_classifies_statuses():
+    payload = {"scrolls": 4, "report": {
+        "a": {"status": "checked"},
+        "b": {"status": "already_checked"},
+        "c": {"status": "disabled"},
+        "d": {"status": "invalid_selector", "error": "SyntaxError: bad selector"},
+    }}
+    report = FieldSelectionReport.from_js(["a", "b", "c", "d", "e"], payload)
+
+    assert report.results["e"] == "not_found"        # absent du rapport JS
+    assert report.selected == ["a", "b"]
+    assert report.disabled == ["c"]
+    assert report.missing == ["d", "e"]
+    assert not report.complete
+    assert report.errors == {"d": "SyntaxError: bad selector"}
+    assert report.as_dict() == {"results": report.results, "scrolls": 4}
+
+
+def test_selection_error_lists_missing_fields():
+    report = FieldSelectionReport(results={"a": "checked", "b": "failed", "c": "not_found", "d": "disabled"})
+
+    with pytest.raises(FieldSelectionError, match="Champs non selectionnes : b, c") as raised:
+        raise FieldSelectionError(report)
+    assert raised.value.report is report
+    assert FieldSelectionReport(results={"a": "checked", "d": "disabled"}).complete
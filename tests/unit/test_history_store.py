@@ -0,0 +1,119 @@
+from datetime import date
+
+import pandas as pd
+from openpyxl import Workbook
+
+from src.config.settings import settings
+from src.historique.store import HistoryStore, ingest_export, ingest_exports
+from src.minderest.calendar import DateRange
+from src.minderest.watermark import SyncWatermark
+
+
+def frame(days, price):
+    return pd.DataFrame({
+        "product_id": "SKU1",
+        "competitor": pd.Categorical(["A"] * len(days)),
+        "comp_country": "FR",
+        "date": pd.to_datetime(days),
+        "historical_comp_offer": price,
+    })
+
+
+def test_append_is_idempotent_and_latest_value_wins(tmp_path):
+    store = HistoryStore(tmp_path / "dataset")
+    store.append(frame(["2025-01-30", "2025-01-31", "2025-02-01"], 10.0), "Maison")
+    stats = store.append(frame(["2025-01-31", "2025-02-01"], 12.0), "Maison")
+
+    assert stats.replaced == 2
+    history = store.read(product_ids=["SKU1"]).sort_values("date")
+    assert history["historical_comp_offer"].tolist() == [10.0, 12.0, 12.0]
+    assert sorted(history["month"].unique()) == ["2025-01", "2025-02"]
+
+    january = store.read(start=date(2025, 1, 1), end=date(2025, 1, 31), catalogue="maison")
+    assert len(january) == 2
+
+
+def test_compaction_merges_small_files(tmp_path):
+    store = HistoryStore(tmp_path / "dataset")
+    for day in range(1, 5):
+        store.append(frame([f"2025-03-0{day}"], float(day)), "maison")
+    partition = store.partition_dir("maison", "2025-03")
+    assert len(list(partition.glob("*.parquet"))) == 4
+
+    assert store.compact(min_files=2) == 1
+    assert len(list(partition.glob("*.parquet"))) == 1
+    assert len(store.read()) == 4
+
+
+def test_ingest_export_skips_known_files_and_moves_watermark(tmp_path):
+    path = tmp_path / "export.xlsx"
+    workbook = Workbook()
+    workbook.active.append(["ID", "Concurrent", "Pays", "Date", "historical_comp_offer"])
+    for day in range(1, 4):
+        workbook.active.append(["SKU1", "A", "FR", f"0{day}/04/2025", "9,90 €"])
+    workbook.save(path)
+    store = HistoryStore(tmp_path / "dataset")
+    watermark = SyncWatermark(tmp_path)
+    watermark.mark_stored("a@example.com", DateRange(date(2024, 4, 1), date(2025, 3, 31)), full=True)
+
+    assert ingest_export(path, "maison", "a@example.com", store, watermark).rows == 3
+    assert ingest_export(path, "maison", "a@example.com", store, watermark).rows == 0
+    assert watermark.covered_until("a@example.com") == date(2025, 4, 3)
+
+
+def test_sku_history_uses_index_and_follows_rewrites(tmp_path):
+    store = HistoryStore(tmp_path / "dataset", row_group_rows=3)
+    rows = pd.DataFrame({
+        "product_id": [f"SKU{i % 5}" for i in range(40)],
+        "competitor": "A",
+        "comp_country": "FR",
+        "date": pd.Timestamp("2025-01-01") + pd.to_timedelta([i // 5 for i in range(40)], unit="D"),
+        "historical_comp_offer": [float(i) for i in range(40)],
+    })
+    store.append(rows, "maison")
+    store.append(frame(["2025-01-02"], 99.0).assign(product_id="SKU3"), "maison")
+
+    history = store.sku_history("SKU3", catalogue="maison")
+    assert len(history) == 8
+    assert set(history["product_id"]) == {"SKU3"}
+    assert 99.0 in history["historical_comp_offer"].tolist()
+
+    assert len(store.sku_history("SKU3", start=date(2025, 1, 3), end=date(2025, 1, 4))) == 2
+    assert store.index.rebuild() == 1
+    assert len(store.sku_history("SKU3")) == 8
+
+
+def test_parallel_ingestion_matches_sequential_order(tmp_path):
+    paths = []
+    for index, price in enumerate(["9,90 €", "10,50 €", "11,00 €"]):
+        path = tmp_path / f"export_{index}.csv"
+        # Mêmes clés dans les trois fichiers : le dernier de la liste doit l'emporter
+        path.write_text("ID;Concurrent;Pays;Date;historical_comp_offer\n"
+                        f"SKU1;A;FR;01/05/2025;{price}\nSKU{index + 2};A;FR;02/05/2025;1\n", encoding="utf-8")
+        paths.append(path)
+    store = HistoryStore(tmp_path / "dataset")
+
+    stats = ingest_exports(paths, "maison", "a@example.com", store, SyncWatermark(tmp_path), workers=2)
+
+    assert stats.rows == 6
+    history = store.read().sort_values(["product_id", "date"])
+    assert history["historical_comp_offer"].round(2).tolist() == [11.0, 1.0, 1.0, 1.0]
+    assert ingest_exports(paths, "maison", "a@example.com", store, SyncWatermark(tmp_path), workers=2).rows == 0
+
+
+def test_parallel_ingestion_of_multi_batch_export_with_late_filled_column(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "READER_BATCH_ROWS", 4_000)
+    path = tmp_path / "export.csv"
+    # Catégorie vide dans tout le premier lot, renseignée ensuite ; colonne inconnue en texte libre
+    lines = ["ID;Concurrent;Pays;categorie_niveau_4;Date;historical_comp_offer;commentaire"]
+    lines += [f"SKU{i};A;FR;{'' if i < 4_000 else 'Rayon'};01/05/2025;{i % 50},90 €;{i if i % 2 else 'n/a'}"
+              for i in range(12_000)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    store = HistoryStore(tmp_path / "dataset")
+
+    stats = ingest_exports([path], "maison", "a@example.com", store, SyncWatermark(tmp_path), workers=1)
+
+    assert stats.rows == 12_000
+    history = store.read()
+    assert len(history) == 12_000
+    assert history["cli_category_level_4"].notna().sum() == 8_000
@@ -0,0 +1,112 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+
+import pytest
+
+from src.config.settings import settings
+from src.graph_api.mail import EXPORT_NAME_RE
+from src.minderest.browser import export_file_name
+from src.minderest.orchestrator import ExportResult
+from src.scheduler.queue import DEFAULT_NAME_TEMPLATE, JobQueue, render_file_name
+from src.scheduler.scheduler import Scheduler
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "jobs.sqlite3")
+
+
+def test_identical_pending_jobs_are_deduplicated(queue):
+    first = queue.enqueue("a@example.com", ["historical_cli_price"])
+    again = queue.enqueue("a@example.com", ["historical_cli_price"])
+    other = queue.enqueue("a@example.com", ["historical_cli_price"], date(2025, 1, 1), date(2025, 1, 31))
+
+    assert first == (first[0], True)
+    assert again == (first[0], False)
+    assert other[1] and other[0] != first[0]
+
+
+def test_default_job_name_is_the_scraper_export_name_found_in_mails():
+    now = datetime(2025, 12, 31, 8, 5)
+    name = render_file_name(DEFAULT_NAME_TEMPLATE, 1, "a@example.com", now=now)
+
+    assert name == export_file_name(now) == "Exports_Minderset_31-12-2025_08h05s"
+    assert EXPORT_NAME_RE.fullmatch(name)
+
+
+def test_claim_orders_by_priority_and_limits_per_account(queue):
+    low, _ = queue.enqueue("a@example.com", ["f1"])
+    high, _ = queue.enqueue("a@example.com", ["f2"], priority=10)
+    other, _ = queue.enqueue("b@example.com", ["f1"])
+
+    assert queue.claim(account_min_interval=0).id == high
+    # a@example.com a déjà un job en cours : on passe au compte suivant
+    assert queue.claim(account_min_interval=0).id == other
+    assert queue.claim(account_min_interval=0) is None
+
+
+def test_crash_recovery_never_resubmits(queue):
+    queue.enqueue("a@example.com", ["f1"])
+    queue.enqueue("b@example.com", ["f1"])
+    submitting = queue.claim(account_min_interval=0)
+    running = queue.claim(account_min_interval=0)
+    queue.mark_submitting(submitting.id, submitting.file_name)
+
+    assert queue.recover(stale_after=-1) == {"requeued": 1, "uncertain": 1}
+    resumed = queue.claim(account_min_interval=0)
+    assert resumed.id == running.id and resumed.file_name == running.file_name
+    assert queue.claim(account_min_interval=0) is None
+
+
+def test_failure_before_submit_is_retried_then_failed(queue):
+    job_id, _ = queue.enqueue("a@example.com", ["f1"], max_attempts=2)
+    queue.mark_failed(queue.claim(account_min_interval=0).id, "timeout", submit_started=False, retry_delay=0)
+    queue.mark_failed(queue.claim(account_min_interval=0).id, "timeout", submit_started=False, retry_delay=0)
+
+    assert queue.counts() == {"failed": 1}
+    assert queue.jobs("failed")[0].id == job_id
+
+
+def test_scheduler_fails_job_with_unknown_account_instead_of_leaving_it_running(queue, monkeypatch):
+    monkeypatch.setattr(settings, "MINDEREST_EMAIL", "a@example.com")
+    monkeypatch.delenv("MINDEREST_PASSWORD_INCONNU_EXAMPLE_COM", raising=False)
+    queue.enqueue("inconnu@example.com", ["f1"], max_attempts=1)
+    scheduler = Scheduler(queue, concurrency=1, orchestrator=object())
+
+    asyncio.run(scheduler._execute(None, queue.claim(account_min_interval=0), 1))
+
+    assert queue.counts() == {"failed": 1}
+    assert "KeyError" in queue.jobs("failed")[0].error
+
+
+class InstantOrchestrator:
+    """Orchestrateur sans navigateur : chaque job réussit immédiatement"""
+
+    def __init__(self):
+        self.jobs = []
+
+    @asynccontextmanager
+    async def browser(self, expected_jobs: int = 1):
+        yield None
+
+    async def run_job(self, browser, job, label=None, before_submit=None):
+        self.jobs.append(job.file_name)
+        await before_submit(job.file_name)
+        return ExportResult(job, True, file_name=job.file_name, submit_started=True)
+
+
+def test_scheduler_recovers_jobs_of_a_worker_that_died_while_it_runs(queue, monkeypatch):
+    for name, value in {"MINDEREST_EMAIL": "a@example.com", "SYNC_ENABLED": False, "SCHEDULER_HEARTBEAT": 0.05,
+                        "SCHEDULER_STALE_AFTER": 0.3, "SCHEDULER_POLL_INTERVAL": 0.05,
+                        "SCHEDULER_ACCOUNT_MIN_INTERVAL": 0}.items():
+        monkeypatch.setattr(settings, name, value)
+    queue.enqueue("a@example.com", ["f1"])
+    # Job pris par un worker qui meurt juste après : heartbeat récent, donc pas repris au démarrage
+    orphan = queue.claim(account_min_interval=0)
+    orchestrator = InstantOrchestrator()
+
+    counts = asyncio.run(asyncio.wait_for(Scheduler(queue, concurrency=1, orchestrator=orchestrator).run(), 10))
+
+    assert counts == {"submitted": 1}
+    assert orchestrator.jobs == [orphan.file_name]
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from src.data_cleaning.reader import ExportReader
+
+HEADER = ["ID", "Concurrent", "Pays", "Date", "historical_cli_price", "historical_comp_stock"]
+
+
+def test_xlsx_is_read_in_typed_batches(tmp_path):
+    path = tmp_path / "export.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Lignes"
+    sheet.append(["Export historique Minderest"])
+    sheet.append(HEADER)
+    for i in range(25):
+        sheet.append([f"SKU{i}", "Concurrent A", "FR", "01/02/2025", 10.5 + i, i])
+    workbook.save(path)
+
+    reader = ExportReader(path, batch_rows=10)
+    batches = list(reader)
+
+    assert [len(b) for b in batches] == [10, 10, 5]
+    first = batches[0]
+    assert list(first.columns) == ["product_id", "competitor", "comp_country", "date",
+                                   "historical_cli_price", "historical_comp_stock"]
+    assert first["historical_cli_price"].dtype == np.float32
+    assert isinstance(first["comp_country"].dtype, pd.CategoricalDtype)
+    assert first["date"].iloc[0] == pd.Timestamp(2025, 2, 1)
+    assert reader.rows_read == 25
+
+
+def test_csv_keeps_unparsed_prices_raw(tmp_path):
+    path = tmp_path / "export.csv"
+    lines = [";".join(HEADER)] + [f"SKU{i};B;ES;02/02/2025;1 234,56 €;3" for i in range(7)]
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+    batches = list(ExportReader(path, batch_rows=4))
+
+    assert [len(b) for b in batches] == [4, 3]
+    assert batches[0]["historical_cli_price"].iloc[0] == "1 234,56 €"
+    assert batches[0]["historical_comp_stock"].dtype == np.float32
@@ -0,0 +1,44 @@
+from src.minderest.routing import RoutePolicy, RouteStats
+
+
+def policy(**kwargs) -> RoutePolicy:
+    defaults = dict(
+        block_resource_types=frozenset({"image", "font"}),
+        block_url_patterns=(r"google-analytics\.com", r"hotjar"),
+        allow_url_patterns=(r"/static/logo\.png",),
+        first_party_host="app.minderest.com",
+    )
+    return RoutePolicy(**{**defaults, **kwargs})
+
+
+def test_resource_types_and_url_patterns_are_blocked_unless_allowed():
+    rules = policy()
+
+    assert rules.should_block("https://app.minderest.com/img/a.png", "image")
+    assert rules.should_block("https://www.google-analytics.com/collect", "xhr")
+    assert not rules.should_block("https://app.minderest.com/static/logo.png", "image")
+    assert not rules.should_block("https://app.minderest.com/api/exports", "xhr")
+
+
+def test_third_party_frames_match_host_not_suffix():
+    rules = policy()
+
+    assert not rules.should_block("https://app.minderest.com/widget", "document", is_subframe_document=True)
+    assert not rules.should_block("https://cdn.app.minderest.com/x", "document", is_subframe_document=True)
+    assert rules.should_block("https://evilapp.minderest.com.example/x", "document", is_subframe_document=True)
+    assert rules.should_block("https://evilapp.minderest.com/x", "document", is_subframe_document=True)
+    assert rules.should_block("https://userpilot.io/frame", "document", is_subframe_document=True)
+    # Document principal jamais bloqué ; option désactivée : iframes tierces autorisées
+    assert not rules.should_block("https://userpilot.io/frame", "document")
+    assert not policy(block_third_party_frames=False).should_block(
+        "https://userpilot.io/frame", "document", is_subframe_document=True)
+
+
+def test_route_stats_estimate_saved_bytes_per_type():
+    stats = RouteStats()
+    stats.record("image", blocked=True)
+    stats.record("font", blocked=True)
+    stats.record("xhr", blocked=False)
+
+    assert stats.as_dict() == {"requests_total": 3, "requests_blocked": 2, "bytes_saved_estimate": 100_000,
+                               "blocked_by_type": {"image": 1, "font": 1}}
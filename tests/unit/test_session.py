@@ -0,0 +1,43 @@
+import os
+import time
+
+from src.minderest.session import SessionCache
+
+STATE = {"cookies": [{"name": "MINDEREST_SESSID", "value": "abc", "domain": "localhost", "path": "/"}],
+         "origins": []}
+
+
+def test_saved_session_is_reloaded_per_account(tmp_path):
+    cache = SessionCache(tmp_path, max_age_hours=12)
+    assert cache.load("a@example.com") is None
+
+    cache.save("a@example.com", STATE)
+    path = cache.load("A@Example.com ")        # même compte, casse et espaces ignorés
+    assert path == str(cache.path_for("a@example.com"))
+    assert "a@example.com" not in path          # email haché, pas en clair sur disque
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert cache.load("b@example.com") is None
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_expired_session_is_deleted(tmp_path):
+    cache = SessionCache(tmp_path, max_age_hours=1)
+    cache.save("a@example.com", STATE)
+    old = time.time() - 2 * 3600
+    os.utime(cache.path_for("a@example.com"), (old, old))
+
+    assert cache.load("a@example.com") is None
+    assert not cache.path_for("a@example.com").exists()
+
+    # max_age_hours=0 : pas d'expiration
+    cache.save("a@example.com", STATE)
+    os.utime(cache.path_for("a@example.com"), (old, old))
+    assert SessionCache(tmp_path, max_age_hours=0).load("a@example.com") is not None
+
+
+def test_invalidate_ignores_missing_file(tmp_path):
+    cache = SessionCache(tmp_path)
+    cache.invalidate("a@example.com")
+    cache.save("a@example.com", STATE)
+    cache.invalidate("a@example.com")
+    assert cache.load("a@example.com") is None
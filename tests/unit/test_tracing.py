@@ -0,0 +1,69 @@
+import os
+
+from src.minderest.browser_service import process_tree_rss_mb
+from src.minderest.tracing import NULL_SPAN, Tracer, escape_label
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+
+    assert tracer.span("login") is NULL_SPAN
+    tracer.incr("runs_total")
+    tracer.gauge("page_load_ms", 12)
+    assert (tracer.spans, dict(tracer.counters), tracer.gauges) == ([], {}, {})
+
+
+def test_nested_spans_counters_and_peak_gauges():
+    tracer = Tracer(enabled=True, labels={"job": "job1"})
+    with tracer.span("fill_export_form"):
+        with tracer.span("select_fields", count=3):
+            pass
+    try:
+        with tracer.span("submit_request"):
+            raise RuntimeError("toast absent")
+    except RuntimeError:
+        pass
+    tracer.incr("retries_total", step="login")
+    tracer.incr("retries_total", step="login")
+    tracer.gauge_max("browser_rss_peak_bytes", 300)
+    tracer.gauge_max("browser_rss_peak_bytes", 200)
+
+    spans = {s["name"]: s for s in tracer.spans}
+    assert spans["select_fields"]["parent"] == "fill_export_form" and spans["select_fields"]["count"] == 3
+    assert spans["submit_request"]["status"] == "error"
+    assert "RuntimeError: toast absent" in spans["submit_request"]["error"]
+    assert tracer.counters[("retries_total", (("step", "login"),))] == 2
+    assert tracer.gauges[("browser_rss_peak_bytes", ())] == 300
+
+
+def test_merged_carries_each_tracer_labels():
+    first, second = Tracer(enabled=True, labels={"job": "a"}), Tracer(enabled=True, labels={"job": "b"})
+    for tracer in (first, second):
+        with tracer.span("login"):
+            pass
+        tracer.incr("runs_total", status="success")
+    ignored = Tracer(enabled=False)
+
+    merged = Tracer.merged([first, second, ignored], run_id="batch")
+
+    assert len(merged.spans) == 2
+    assert set(merged.counters) == {("runs_total", (("job", "a"), ("status", "success"))),
+                                    ("runs_total", (("job", "b"), ("status", "success")))}
+
+
+def test_prometheus_output_escapes_label_values():
+    tracer = Tracer(enabled=True, labels={"account": 'a"b'})
+    tracer.incr("runs_total", status="failure")
+    tracer.gauge("page_load_ms", 1.5, phase="C:\\tmp\nx")
+
+    text = tracer.to_prometheus()
+
+    assert '# TYPE minderest_runs_total counter' in text
+    assert 'minderest_runs_total{account="a\\"b",status="failure"} 1' in text
+    assert 'minderest_page_load_ms{account="a\\"b",phase="C:\\\\tmp\\nx"} 1.5' in text
+    assert escape_label("ok") == "ok"
+
+
+def test_process_tree_rss_filters_by_process_name():
+    assert process_tree_rss_mb(os.getpid()) > 0
+    assert process_tree_rss_mb(os.getpid(), ("aucun_processus_de_ce_nom",)) == 0
@@ -0,0 +1,52 @@
+from datetime import date
+
+from src.minderest.calendar import DateRange
+from src.minderest.watermark import SyncWatermark
+
+TODAY = date(2025, 6, 15)
+
+
+def test_first_run_is_full_then_delta_once_export_is_stored(tmp_path):
+    watermark = SyncWatermark(tmp_path, full_refresh_days=30, overlap_days=2, input_dir=tmp_path / "input")
+    plan = watermark.plan("a@example.com", today=TODAY)
+    assert plan.full and plan.date_range.end == date(2025, 6, 14)
+
+    watermark.record_submitted("a@example.com", "Exports_A", plan.date_range, full=True)
+    # Tant que le fichier n'est pas arrivé, la période reste à demander
+    assert watermark.plan("a@example.com", today=TODAY).full
+
+    (tmp_path / "Exports_A.xlsx").write_bytes(b"")
+    assert watermark.plan("a@example.com", today=TODAY).date_range is None
+
+    delta = watermark.plan("a@example.com", today=date(2025, 6, 17))
+    assert not delta.full
+    assert delta.date_range == DateRange(date(2025, 6, 13), date(2025, 6, 16))
+
+
+def test_periodic_full_refresh_and_gaps(tmp_path):
+    watermark = SyncWatermark(tmp_path, full_refresh_days=30, overlap_days=0, input_dir=tmp_path / "input")
+    watermark.mark_stored("a@example.com", DateRange.last_days(today=TODAY), full=True)
+
+    assert watermark.plan("a@example.com", today=date(2025, 7, 16)).full
+    # Un delta qui laisse un trou ne fait pas avancer le watermark
+    watermark.mark_stored("a@example.com", DateRange(date(2025, 6, 20), date(2025, 6, 21)))
+    assert watermark.covered_until("a@example.com") == date(2025, 6, 14)
+
+
+def test_pending_export_is_promoted_from_mail_downloads_or_cleared_by_ingestion(tmp_path):
+    watermark = SyncWatermark(tmp_path / "historique", full_refresh_days=30, overlap_days=0,
+                              input_dir=tmp_path / "input")
+    full = watermark.plan("a@example.com", today=TODAY).date_range
+    watermark.record_submitted("a@example.com", "Exports_A", full, full=True)
+
+    # Pièce jointe téléchargée dans DATA_INPUT (pas encore archivée)
+    (tmp_path / "input").mkdir()
+    (tmp_path / "input" / "Exports_A.xlsx").write_bytes(b"")
+    assert watermark.covered_until("a@example.com") == date(2025, 6, 14)
+
+    delta = watermark.plan("a@example.com", today=date(2025, 6, 18)).date_range
+    watermark.record_submitted("a@example.com", "Exports_B", delta, full=False)
+    # Ingérée directement dans le dataset Parquet : plus rien en attente
+    watermark.mark_stored("a@example.com", delta)
+    assert watermark._read()["accounts"]["a@example.com"]["pending"] == []
+    assert watermark.plan("a@example.com", today=date(2025, 6, 18)).date_range is None
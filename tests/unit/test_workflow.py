@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from src.minderest.fields import FieldSelectionError, FieldSelectionReport
+from src.minderest.tracing import Tracer
+from src.minderest.workflow import AsyncExportWorkflow, Checkpoint, ExportWorkflow, FAILURE_POLICIES
+
+
+class FakePage:
+    url = "https://app.minderest.com/fr/exports/historical"
+
+
+class FakeScraper:
+    """Enregistre les étapes jouées ; les échecs sont injectés par nom d'étape"""
+
+    def __init__(self, failures=None):
+        self.page = FakePage()
+        self.tracer = Tracer(enabled=False)
+        self.session_cache = None
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    def _step(self, name):
+        self.calls.append(name)
+        if self.failures.get(name):
+            self.failures[name] -= 1
+            raise FieldSelectionError(FieldSelectionReport(results={"f": "failed"}))
+
+    def ensure_logged_in(self): self._step("login")
+    def navigate_to_exports(self): self._step("navigate")
+    def set_export_name(self, file_name): self._step("name")
+    def select_export_fields(self, fields): self._step("fields")
+    def select_date_range(self, date_range): self._step("dates")
+    def submit_request(self): self._step("submit")
+
+
+class FakeAsyncScraper(FakeScraper):
+    """Mêmes étapes en coroutines (AsyncMinderestScraper)"""
+
+    async def ensure_logged_in(self): self._step("login")
+    async def navigate_to_exports(self): self._step("navigate")
+    async def set_export_name(self, file_name): self._step("name")
+    async def select_export_fields(self, fields): self._step("fields")
+    async def select_date_range(self, date_range): self._step("dates")
+    async def submit_request(self): self._step("submit")
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr("src.minderest.workflow.time.sleep", lambda s: None)
+
+    async def no_async_sleep(s):
+        return None
+    monkeypatch.setattr("src.minderest.workflow.asyncio.sleep", no_async_sleep)
+
+
+def test_failed_step_is_retried_without_replaying_previous_steps(monkeypatch):
+    scraper = FakeScraper(failures={"fields": 1})
+    workflow = ExportWorkflow(scraper, fields=["historical_cli_price"], file_name="x", submit=True)
+    monkeypatch.setattr(workflow, "detect_state", lambda: Checkpoint.DATES_APPLIED)
+
+    assert workflow.run() == "x"
+    assert scraper.calls == ["login", "navigate", "name", "fields", "fields", "dates", "submit"]
+    assert workflow.checkpoint is Checkpoint.SUBMITTED
+    assert workflow.failures[0][:2] == ("select_export_fields", "selection")
+
+
+def test_submit_is_never_replayed():
+    scraper = FakeScraper(failures={"submit": 1})
+    workflow = ExportWorkflow(scraper, fields=["f"], file_name="x", submit=True)
+
+    with pytest.raises(FieldSelectionError):
+        workflow.run()
+    assert scraper.calls.count("submit") == 1
+    assert workflow.checkpoint is Checkpoint.DATES_APPLIED
+
+
+def test_backoff_grows_per_failure_kind():
+    assert FAILURE_POLICIES["auth"].delay(3) == 0
+    assert FAILURE_POLICIES["network"].delay(1) < FAILURE_POLICIES["network"].delay(3) <= 30
+
+
+def test_async_workflow_shares_checkpoints_and_failure_policies(monkeypatch):
+    scraper = FakeAsyncScraper(failures={"fields": 1, "submit": 1})
+    workflow = AsyncExportWorkflow(scraper, fields=["f"], file_name="x", submit=True)
+
+    async def detected():
+        return Checkpoint.NAME_SET
+    monkeypatch.setattr(workflow, "detect_state", detected)
+
+    async def run():
+        await workflow.run(until=Checkpoint.LOGGED_IN)    # sous le verrou de compte (orchestrateur)
+        assert workflow.checkpoint is Checkpoint.LOGGED_IN
+        assert await workflow.run(until=Checkpoint.DATES_APPLIED) == "x"
+        await workflow.run()
+
+    with pytest.raises(FieldSelectionError):
+        asyncio.run(run())
+    assert scraper.calls == ["login", "navigate", "name", "fields", "fields", "dates", "submit"]
+    assert workflow.failures[0][:2] == ("select_export_fields", "selection")
+    assert workflow.checkpoint is Checkpoint.DATES_APPLIED